@@ -0,0 +1,72 @@
+"""
+Benchmark: adding the building triples to a Dataset graph one at a time (g.add on a Memory store) vs in one batch
+(add_triples on a BulkMemory store, see modules/bulk_store.py), at increasing model sizes.
+The time per triple should stay flat as the model grows, i.e. the insert scales linearly.
+
+Usage:
+    python benchmarks/bulk_insert.py [--sizes 10000 100000 300000]
+"""
+import argparse
+import time
+
+import rdflib
+from rdflib.plugins.stores.memory import Memory
+
+from brick_xlsx_generator.modules.bulk_store import BulkMemory, add_triples
+
+BRICK = rdflib.Namespace("https://brickschema.org/schema/Brick#")
+BUILDING = rdflib.Namespace("https://example.com/example_building#")
+GRAPH = rdflib.URIRef("https://_graph_.com#building")
+
+
+def building_triples(n: int):
+    # roughly the shape of a processed points sheet: type, label, a reference and its inverse per point
+    triples = []
+    for i in range(n):
+        point, equip = BUILDING[f"point_{i}"], BUILDING[f"equip_{i // 20}"]
+        triples.append((point, rdflib.RDF.type, BRICK.Zone_Air_Temperature_Sensor))
+        triples.append((point, rdflib.RDFS.label, rdflib.Literal(f"Point {i}")))
+        triples.append((point, BRICK.isPointOf, equip))
+        triples.append((equip, BRICK.hasPoint, point))
+    return triples
+
+
+def insert(method: str, triples: list):
+    ds = rdflib.Dataset(store=Memory() if method == "add" else BulkMemory(), default_union=True)
+    g = ds.graph(GRAPH)
+    start = time.perf_counter()
+    if method == "add":
+        for triple in triples:
+            g.add(triple)
+    else:
+        add_triples(g, triples)
+    return time.perf_counter() - start, g
+
+
+def _digest(g: rdflib.Graph):
+    # order independent summary of a graph's triples, small enough to keep while the next graph is built
+    return len(g), sum(hash(triple) for triple in g)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 300000], help="number of points")
+    args = parser.parse_args()
+
+    for points in args.sizes:
+        triples = building_triples(points)
+        # each graph is released before the next insert, so neither is timed against the other's heap
+        add_seconds, g = insert("add", triples)
+        expected = _digest(g)
+        del g
+        bulk_seconds, g = insert("bulk", triples)
+        assert _digest(g) == expected, "g.add and bulk insert differ"
+        del g
+
+        print(f"{points} points, {len(triples)} triples:")
+        print(f"\tg.add:  {add_seconds:.3f}s ({add_seconds / len(triples) * 1e6:.2f}us/triple)")
+        print(f"\tbulk:   {bulk_seconds:.3f}s ({bulk_seconds / len(triples) * 1e6:.2f}us/triple, {add_seconds / bulk_seconds:.2f}x g.add)")
+
+
+if __name__ == "__main__":
+    main()
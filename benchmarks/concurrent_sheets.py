@@ -0,0 +1,57 @@
+"""
+Benchmark: sequential process_sheet() vs triple_generator.process_sheets() across a pool of worker processes, on a points sheet.
+Speed-up depends on the number of cores available. Both produce the same triples (in a different order, as each chunk is processed column by column).
+
+Usage:
+    python benchmarks/concurrent_sheets.py [--points 200000] [--workers 2 4 8 16]
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import time
+from collections import Counter
+
+from brick_xlsx_generator.modules import triple_generator as tg
+from brick_xlsx_generator.modules.reference_resolver import ReferenceResolver
+from brick_xlsx_generator.relationships import BRICK_RELATIONSHIPS
+
+from triple_generator import NAMESPACES, make_equipment, make_points
+
+logging.disable(logging.WARNING)
+
+RELATIONSHIPS = {"Brick": BRICK_RELATIONSHIPS}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=200000)
+    parser.add_argument("--equipment", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8, 16])
+    args = parser.parse_args()
+
+    df = make_points(args.points, args.equipment)
+    resolver = ReferenceResolver.from_dataframes([make_equipment(args.equipment)])
+
+    # process_sheet() prints progress for every chunk
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        sequential, _ = tg.process_sheet(df, NAMESPACES, RELATIONSHIPS, ("Brick", "identifier"), resolver)
+        sequential_time = time.perf_counter() - start
+
+        timings = {}
+        for workers in args.workers:
+            start = time.perf_counter()
+            [(concurrent, _)] = tg.process_sheets([df], NAMESPACES, RELATIONSHIPS, ("Brick", "identifier"), resolver, workers)
+            timings[workers] = time.perf_counter() - start
+            assert Counter(concurrent) == Counter(sequential), "sequential and concurrent output differ"
+
+    print(f"{args.points} points, {len(sequential)} triples, {os.cpu_count()} cpus:")
+    print(f"\tsequential: {sequential_time:.3f}s")
+    for workers, seconds in timings.items():
+        print(f"\t{workers} workers: {seconds:.3f}s ({sequential_time / seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Stand-in SPARQL 1.1 Graph Store and Update endpoint, holding the uploaded graphs in an rdflib Dataset.
+Used to test and benchmark uploads (see Dataset.upload and modules/sparql_upload.py) without a triple store.
+Connections are kept alive (HTTP/1.1) and counted. Latency and failures can be injected.
+
+    Graph Store:  GET/PUT/POST/DELETE http://host:port/graph-store?graph=<uri>   (N-Triples)
+    Update:       POST http://host:port/update                                  (application/sparql-update)
+
+Usage:
+    python benchmarks/graph_store_server.py [--port 8000] [--latency 0.01] [--fail-rate 0.05] [--applied-fail-rate 0.05]
+"""
+import argparse
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import rdflib
+
+
+class GraphStoreServer(ThreadingHTTPServer):
+    """
+    :param latency: seconds added to every request
+    :param fail_rate: share of the upload requests answered with a 503 (before they are applied)
+    :param applied_fail_rate: share of the upload requests answered with a 504 after they are applied (e.g. a gateway timeout)
+    """
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency: float = 0.0, fail_rate: float = 0.0, seed: int = 0, applied_fail_rate: float = 0.0):
+        super().__init__(address, _Handler)
+        self.dataset = rdflib.Dataset()
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.applied_fail_rate = applied_fail_rate
+        self.connections = 0
+        self.requests = 0
+        self.failures = 0
+        self.applied_failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def graph(self, identifier: str) -> rdflib.Graph:
+        return self.dataset.graph(rdflib.URIRef(identifier))
+
+    def start(self):
+        """
+        Serves requests from a background thread. Returns the server.
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _graph(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        return query['graph'][0] if 'graph' in query else None
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def _respond(self, status: int, body: bytes = b"", content_type: str = "text/plain"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start(self) -> bool:
+        # counts the request and applies the latency. False if the request is to fail.
+        server = self.server
+        with server._lock:
+            server.requests += 1
+            fail = self.command in ["POST", "PUT"] and server._random.random() < server.fail_rate
+            if fail:
+                server.failures += 1
+        if server.latency:
+            time.sleep(server.latency)
+        return not fail
+
+    def _applied_fail(self) -> bool:
+        # True if an applied upload request is to be answered with a 504
+        server = self.server
+        with server._lock:
+            fail = server._random.random() < server.applied_fail_rate
+            if fail:
+                server.applied_failures += 1
+        return fail
+
+    def do_GET(self):
+        self._start()
+        graph = self._graph()
+        if graph is None:
+            return self._respond(400, b"graph parameter required")
+        self._respond(200, self.server.graph(graph).serialize(format="nt", encoding="utf-8"), "application/n-triples")
+
+    def do_PUT(self):
+        body = self._body()
+        if not self._start():
+            return self._respond(503, b"injected failure")
+        graph = self._graph()
+        with self.server._lock:
+            self.server.dataset.remove_graph(rdflib.URIRef(graph))
+            self.server.graph(graph).parse(data=body.decode(), format="nt")
+        if self._applied_fail():
+            return self._respond(504, b"injected failure after the request was applied")
+        self._respond(201)
+
+    def do_POST(self):
+        body = self._body()
+        if not self._start():
+            return self._respond(503, b"injected failure")
+        with self.server._lock:
+            if self.headers.get('Content-Type', '').startswith("application/sparql-update"):
+                self.server.dataset.update(body.decode())
+            else:
+                graph = self._graph()
+                if graph is None:
+                    return self._respond(400, b"graph parameter required")
+                self.server.graph(graph).parse(data=body.decode(), format="nt")
+        if self._applied_fail():
+            return self._respond(504, b"injected failure after the request was applied")
+        self._respond(204)
+
+    def do_DELETE(self):
+        self._start()
+        graph = rdflib.URIRef(self._graph())
+        with self.server._lock:
+            if len(self.server.graph(graph)) == 0:
+                return self._respond(404, b"graph not found")
+            self.server.dataset.remove_graph(graph)
+        self._respond(204)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of upload requests answered with a 503")
+    parser.add_argument("--applied-fail-rate", type=float, default=0.0, help="share of upload requests answered with a 504 after they are applied")
+    args = parser.parse_args()
+
+    server = GraphStoreServer(("127.0.0.1", args.port), args.latency, args.fail_rate, applied_fail_rate=args.applied_fail_rate)
+    print(f"Graph Store: {server.url}/graph-store, Update: {server.url}/update")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
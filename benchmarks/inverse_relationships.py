@@ -0,0 +1,59 @@
+"""
+Benchmark: generating inverse relationships for a building graph with the SPARQL INSERT vs the native owl:inverseOf table.
+
+Usage:
+    python benchmarks/inverse_relationships.py [--entities 20000]
+"""
+import argparse
+import logging
+import time
+
+import rdflib
+
+import brick_xlsx_generator as bg
+from brick_xlsx_generator.modules import triple_generator as tg, sparql_queries as sq
+
+logging.disable(logging.INFO)
+
+
+def building_triples(ds, n: int):
+    BRICK = ds._namespaces['brick']
+    BUILDING = rdflib.Namespace("https://example.com/example_building#")
+    triples = []
+    for i in range(n):
+        point, equip = BUILDING[f"point_{i}"], BUILDING[f"equip_{i // 10}"]
+        triples.append((point, rdflib.RDF.type, BRICK.Zone_Air_Temperature_Sensor))
+        triples.append((point, BRICK.isPointOf, equip))
+        triples.append((equip, BRICK.hasLocation, BUILDING[f"floor_{i % 20}"]))
+    return triples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, default=20000)
+    args = parser.parse_args()
+
+    results = {}
+    for method in ["sparql", "native"]:
+        ds = bg.Dataset()
+        g = ds.graph(ds._graph_namespace['building'])
+        triples = building_triples(ds, args.entities)
+        for triple in triples:
+            g.add(triple)
+
+        start = time.perf_counter()
+        if method == "sparql":
+            ds.update(sq.generate_inverse_relationships_for_graph(), initBindings={"g": g.identifier})
+        else:
+            for triple in tg.generate_inverses(triples, ds._inverses):
+                g.add(triple)
+        results[method] = (time.perf_counter() - start, set(g))
+
+    assert results["sparql"][1] == results["native"][1], "SPARQL and native inverses differ"
+    print(f"{args.entities} entities, {len(results['native'][1])} triples:")
+    print(f"\tsparql: {results['sparql'][0]:.3f}s")
+    print(f"\tnative: {results['native'][0]:.3f}s ({results['sparql'][0] / results['native'][0]:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
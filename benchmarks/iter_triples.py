@@ -0,0 +1,71 @@
+"""
+Benchmark: consuming a synthetic workbook's triples (see synthetic_workbook.py) with bg.iter_triples(), which holds no model or
+ontology graph, vs Dataset.process() into the in-memory store. Each run is in a new process, as the ontologies are shared process-wide.
+Peak memory is the maximum resident set size of the process, so it includes the Python runtime.
+
+Usage:
+    python benchmarks/iter_triples.py [--points 100000] [--chunk-size 10000]
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic_workbook import write_workbook
+
+METHODS = ["iter_triples", "process"]
+
+
+def run(path: str, method: str, chunk_size: int) -> dict:
+    import brick_xlsx_generator as bg
+    logging.disable(logging.WARNING)
+
+    start = time.perf_counter()
+    # process_sheet() prints progress
+    with contextlib.redirect_stdout(io.StringIO()):
+        if method == "iter_triples":
+            triples = sum(1 for _ in bg.iter_triples(path, "benchmark", "building", chunk_size=chunk_size))
+        else:
+            triples = bg.Dataset().process(path, "benchmark", "building").triples
+    return {
+        'seconds': time.perf_counter() - start,
+        'peak_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        'triples': triples
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--run", nargs=2, metavar=("WORKBOOK", "METHOD"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run(*args.run, args.chunk_size)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "workbook.xlsx")
+        write_workbook(path, args.points)
+        results = {}
+        for method in METHODS:
+            output = subprocess.run([sys.executable, __file__, "--run", path, method, "--chunk-size", str(args.chunk_size)],
+                                    capture_output=True, text=True, check=True).stdout
+            results[method] = json.loads(output.splitlines()[-1])
+
+    print(f"{args.points} points:")
+    for method, result in results.items():
+        print(f"\t{method:<13} {result['seconds']:.3f}s, peak RSS {result['peak_bytes'] / 1e6:>7.1f}MB, {result['triples']} triples")
+    print("\titer_triples yields duplicate triples (e.g. a relationship defined on both entities); process() counts the graph's triples.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: a portfolio of synthetic workbooks (see synthetic_workbook.py) processed into separate graphs of one Dataset,
+one after another vs concurrently from a pool of threads, then exported one graph at a time vs with export_all().
+Each building graph is checked against the same workbook processed into a Dataset on its own.
+
+Usage:
+    python benchmarks/multi_building.py [--buildings 4] [--points 5000] [--store-path portfolio.db]
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import brick_xlsx_generator as bg
+
+from synthetic_workbook import write_workbook
+
+logging.disable(logging.WARNING)
+
+
+def process_all(paths: dict, store_path: str, threads: int):
+    ds = bg.Dataset(store_path=store_path)
+    start = time.perf_counter()
+    # process_sheet() prints progress
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(ds.process, path, "benchmark", name, graph_name=name) for name, path in paths.items()]
+        for future in futures:
+            future.result()
+    return ds, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buildings", type=int, default=4)
+    parser.add_argument("--points", type=int, default=5000, help="points per building")
+    parser.add_argument("--store-path", default=None, help="SQLite database to process into, instead of memory")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for i in range(args.buildings):
+            paths[f"building_{i}"] = os.path.join(tmp, f"building_{i}.xlsx")
+            write_workbook(paths[f"building_{i}"], args.points, seed=i)
+
+        # each building on its own
+        expected = {}
+        for name, path in paths.items():
+            ds = bg.Dataset()
+            with contextlib.redirect_stdout(io.StringIO()):
+                ds.process(path, "benchmark", name)
+            expected[name] = len(ds.graph(ds._graph_namespace['building']))
+
+        print(f"{args.buildings} buildings of {args.points} points, {'SQLite' if args.store_path else 'memory'} store:")
+        for threads in [1, args.buildings]:
+            if args.store_path and os.path.exists(args.store_path):
+                os.remove(args.store_path)
+            ds, seconds = process_all(paths, args.store_path, threads)
+            ok = all(len(ds.graph(ds._graph_namespace[name])) == triples for name, triples in expected.items())
+            print(f"\tprocess, {threads} thread(s): {seconds:.3f}s; {'OK' if ok else 'MISMATCH'}")
+
+        start = time.perf_counter()
+        for name in paths:
+            ds.export(export_path=os.path.join(tmp, "sequential"), graph_name=name)
+        print(f"\texport one at a time: {time.perf_counter() - start:.3f}s")
+        start = time.perf_counter()
+        ds.export_all(export_path=os.path.join(tmp, "export_all"))
+        print(f"\texport_all: {time.perf_counter() - start:.3f}s")
+        ds.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark: Dataset()/Graph() construction time with a cold vs warm ontology cache.
+
+Usage:
+    python benchmarks/ontology_cache.py [--repeat N]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from rdflib.plugins.stores.memory import Memory
+
+import brick_xlsx_generator as bg
+from brick_xlsx_generator.modules import ontology_cache
+
+logging.disable(logging.INFO)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["BRICK_XLSX_CACHE_DIR"] = cache_dir
+
+        for name, construct in [
+            ("Dataset", lambda **kw: bg.Dataset(store=Memory(), **kw)),
+            ("Graph", lambda **kw: bg.Graph(**kw)),
+        ]:
+            no_cache = min(timed(lambda: construct(use_ontology_cache=False)) for _ in range(args.repeat))
+
+            ontology_cache.clear_cache()
+            cold = timed(construct)
+            warm = min(timed(construct) for _ in range(args.repeat))
+
+            print(f"{name}:")
+            print(f"\tno cache: {no_cache:.3f}s")
+            print(f"\tcold:     {cold:.3f}s (parse + write cache)")
+            print(f"\twarm:     {warm:.3f}s ({no_cache / warm:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
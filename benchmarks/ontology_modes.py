@@ -0,0 +1,71 @@
+"""
+Benchmark: Dataset(ontology_mode=...) start up time and memory for each ontology mode (see ontology_store.ONTOLOGY_MODES),
+and the time to process and export the building of a synthetic workbook (see synthetic_workbook.py).
+Each mode is run in a new process, as the ontologies are shared process-wide. Run it twice: the first run fills the ontology cache.
+
+Usage:
+    python benchmarks/ontology_modes.py [--points 1000]
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from synthetic_workbook import write_workbook
+
+ONTOLOGY_MODES = ["full", "lazy", "subset"]
+
+
+def run(path: str, ontology_mode: str) -> dict:
+    import brick_xlsx_generator as bg
+    logging.disable(logging.WARNING)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    ds = bg.Dataset(ontology_mode=ontology_mode)
+    init_seconds = time.perf_counter() - start
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    # process_sheet() prints progress
+    with contextlib.redirect_stdout(io.StringIO()):
+        ds.process(path, "benchmark", "building")
+    with tempfile.TemporaryDirectory() as tmp:
+        ds.export("building", tmp, timestamp=False)
+    return {'init_seconds': init_seconds, 'init_bytes': held, 'process_seconds': time.perf_counter() - start, 'triples': len(ds)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=1000)
+    parser.add_argument("--run", nargs=2, metavar=("WORKBOOK", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run(*args.run)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "workbook.xlsx")
+        write_workbook(path, args.points)
+        results = {}
+        for ontology_mode in ONTOLOGY_MODES:
+            output = subprocess.run([sys.executable, __file__, "--run", path, ontology_mode], capture_output=True, text=True, check=True).stdout
+            results[ontology_mode] = json.loads(output.splitlines()[-1])
+
+    print(f"{args.points} points:")
+    for ontology_mode, result in results.items():
+        print(f"\t{ontology_mode:<7} Dataset() {result['init_seconds'] * 1000:>7.1f}ms, {result['init_bytes'] / 1e6:>6.1f}MB; "
+              f"process + building export {result['process_seconds']:.3f}s; {result['triples']} triples in the Dataset")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: resolving 'ref' relationship values with the df_map table scan vs the ReferenceResolver.
+
+Each size defines N entities and resolves one reference per entity, so time per reference should stay flat
+for the resolver (linear overall) and grow with N for the table scan (quadratic overall).
+
+Usage:
+    python benchmarks/reference_resolver.py [--sizes 1000 2000 4000 8000]
+"""
+import argparse
+import logging
+import random
+import time
+
+import pandas as pd
+
+from brick_xlsx_generator.modules.reference_resolver import ReferenceResolver
+
+logging.disable(logging.WARNING)
+
+
+def make_sheet(n: int):
+    return pd.DataFrame({
+        ("Brick", "identifier"): [f"id_{i}" for i in range(n)],
+        ("Brick", "label"): [f"label {i}" for i in range(n)],
+    })
+
+
+def df_map_lookup(df, references):
+    # previous approach: one column scan per reference
+    df_map = df[[("Brick", "identifier"), ("Brick", "label")]].copy()
+    df_map.columns = ['subject', 'custom']
+    resolved = []
+    for value in references:
+        match = df_map.loc[df_map.custom == value]['subject'].values
+        resolved.append(match[0] if len(match) else None)
+    return resolved
+
+
+def resolver_lookup(df, references):
+    resolver = ReferenceResolver.from_dataframes([df], ("Brick", "label"))
+    return resolver.resolve_many(references)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 4000, 8000])
+    parser.add_argument("--max-scan-size", type=int, default=8000, help="skip the table scan above this size")
+    args = parser.parse_args()
+
+    random.seed(0)
+    print(f"{'entities':>10} {'df_map (s)':>12} {'resolver (s)':>13} {'resolver us/ref':>16}")
+    for n in args.sizes:
+        df = make_sheet(n)
+        references = [f"label {random.randrange(n)}" for _ in range(n)]
+
+        scan = None
+        if n <= args.max_scan_size:
+            start = time.perf_counter()
+            df_map_lookup(df, references)
+            scan = time.perf_counter() - start
+
+        start = time.perf_counter()
+        resolver_lookup(df, references)
+        resolver = time.perf_counter() - start
+
+        scan_str = f"{scan:.3f}" if scan is not None else "-"
+        print(f"{n:>10} {scan_str:>12} {resolver:>13.4f} {resolver / n * 1e6:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark: constructing many Datasets (one per building) with and without the shared ontology store.
+
+Usage:
+    python benchmarks/shared_ontology_store.py [--buildings N]
+"""
+import argparse
+import logging
+import time
+import tracemalloc
+
+import brick_xlsx_generator as bg
+from brick_xlsx_generator.modules import ontology_store
+
+logging.disable(logging.INFO)
+
+
+def run(buildings: int, shared_ontologies: bool):
+    ontology_store.clear_shared_ontology_stores()
+    tracemalloc.start()
+    datasets = []
+    timings = []
+    for _ in range(buildings):
+        start = time.perf_counter()
+        datasets.append(bg.Dataset(shared_ontologies=shared_ontologies))
+        timings.append(time.perf_counter() - start)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return timings, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buildings", type=int, default=10)
+    args = parser.parse_args()
+
+    for label, shared in [("per-Dataset ontologies", False), ("shared ontologies", True)]:
+        timings, peak = run(args.buildings, shared)
+        print(f"{label} ({args.buildings} Datasets):")
+        print(f"\tfirst:      {timings[0]:.3f}s")
+        print(f"\tsubsequent: {sum(timings[1:]) / max(len(timings) - 1, 1):.4f}s avg")
+        print(f"\tpeak mem:   {peak / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
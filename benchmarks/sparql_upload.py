@@ -0,0 +1,64 @@
+"""
+Benchmark: Dataset.upload() of a synthetic workbook's building model (see synthetic_workbook.py) to the stand-in
+Graph Store endpoint (see graph_store_server.py), for several batch sizes and concurrency levels.
+--latency simulates the network round trip; --fail-rate answers a share of the requests with a 503, which are retried.
+Each upload is checked against the Dataset's building graph.
+
+Usage:
+    python benchmarks/sparql_upload.py [--points 10000] [--latency 0.02] [--fail-rate 0.05] [--protocol graph_store]
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import tempfile
+
+import rdflib
+
+import brick_xlsx_generator as bg
+
+from graph_store_server import GraphStoreServer
+from synthetic_workbook import write_workbook
+
+logging.disable(logging.WARNING)
+
+GRAPH = rdflib.URIRef("https://_graph_.com#building")
+
+# (batch_size, concurrency)
+CONFIGS = [(1000, 1), (10000, 1), (1000, 4), (10000, 4)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every request")
+    parser.add_argument("--fail-rate", type=float, default=0.05, help="share of upload requests answered with a 503")
+    parser.add_argument("--protocol", default="graph_store", choices=["graph_store", "update"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "workbook.xlsx")
+        write_workbook(path, args.points)
+        ds = bg.Dataset()
+        # process_sheet() prints progress
+        with contextlib.redirect_stdout(io.StringIO()):
+            ds.process(path, "benchmark", "building")
+    expected = len(ds.graph(GRAPH))
+
+    print(f"{args.points} points, {expected} triples, {args.protocol}, {args.latency * 1000:.0f}ms latency, {args.fail_rate:.0%} failed requests:")
+    for batch_size, concurrency in CONFIGS:
+        server = GraphStoreServer(latency=args.latency, fail_rate=args.fail_rate).start()
+        endpoint = f"{server.url}/{'graph-store' if args.protocol == 'graph_store' else 'update'}"
+        try:
+            stats = ds.upload(endpoint, protocol=args.protocol, batch_size=batch_size, concurrency=concurrency, retries=5, backoff=0.05).upload
+            uploaded = len(server.graph(GRAPH))
+        finally:
+            server.stop()
+        print(f"\tbatch {batch_size:>6}, concurrency {concurrency}: {stats['seconds']:.3f}s, {stats['triples_per_second']:>8.0f} triples/s, "
+              f"{stats['requests']} requests ({stats['retries']} retries) over {stats['connections']} connections; "
+              f"{'OK' if uploaded == expected else f'MISMATCH: {uploaded} triples in the graph store'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: insert and export throughput of the disk-backed SQLite store (see modules/sqlite_store.py) vs the in-memory
+BulkMemory store, at increasing model sizes. Each model is a building graph in a Dataset, inserted with add_triples (addN)
+and exported as Turtle, as process() and export() do. The SQLite database is then reopened and exported again,
+without reprocessing, and checked against the in-memory graph.
+
+Usage:
+    python benchmarks/sqlite_store.py [--sizes 10000 100000 300000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import rdflib
+
+from brick_xlsx_generator.modules.bulk_store import BulkMemory, add_triples
+from brick_xlsx_generator.modules.sqlite_store import SQLiteStore
+
+from bulk_insert import building_triples, GRAPH
+
+
+def run(store, triples: list, export_path: str) -> dict:
+    ds = rdflib.Dataset(store=store, default_union=True)
+    g = ds.graph(GRAPH)
+    tracemalloc.start()
+    start = time.perf_counter()
+    add_triples(g, triples)
+    insert_seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'insert': insert_seconds, 'export': export(g, export_path), 'peak_mb': peak / 1e6, 'graph': g}
+
+
+def export(g: rdflib.Graph, export_path: str) -> float:
+    start = time.perf_counter()
+    g.serialize(export_path, format="turtle")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 300000], help="number of points")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for points in args.sizes:
+            triples = building_triples(points)
+            path = os.path.join(tmp, f"{points}.db")
+            memory = run(BulkMemory(), triples, os.path.join(tmp, "memory.ttl"))
+            sqlite = run(SQLiteStore(path), triples, os.path.join(tmp, "sqlite.ttl"))
+            sqlite['graph'].store.close()
+
+            # a reopened database serves the export without reinserting the triples
+            start = time.perf_counter()
+            reopened = rdflib.Dataset(store=SQLiteStore(path), default_union=True).graph(GRAPH)
+            reopen_seconds = time.perf_counter() - start
+            reopen_export = export(reopened, os.path.join(tmp, "reopened.ttl"))
+            assert set(reopened) == set(memory['graph']), "SQLite and Memory graphs differ"
+            reopened.store.close()
+            del memory['graph'], sqlite['graph']
+
+            print(f"{points} points, {len(triples)} triples:")
+            for name, result in [("memory", memory), ("sqlite", sqlite)]:
+                print(f"\t{name}: insert {result['insert']:.3f}s ({len(triples) / result['insert']:>8.0f} triples/s), "
+                      f"export {result['export']:.3f}s ({len(triples) / result['export']:>8.0f} triples/s), insert peak {result['peak_mb']:.0f}MB")
+            print(f"\treopened sqlite: open {reopen_seconds:.3f}s, export {reopen_export:.3f}s; database {os.path.getsize(path) / 1e6:.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
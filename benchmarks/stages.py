@@ -0,0 +1,124 @@
+"""
+Benchmark suite: times each stage of Dataset.process() and Dataset.export() on synthetic workbooks of increasing size
+(see synthetic_workbook.py), and saves the results as JSON so runs can be compared across commits.
+
+Stages are those of the process() and export() reports (see modules/process_report.py), in process() order:
+    load_excel          helpers.import_model_template_file
+    build_df_map        ReferenceResolver (the df_map lookup table)
+    process_{sheet}     triple generation for the locations, equipment and points sheets
+    resolve_references  unresolved reference summary
+    graph_add           adding the entity triples to the building graph
+    inverses            native inverse relationship generation
+    tags                adding the SwitchTags triples
+    export_{mode}       Dataset.export() for each export mode
+
+Usage:
+    python benchmarks/stages.py [--sizes 1000 10000 100000 1000000] [--refs 0.5] [--switch 0.5] [--tags 2] [--output results.json]
+    python benchmarks/stages.py --sizes 10000 --compare previous.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+
+import rdflib
+
+import brick_xlsx_generator as bg
+
+from synthetic_workbook import write_workbook
+
+logging.disable(logging.WARNING)
+
+EXPORT_MODES = ["building", "equipment_locations_systems", "full"]
+
+
+def run(path: str, export_path: str, export_modes: list) -> dict:
+    """
+    Processes the workbook, then exports it in each export mode. Returns the stage timings (from the process and export reports) and model size.
+    """
+    ds = bg.Dataset()
+    # process_sheet() prints progress
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = ds.process(path, "benchmark", "building")
+    stages = {name: round(stage['seconds'], 4) for name, stage in report.stages.items()}
+
+    for export_mode in export_modes:
+        export_report = ds.export(export_mode, export_path, timestamp=False)
+        stages[f"export_{export_mode}"] = round(export_report.seconds, 4)
+
+    return {
+        'rows': {name.replace("process_", ""): stage['rows'] for name, stage in report.stages.items() if name.startswith("process_")},
+        'triples': report.triples,
+        'peak_rss_growth': sum(stage['peak_rss_growth'] or 0 for stage in report.stages.values()),
+        'stages': stages,
+        'total': round(sum(stages.values()), 4)
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, previous: dict):
+    previous_runs = {run['points']: run for run in previous['runs']}
+    print(f"\nCompared to {previous.get('commit')} ({previous.get('created')}):")
+    for run in results['runs']:
+        if run['points'] not in previous_runs: continue
+        print(f"{run['points']} points:")
+        for stage, seconds in run['stages'].items():
+            before = previous_runs[run['points']]['stages'].get(stage)
+            if before:
+                print(f"\t{stage:<40} {before:>9.3f}s -> {seconds:>9.3f}s ({seconds / before:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--refs", type=float, default=0.5, help="fraction of entities with optional ref relationships")
+    parser.add_argument("--switch", type=float, default=0.5, help="fraction of entities with Switch relationships")
+    parser.add_argument("--tags", type=int, default=2, help="number of SwitchTags columns")
+    parser.add_argument("--export-modes", nargs="*", default=EXPORT_MODES)
+    parser.add_argument("--output", help="JSON file to save the results to")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare against")
+    args = parser.parse_args()
+
+    results = {
+        'commit': git_commit(),
+        'created': datetime.now().isoformat(timespec="seconds"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'rdflib': rdflib.__version__,
+        'workbook': {'refs': args.refs, 'switch': args.switch, 'tags': args.tags},
+        'runs': []
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for points in args.sizes:
+            path = os.path.join(tmp, f"points_{points}.xlsx")
+            write_workbook(path, points, refs=args.refs, switch=args.switch, tags=args.tags)
+            run_result = {'points': points, **run(path, os.path.join(tmp, "output"), args.export_modes)}
+            results['runs'].append(run_result)
+
+            print(f"{points} points, {run_result['triples']} triples: {run_result['total']:.3f}s")
+            for stage, seconds in run_result['stages'].items():
+                print(f"\t{stage:<40} {seconds:>9.3f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
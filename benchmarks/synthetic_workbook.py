@@ -0,0 +1,113 @@
+"""
+Writes a synthetic model template workbook (locations, equipment and points sheets) of a given size.
+Every entity is valid and every 'ref' relationship resolves, so the workbook can be processed end to end.
+
+The mix of content is configurable:
+    refs:    fraction of entities with optional 'ref' relationships (feeds/isFedBy, hasPart, multi-value hasLocation).
+             Points always reference their equipment (isPointOf) and equipment its location (hasLocation).
+    switch:  fraction of entities with Switch relationships (hasObjectPropertyId, hasPointName, monitors).
+    tags:    number of SwitchTags columns per sheet. 0 omits the SwitchTags header.
+    tag_values: number of distinct values in each SwitchTags cell. Real sheets reuse a few tag sets across most entities.
+
+Usage:
+    python benchmarks/synthetic_workbook.py output.xlsx [--points 10000] [--refs 0.5] [--switch 0.5] [--tags 2] [--tag-values 20]
+"""
+import argparse
+import random
+
+import openpyxl
+
+POINT_CLASSES = ["Zone_Air_Temperature_Sensor", "Supply_Air_Flow_Sensor", "Damper_Position_Command", "Discharge_Air_Temperature_Setpoint"]
+EQUIPMENT_CLASSES = ["AHU", "VAV", "Chiller", "Pump", "switch:Custom_Equipment"]
+LOCATION_CLASSES = ["Floor", "Room", "HVAC_Zone"]
+
+
+def write_workbook(path: str, points: int, equipment: int = None, locations: int = None, refs: float = 0.5, switch: float = 0.5, tags: int = 2, seed: int = 0, tag_values: int = 20):
+    """
+    Writes the workbook to path. By default there is one equipment per 20 points and one location per 10 equipment.
+    """
+    equipment = equipment if equipment is not None else max(points // 20, 1)
+    locations = locations if locations is not None else max(equipment // 10, 1)
+    rng = random.Random(seed)
+    tag_columns = [f"tagGroup{i + 1}" for i in range(tags)]
+
+    wb = openpyxl.Workbook(write_only=True)
+
+    # LOCATIONS: a building, with floors/rooms/zones as parts
+    ws = _sheet(wb, "locations",
+                [("Brick", "class"), ("Brick", "identifier"), ("Brick", "label"), ("Brick", "isPartOf"), ("Brick", "hasPart"), ("Switch", "hasObjectPropertyId")],
+                tag_columns)
+    ws.append(["Building", "building", "Building", None, None, None] + _tags(rng, tags, tag_values, 1.0))
+    for i in range(locations):
+        optional = rng.random() < refs
+        ws.append([
+            LOCATION_CLASSES[i % len(LOCATION_CLASSES)], f"location {i}", f"Location {i}", "building",
+            f"location {i + 1}" if optional and i + 1 < locations else None,
+            f"loc-{i}" if rng.random() < switch else None
+        ] + _tags(rng, tags, tag_values, 0.8))
+
+    # EQUIPMENT
+    ws = _sheet(wb, "equipment",
+                [("Brick", "class"), ("Brick", "identifier"), ("Brick", "label"), ("Brick", "hasLocation"), ("Brick", "feeds"), ("Brick", "isFedBy"),
+                 ("Brick", "hasInputSubstance"), ("Switch", "hasObjectPropertyId"), ("Switch", "monitors")],
+                tag_columns)
+    for i in range(equipment):
+        optional = rng.random() < refs
+        has_switch = rng.random() < switch
+        ws.append([
+            EQUIPMENT_CLASSES[i % len(EQUIPMENT_CLASSES)], f"equip {i}", f"Equip {i}",
+            f"location {i % locations}|location {(i + 1) % locations}" if optional else f"location {i % locations}",
+            f"equip {(i + 1) % equipment}" if optional else None,
+            f"equip {(i - 1) % equipment}" if optional else None,
+            "Air" if i % 2 else "switch:Chilled_Water",
+            f"eq-{i}" if has_switch else None,
+            f"equip {(i + 2) % equipment}" if has_switch else None
+        ] + _tags(rng, tags, tag_values, 0.8))
+
+    # POINTS
+    ws = _sheet(wb, "points",
+                [("Brick", "class"), ("Brick", "identifier"), ("Brick", "label"), ("Brick", "isPointOf"), ("Brick", "hasLocation"), ("Brick", "hasUnit"),
+                 ("Switch", "hasObjectPropertyId"), ("Switch", "hasPointName")],
+                tag_columns)
+    for i in range(points):
+        has_switch = rng.random() < switch
+        ws.append([
+            POINT_CLASSES[i % len(POINT_CLASSES)], f"point {i}", f"Point {i}", f"equip {i % equipment}",
+            f"location {i % locations}" if rng.random() < refs else None,
+            "degC",
+            f"pt-{i}" if has_switch else None,
+            f"Point Name {i}" if has_switch else None
+        ] + _tags(rng, tags, tag_values, 0.9))
+
+    wb.save(path)
+
+
+def _sheet(wb, sheet_name: str, columns: list, tag_columns: list):
+    ws = wb.create_sheet(sheet_name)
+    columns = columns + [("SwitchTags", column) for column in tag_columns]
+    ws.append([top for top, _ in columns])
+    ws.append([sub for _, sub in columns])
+    return ws
+
+
+def _tags(rng: random.Random, tags: int, values: int, density: float) -> list:
+    return [f"value{rng.randrange(values)}|value{rng.randrange(values)}" if rng.random() < density else None for _ in range(tags)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--equipment", type=int, default=None)
+    parser.add_argument("--locations", type=int, default=None)
+    parser.add_argument("--refs", type=float, default=0.5)
+    parser.add_argument("--switch", type=float, default=0.5)
+    parser.add_argument("--tags", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tag-values", type=int, default=20)
+    args = parser.parse_args()
+    write_workbook(args.path, args.points, args.equipment, args.locations, args.refs, args.switch, args.tags, args.seed, args.tag_values)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark: size of the building model with each SwitchTags encoding (process(tag_mode=...), see triple_generator.TAG_MODES),
+for a synthetic workbook (see synthetic_workbook.py). --tag-values sets how many distinct values each tag cell draws from;
+real points sheets reuse a handful of tag sets, which is where the shared encoding pays off.
+
+Usage:
+    python benchmarks/tag_modes.py [--points 10000] [--tags 2] [--tag-values 2]
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import tempfile
+
+import rdflib
+
+import brick_xlsx_generator as bg
+from brick_xlsx_generator.modules import triple_generator as tg
+
+from synthetic_workbook import write_workbook
+
+logging.disable(logging.WARNING)
+
+GRAPH = rdflib.URIRef("https://_graph_.com#building")
+
+
+def run(path: str, tag_mode: str) -> dict:
+    """
+    Processes the workbook with a tag mode. Returns the tags stage time, the building graph's triple count and its N-Triples size.
+    """
+    ds = bg.Dataset()
+    # process_sheet() prints progress
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = ds.process(path, "benchmark", "building", tag_mode=tag_mode)
+    g = ds.graph(GRAPH)
+    return {
+        'seconds': report.stages['tags']['seconds'],
+        'triples': len(g),
+        'bytes': len(g.serialize(format="nt", encoding="utf-8"))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--tags", type=int, default=2, help="number of SwitchTags columns")
+    parser.add_argument("--tag-values", type=int, default=2, help="distinct values in each SwitchTags cell")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "workbook.xlsx")
+        write_workbook(path, args.points, tags=args.tags, tag_values=args.tag_values)
+        results = {tag_mode: run(path, tag_mode) for tag_mode in tg.TAG_MODES}
+
+    default = results["list"]
+    print(f"{args.points} points, {args.tags} SwitchTags columns of {args.tag_values} values:")
+    for tag_mode, result in results.items():
+        print(f"\t{tag_mode:<7} {result['triples']:>9} triples ({result['triples'] / default['triples']:.2f}x), "
+              f"{result['bytes'] / 1e6:>7.1f}MB ({result['bytes'] / default['bytes']:.2f}x), tags stage {result['seconds']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark: generating a points sheet in chunks (as streaming process() does) with a new URI cache per chunk
+vs one TermFactory shared by every chunk (see modules/term_factory.py). Prints the shared cache's hit rates.
+
+Usage:
+    python benchmarks/term_factory.py [--points 200000] [--equipment 2000] [--chunk-size 1000]
+"""
+import argparse
+import contextlib
+import io
+import logging
+import time
+
+from brick_xlsx_generator.modules import triple_generator as tg
+from brick_xlsx_generator.modules.reference_resolver import ReferenceResolver
+from brick_xlsx_generator.modules.term_factory import TermFactory
+from brick_xlsx_generator.relationships import BRICK_RELATIONSHIPS
+
+from triple_generator import NAMESPACES, make_equipment, make_points
+
+logging.disable(logging.WARNING)
+
+RELATIONSHIPS = {"Brick": BRICK_RELATIONSHIPS}
+
+
+def generate(chunks: list, namespaces, resolver) -> float:
+    start = time.perf_counter()
+    # process_sheet() prints progress for every chunk
+    with contextlib.redirect_stdout(io.StringIO()):
+        for chunk in chunks:
+            tg.process_sheet(chunk, namespaces, RELATIONSHIPS, ("Brick", "identifier"), resolver)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=200000)
+    parser.add_argument("--equipment", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    df = make_points(args.points, args.equipment)
+    resolver = ReferenceResolver.from_dataframes([make_equipment(args.equipment)])
+    chunks = [df.iloc[start:start + args.chunk_size] for start in range(0, len(df), args.chunk_size)]
+
+    per_chunk = generate(chunks, NAMESPACES, resolver)
+    factory = TermFactory(dict(NAMESPACES))
+    shared = generate(chunks, factory, resolver)
+
+    print(f"{args.points} points, {args.equipment} equipment, {len(chunks)} chunks of {args.chunk_size}:")
+    print(f"\tcache per chunk: {per_chunk:.3f}s")
+    print(f"\tshared factory:  {shared:.3f}s ({per_chunk / shared:.2f}x)")
+    for name, cache in factory.stats().items():
+        print(f"\t{name} cache: {cache['hit_rate']:.1%} hits, {cache['size']} entries")
+
+
+if __name__ == "__main__":
+    main()
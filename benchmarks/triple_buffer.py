@@ -0,0 +1,87 @@
+"""
+Benchmark: memory held by the generated building model as lists of rdflib triples vs TripleBuffers
+(see modules/triple_buffer.py), as generated and after compact(), for a synthetic workbook (see synthetic_workbook.py).
+Memory is measured with tracemalloc, which slows generation down; the timings are without it.
+
+Usage:
+    python benchmarks/triple_buffer.py [--points 45000]
+"""
+import argparse
+import contextlib
+import gc
+import io
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+from itertools import chain
+
+import rdflib
+
+from brick_xlsx_generator.modules import helpers, triple_generator as tg
+from brick_xlsx_generator.modules.reference_resolver import ReferenceResolver
+from brick_xlsx_generator.modules.triple_buffer import TermDictionary
+from brick_xlsx_generator.relationships import SHEET_RELATIONSHIPS
+
+from synthetic_workbook import write_workbook
+from triple_generator import NAMESPACES
+
+logging.disable(logging.WARNING)
+
+BUILDING = rdflib.Namespace("https://benchmark.com/building#")
+
+
+def generate(dfs: list, resolver, buffered: bool, compact: bool = False) -> list:
+    namespaces = {**NAMESPACES, 'building': BUILDING, 'ref': BUILDING, 'meta': rdflib.Namespace("https://meta.com#")}
+    terms = TermDictionary() if buffered else None
+    # process_sheet() prints progress
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = [tg.process_sheet(df, namespaces, SHEET_RELATIONSHIPS, ("Brick", "identifier"), resolver, terms=terms) for df in dfs]
+    if compact:
+        for buffer in chain.from_iterable(results):
+            buffer.compact()
+    return results
+
+
+def measure(dfs: list, resolver, buffered: bool, compact: bool = False):
+    """
+    Returns (seconds, bytes held, triples) for generating the model.
+    """
+    start = time.perf_counter()
+    generate(dfs, resolver, buffered, compact)
+    seconds = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    results = generate(dfs, resolver, buffered, compact)
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, held, sum(len(triples) + len(tags) for triples, tags in results)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=45000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "workbook.xlsx")
+        write_workbook(path, args.points)
+        df_equipment, df_locations, df_points = helpers.import_model_template_file(path)
+    resolver = ReferenceResolver.from_dataframes([df_equipment, df_locations])
+    dfs = [df_locations, df_equipment, df_points]
+
+    list_seconds, list_bytes, triples = measure(dfs, resolver, buffered=False)
+    buffer_seconds, buffer_bytes, _ = measure(dfs, resolver, buffered=True)
+    compact_seconds, compact_bytes, _ = measure(dfs, resolver, buffered=True, compact=True)
+
+    print(f"{args.points} points, {triples} triples:")
+    print(f"\tlists:   {list_bytes / 1e6:.1f}MB ({list_bytes / triples:.0f} bytes/triple), {list_seconds:.3f}s")
+    print(f"\tbuffers: {buffer_bytes / 1e6:.1f}MB ({buffer_bytes / triples:.0f} bytes/triple), {buffer_seconds:.3f}s ({list_bytes / buffer_bytes:.1f}x less memory)")
+    print(f"\tcompact: {compact_bytes / 1e6:.1f}MB ({compact_bytes / triples:.0f} bytes/triple), {compact_seconds:.3f}s ({list_bytes / compact_bytes:.1f}x less memory)")
+
+
+if __name__ == "__main__":
+    main()
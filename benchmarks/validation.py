@@ -0,0 +1,84 @@
+"""
+Benchmark: Dataset.validate() checks (see modules/validation.py) on a synthetic workbook (see synthetic_workbook.py),
+compared to generating the triples of the same sheets. A share of the entities gets an invalid class, substance or reference.
+
+Usage:
+    python benchmarks/validation.py [--points 100000] [--invalid 0.01]
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import random
+import tempfile
+import time
+
+import rdflib
+
+import brick_xlsx_generator as bg
+from brick_xlsx_generator.modules import helpers, triple_generator as tg
+from brick_xlsx_generator.modules.reference_resolver import ReferenceResolver
+from brick_xlsx_generator.modules.validation import validate_sheets
+from brick_xlsx_generator.relationships import SHEET_RELATIONSHIPS
+
+from synthetic_workbook import write_workbook
+from triple_generator import NAMESPACES
+
+logging.disable(logging.WARNING)
+
+BUILDING = rdflib.Namespace("https://benchmark.com/building#")
+
+
+def corrupt(df, fraction: float, rng: random.Random) -> int:
+    """
+    Replaces the class (or a reference, or the substance) of a fraction of the rows with an invalid value. Returns the number of rows changed.
+    """
+    columns = [column for column in [("Brick", "class"), ("Brick", "isPointOf"), ("Brick", "hasLocation"), ("Brick", "hasInputSubstance")] if column in df.columns]
+    rows = rng.sample(range(len(df)), int(len(df) * fraction))
+    for row in rows:
+        column = rng.choice(columns)
+        df.iat[row, df.columns.get_loc(column)] = f"invalid_{row}"
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--invalid", type=float, default=0.01, help="fraction of rows with an invalid value")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "workbook.xlsx")
+        write_workbook(path, args.points)
+        df_equipment, df_locations, df_points = helpers.import_model_template_file(path)
+    rng = random.Random(0)
+    changed = sum(corrupt(df, args.invalid, rng) for df in [df_locations, df_equipment, df_points])
+    dfs = [df_locations, df_equipment, df_points]
+
+    ds = bg.Dataset()
+    start = time.perf_counter()
+    ontology = ds.ontology_terms
+    index_seconds = time.perf_counter() - start
+    resolver = ReferenceResolver.from_dataframes([df_equipment, df_locations])
+
+    start = time.perf_counter()
+    report = validate_sheets(dfs, ontology, ds.term_factory, SHEET_RELATIONSHIPS, resolver)
+    validate_seconds = time.perf_counter() - start
+
+    namespaces = {**NAMESPACES, 'building': BUILDING, 'ref': BUILDING, 'meta': rdflib.Namespace("https://meta.com#")}
+    start = time.perf_counter()
+    # process_sheet() prints progress
+    with contextlib.redirect_stdout(io.StringIO()):
+        for df in dfs:
+            tg.process_sheet(df, namespaces, SHEET_RELATIONSHIPS, ("Brick", "identifier"), resolver)
+    generate_seconds = time.perf_counter() - start
+
+    print(f"{report.rows} rows, {changed} made invalid:")
+    print(f"\tontology index: {index_seconds:.3f}s")
+    print(f"\tvalidate:       {validate_seconds:.3f}s, {len(report)} issues: {report.counts()}")
+    print(f"\tgenerate:       {generate_seconds:.3f}s (for comparison)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: peak memory and throughput of the pandas workbook loader (helpers.import_model_template_file)
+vs the streaming openpyxl loader (WorkbookReader), on a synthetic points sheet.
+
+Usage:
+    python benchmarks/workbook_loader.py [--points 100000] [--chunk-sizes 1 1000 10000]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+import openpyxl
+
+from brick_xlsx_generator.modules import helpers
+from brick_xlsx_generator.modules.workbook_reader import WorkbookReader, SHEET_NAMES
+
+logging.disable(logging.INFO)
+
+
+def write_workbook(path: str, n_points: int):
+    wb = openpyxl.Workbook(write_only=True)
+    for sheet_name in SHEET_NAMES:
+        ws = wb.create_sheet(sheet_name)
+        ws.append(["Brick", "Brick", "Brick", "Brick", "Brick", "Switch", "SwitchTags", "SwitchTags"])
+        ws.append(["class", "identifier", "label", "isPointOf", "hasUnit", "hasPointName", "tagGroup1", "tagGroup2"])
+        rows = n_points if sheet_name == "points" else 10
+        for i in range(rows):
+            ws.append(["Zone_Air_Temperature_Sensor", f"point_{i}", f"Point {i}", f"equip_{i % 100}", "degC", f"AHU-{i % 100}\xa0ZNT", "a|b", None])
+    wb.save(path)
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, elapsed, peak
+
+
+def pandas_loader(path):
+    df_equipment, df_locations, df_points = helpers.import_model_template_file(path)
+    return len(df_equipment) + len(df_locations) + len(df_points)
+
+
+def streaming_loader(path, chunk_size):
+    rows = 0
+    with WorkbookReader(path, chunk_size) as reader:
+        for sheet_name in SHEET_NAMES:
+            for chunk in reader.iter_chunks(sheet_name):
+                rows += len(chunk)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[1, 1000, 10000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "points.xlsx")
+        write_workbook(path, args.points)
+
+        print(f"{'loader':>22} {'rows':>8} {'time (s)':>9} {'rows/s':>9} {'peak mem (MB)':>14}")
+        runs = [("pandas", lambda: pandas_loader(path))]
+        runs += [(f"streaming (chunk {size})", lambda size=size: streaming_loader(path, size)) for size in args.chunk_sizes]
+        for label, fn in runs:
+            rows, elapsed, peak = measure(fn)
+            print(f"{label:>22} {rows:>8} {elapsed:>9.2f} {rows / elapsed:>9.0f} {peak / 1024 / 1024:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
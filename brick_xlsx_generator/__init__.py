@@ -1,4 +1,7 @@
 from .graph import Graph, Dataset
+from .batch import convert_batch
+from .triples import iter_triples
+from .modules.sparql_upload import SparqlUploader, UploadError
 import logging
 
 logging.basicConfig(
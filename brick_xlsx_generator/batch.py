@@ -0,0 +1,166 @@
+import concurrent.futures
+import csv
+import logging
+import os
+import time
+import traceback
+from typing import TypedDict
+
+from .graph import Dataset, BUILDING_EXPORT_MODES
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class BatchJob(TypedDict):
+    path: str
+    portfolio_name: str
+    building_name: str
+
+
+class BatchResult(TypedDict):
+    path: str
+    portfolio_name: str
+    building_name: str
+    status: str         # "ok" or "failed"
+    output: str         # exported file path (None on failure)
+    triples: int        # triples in the building model
+    seconds: float
+    error: str          # error message (None on success)
+
+
+# Worker process state. Set by _init_worker().
+_worker_config = {}
+
+
+def load_jobs(source, portfolio_name: str = "example") -> list:
+    """
+    Returns the list of files to convert from a directory, a CSV manifest or a list of jobs.
+
+    :param source:
+        * directory: every .xlsx file in the directory. The building name is the file name.
+        * CSV manifest: columns path, portfolio_name, building_name. Relative paths are resolved against the manifest's directory.
+          portfolio_name and building_name are optional (defaulting as for a directory).
+        * list of BatchJob dicts.
+    :param portfolio_name: portfolio used when a job does not define one.
+    """
+    if isinstance(source, (list, tuple)):
+        rows, base_dir = source, os.getcwd()
+    elif os.path.isdir(source):
+        rows = [{'path': filename} for filename in sorted(os.listdir(source))
+                if filename.endswith(".xlsx") and not filename.startswith("~$")]  # skip Excel lock files
+        base_dir = source
+    elif os.path.isfile(source):
+        with open(source, newline="") as f:
+            rows = list(csv.DictReader(f))
+        base_dir = os.path.dirname(os.path.abspath(source))
+    else:
+        raise FileNotFoundError(f"Batch source not found: {source}")
+
+    jobs = []
+    for row in rows:
+        path = row['path'] if os.path.isabs(row['path']) else os.path.join(base_dir, row['path'])
+        jobs.append(BatchJob(
+            path=path,
+            portfolio_name=row.get('portfolio_name') or portfolio_name,
+            building_name=row.get('building_name') or os.path.splitext(os.path.basename(path))[0]
+        ))
+    return jobs
+
+
+def convert_batch(
+        source,
+        export_path: str = os.path.join(os.getcwd(), "output"),
+        portfolio_name: str = "example",
+        export_mode: str = "building",
+        timestamp: bool = True,
+        workers: int = None,
+        dataset_kwargs: dict = None,
+        process_kwargs: dict = None
+    ) -> list:
+    """
+    Converts a batch of workbooks to TTL files, one building per file, across a pool of worker processes.
+    Each worker loads the ontologies once and reuses them for every file it converts.
+    A file that fails (including input errors that would normally exit) is recorded in the results and does not stop the batch.
+
+    :param source: directory, CSV manifest or list of jobs. See load_jobs().
+    :param export_path: dir to save the ttl files. Defaults to CWD/output.
+    :param portfolio_name: portfolio used when a job does not define one.
+    :param export_mode: passed to Dataset.export(). Options = ["full", "building", "equipment_locations_systems"]
+    :param workers: number of worker processes. Defaults to the number of CPUs. 1 converts the files in this process.
+    :param dataset_kwargs: passed to Dataset(), e.g. { 'switch_version': '1.1.7' }
+    :param process_kwargs: passed to Dataset.process(), e.g. { 'relationship_field': ('Brick', 'label') }
+
+    Returns: list of BatchResult, in job order. Raises ValueError (before any file is converted) if export_mode is not supported.
+    """
+    if export_mode not in ["full", *BUILDING_EXPORT_MODES]:
+        raise ValueError(f"Export mode: {export_mode} is not supported. Options are: {['full', *BUILDING_EXPORT_MODES]}")
+    jobs = load_jobs(source, portfolio_name)
+    os.makedirs(export_path, exist_ok=True)
+    config = {
+        'export_path': export_path,
+        'export_mode': export_mode,
+        'timestamp': timestamp,
+        'dataset_kwargs': dataset_kwargs or {},
+        'process_kwargs': process_kwargs or {}
+    }
+    logger.info(f"Converting {len(jobs)} files...")
+    start = time.perf_counter()
+
+    if workers == 1:
+        _init_worker(config)
+        results = [_convert(job) for job in jobs]
+    else:
+        results = []
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config,)) as executor:
+            futures = [executor.submit(_convert, job) for job in jobs]
+            for job, future in zip(jobs, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    # the worker itself failed (e.g. it was killed)
+                    results.append(_failed(job, 0.0, f"Worker failed: {e!r}"))
+
+    failed = [result for result in results if result['status'] != "ok"]
+    logger.info(f"Batch complete in {time.perf_counter() - start:.1f}s. {len(results) - len(failed)} converted, {len(failed)} failed.")
+    for result in failed:
+        logger.error(f"\t{result['path']}: {result['error']}")
+    return results
+
+
+def _init_worker(config: dict):
+    _worker_config.update(config)
+    # load the ontologies once for this worker. Datasets created afterwards share them.
+    Dataset(**config['dataset_kwargs'])
+
+
+def _convert(job: BatchJob) -> BatchResult:
+    config = _worker_config
+    graph_name = config['process_kwargs'].get('graph_name', "building")
+    start = time.perf_counter()
+    try:
+        ds = Dataset(**config['dataset_kwargs'])
+        triples = ds.process(job['path'], job['portfolio_name'], job['building_name'], **config['process_kwargs']).triples
+        output = ds.export(config['export_mode'], config['export_path'], config['timestamp'], graph_name=graph_name).output
+    except SystemExit as e:
+        # process() exits on invalid input files
+        return _failed(job, time.perf_counter() - start, str(e))
+    except Exception as e:
+        logger.debug(traceback.format_exc())
+        return _failed(job, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+    if output is None:
+        # export() writes no file for an unsupported export mode
+        return _failed(job, time.perf_counter() - start, f"Export mode: {config['export_mode']} is not supported.")
+
+    return BatchResult(
+        **job,
+        status="ok",
+        output=output,
+        triples=triples,
+        seconds=time.perf_counter() - start,
+        error=None
+    )
+
+
+def _failed(job: BatchJob, seconds: float, error: str) -> BatchResult:
+    return BatchResult(**job, status="failed", output=None, triples=0, seconds=seconds, error=error)
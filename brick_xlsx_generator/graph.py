@@ -1,22 +1,36 @@
 from argparse import ArgumentError
 import rdflib
-from rdflib.plugins.stores.memory import Memory
 from rdflib.plugins import sparql
 import logging
 import os.path
-import pkgutil
-import io
 import pandas as pd
 from datetime import datetime
+from itertools import chain
 import sys
-from .relationships import (
-    BRICK_RELATIONSHIPS,
-    SWITCH_RELATIONSHIPS
-)
-from .modules import helpers, triple_generator as tg, sparql_queries as sq
+from .relationships import SHEET_RELATIONSHIPS
+from .modules import helpers, triple_generator as tg, sparql_queries as sq, ontology_cache, ontology_store
+from .modules.reference_resolver import ReferenceResolver
+from .modules.class_index import ClassIndex, BRICK
+from .modules.workbook_reader import WorkbookReader, DEFAULT_CHUNK_SIZE
+from .modules.triple_writer import TripleWriter
+from .modules.process_report import ProcessReport
+from .modules.incremental import IncrementalState
+from .modules.bulk_store import BulkMemory, add_triples
+from .modules.triple_buffer import TermDictionary
+from .modules.term_factory import TermFactory
+from .modules.validation import OntologyTerms, ValidationReport, validate_sheets
+from .modules.sparql_upload import SparqlUploader
+from .modules.sqlite_store import SQLiteStore
+from .modules.building_context import BuildingContext, ReadWriteLock, parse_building_binding
+from .triples import stream_model
+from concurrent.futures import ThreadPoolExecutor
 
 from typing import TypedDict
 
+# Export modes of a single building graph, for Dataset.export_all() and Dataset.upload()
+BUILDING_EXPORT_MODES = ["building", "equipment_locations_systems"]
+UPLOAD_MODES = BUILDING_EXPORT_MODES
+
 class CustomOntology(TypedDict):
     ttl_path: str
     name: str
@@ -147,8 +161,13 @@ class Dataset(rdflib.Dataset):
             path_to_local_brick: str = None, 
             path_to_local_switch: str = None, 
             custom_graph: CustomOntology = None,
-            store=Memory(), 
-            sparql_load_graphs=False
+            store=None, 
+            sparql_load_graphs=False,
+            use_ontology_cache: bool = True,
+            shared_ontologies: bool = True,
+            report_hook=None,
+            ontology_mode: str = "full",
+            store_path: str = None
         ):
         """
         @params:
@@ -159,15 +178,68 @@ class Dataset(rdflib.Dataset):
         path_to_local_brick: Absolute path to local TTL to use as the Brick ontology. Only evaluated if load_brick=False
         path_to_local_switch: Absolute path to local TTL to use as the Switch ontology. Only evaluated if load_switch=False
         custom_graph: expects a dict of shape { graph: rdflib.Graph, name: string }. The name is used for namespacing the graph depending on store type. It is not used in this class.
+        use_ontology_cache: True; load ontologies from the on-disk parsed ontology cache (BRICK_XLSX_CACHE_DIR, defaults to ~/.cache/brick_xlsx_generator).
+                    Cache entries are keyed on ontology content, so edited TTLs are re-parsed automatically.
+        store: rdflib store to use. Defaults to a new in-memory store per Dataset.
+                    If a store is provided the ontologies are loaded into it (shared_ontologies is ignored).
+        shared_ontologies: True; reference a process-wide, read-only copy of the ontologies instead of loading them into this Dataset.
+                    Building graphs are written to a private overlay, so many Datasets can share one loaded ontology.
+                    The _graph_:brick and _graph_:switch graphs are read-only in this mode.
+        report_hook: optional callable, passed the ProcessReport of every process() and export() run. e.g. to forward the metrics to a monitoring system.
+        ontology_mode: "full"; how the ontologies are loaded. "full": when the Dataset is created.
+                    "lazy": only their prefixes and inverse property table are read when the Dataset is created. The ontologies are loaded by the first operation
+                    that needs them: the class index (e.g. the equipment_locations_systems export), a full export or SPARQL inverses (see load_ontologies).
+                    "subset": only the prefixes, owl:inverseOf pairs and rdfs:subClassOf edges are loaded. Everything but a full export works as in "full" mode.
+                    The subsets are built once per ontology version and kept in the ontology cache, so building only conversions start in milliseconds.
+        store_path: None; keep the building graphs in an SQLite database at this path (see modules/sqlite_store.py) rather than in memory.
+                    An existing database is reopened, so its building graphs can be exported without reprocessing the workbooks.
+                    With shared_ontologies, the ontologies stay in the shared in-memory store; otherwise they are loaded into the database once.
+                    Ignored if a store is provided. Call close() when done with the Dataset.
 
         """
+        if ontology_mode not in ontology_store.ONTOLOGY_MODES:
+            raise ValueError(f"Ontology mode: {ontology_mode} is not supported. Options are: {ontology_store.ONTOLOGY_MODES}")
         self._ontology_versions = {
             'brick_version': brick_version,
             'switch_version': switch_version
         }
-        self._building = {}
+        # graph name -> BuildingContext of the building processed into it
+        self._buildings = {}
         self._namespaces = {}
-        self._graph_namespace = rdflib.Namespace("https://_graph_.com#")
+        self._graph_namespace = ontology_store.GRAPH_NAMESPACE
+        # the store is shared by every building graph: writes are made one at a time, reads (e.g. exports) concurrently
+        self._lock = ReadWriteLock()
+        self._report_hook = report_hook
+        # graph name -> IncrementalState of the last incremental process() run
+        self._incremental = {}
+
+        # ontologies to load, and how (see load_ontologies)
+        self._ontologies = (load_brick, load_switch, brick_version, switch_version, path_to_local_brick, path_to_local_switch)
+        self._use_ontology_cache = use_ontology_cache
+        self._ontology_mode = ontology_mode
+        self._ontologies_loaded = ontology_mode == "full"
+
+        # Select store
+        # By default the ontologies are loaded once per process and shared (read-only) between Datasets
+        ontologies_loaded = False
+        self._shared_ontologies = store is None and shared_ontologies
+        if store is None:
+            # building graphs are written to disk, or to memory
+            overlay = SQLiteStore(store_path) if store_path is not None else BulkMemory()
+            if shared_ontologies:
+                if ontology_mode == "lazy":
+                    # nothing to share yet
+                    base = BulkMemory()
+                else:
+                    base = ontology_store.get_shared_ontology_store(
+                        *self._ontologies, use_cache=use_ontology_cache, subset=ontology_mode == "subset"
+                    )
+                store = ontology_store.OverlayStore(base, overlay)
+                ontologies_loaded = True
+            else:
+                store = overlay
+                # a reopened database already holds the ontologies
+                ontologies_loaded = store_path is not None and ontology_mode != "lazy" and next(store.contexts(), None) is not None
 
         # Create Dataset
         # We want the default graph to be a union of all (i.e. a ConjunctiveGraph())
@@ -176,29 +248,16 @@ class Dataset(rdflib.Dataset):
         sparql.SPARQL_LOAD_GRAPHS = sparql_load_graphs
 
         # Create sub-graphs
-        if load_brick:
-            # get ontology data from package
-            data = pkgutil.get_data(
-                __name__, f"ontologies/Brick/{brick_version}/Brick.ttl"
-            ).decode()
-            # wrap in StringIO to make it file-like
-            self.graph(self._graph_namespace['brick']).parse(source=io.StringIO(data), format="turtle")
-        else:
-            # check for local brick path
-            if path_to_local_brick:
-                self.graph(self._graph_namespace['brick']).parse(path_to_local_brick, format="turtle")
-
-        if load_switch:
-            # get ontology data from package
-            data = pkgutil.get_data(
-                __name__, f"ontologies/Switch/{switch_version}/Brick-SwitchExtension.ttl"
-            ).decode()
-            # wrap in StringIO to make it file-like
-            self.graph(self._graph_namespace['switch']).parse(source=io.StringIO(data), format="turtle")
-        else:
-            # check for local switch path
-            if path_to_local_switch:
-                self.graph(self._graph_namespace['switch']).parse(path_to_local_switch, format="turtle")
+        # ontologies are served from the on-disk ontology cache where possible (see modules/ontology_cache.py)
+        subsets = None
+        if ontology_mode == "lazy":
+            # the prefixes and inverse property table are read from the ontology subsets, which are not kept
+            subsets = rdflib.Dataset(store=BulkMemory(), default_union=True)
+            ontology_store.load_ontologies(subsets, *self._ontologies, use_cache=use_ontology_cache, subset=True)
+            for prefix, namespace in subsets.namespaces():
+                self.bind(prefix, namespace)
+        elif not ontologies_loaded:
+            ontology_store.load_ontologies(self, *self._ontologies, use_cache=use_ontology_cache, subset=ontology_mode == "subset")
 
         # load custom graph if exists
         if custom_graph:
@@ -209,49 +268,210 @@ class Dataset(rdflib.Dataset):
             self.parse(custom_graph['ttl_path'], format="turtle")
         
         self.generate_namespaces()
+        # buildings of a reopened store (see store_path)
+        self._restore_buildings()
+        # inverse property table, used to generate inverse relationships without SPARQL
+        self._inverses = tg.inverse_relationships(subsets if subsets is not None else self)
+        # class hierarchy index, generated on first use (see class_index)
+        self._class_index = None
+        # ontology class and property sets, generated on first use (see ontology_terms)
+        self._ontology_terms = None
+
+    def load_ontologies(self):
+        """
+        Loads the full ontologies into a Dataset created with ontology_mode="lazy". Called by the operations that need them;
+        call it before querying the ontologies directly. Does nothing once loaded, or in "full" and "subset" mode.
+        """
+        if self._ontologies_loaded or self._ontology_mode != "lazy":
+            return
+        with self._lock.write():
+            if self._ontologies_loaded:
+                return
+            logger.info("Loading ontologies...")
+            if self._shared_ontologies:
+                self.store.set_base(ontology_store.get_shared_ontology_store(*self._ontologies, use_cache=self._use_ontology_cache))
+            else:
+                ontology_store.load_ontologies(self, *self._ontologies, use_cache=self._use_ontology_cache)
+            self._inverses = tg.inverse_relationships(self)
+            self._class_index = None
+            self._ontology_terms = None
+            self._ontologies_loaded = True
+
+    def _restore_buildings(self):
+        # the buildings are recovered from their bound namespaces: https://{portfolio_name}.com/{building_name}#
+        graphs = None
+        for prefix, namespace in self.namespaces():
+            binding = parse_building_binding(prefix, namespace)
+            if binding is None:
+                continue
+            if graphs is None:
+                graphs = {ctx.identifier for ctx in self.contexts()}
+            if self._graph_namespace[binding[0]] not in graphs:
+                continue
+            graph_name, portfolio_name, building_name = binding
+            self._buildings[graph_name] = BuildingContext(graph_name, portfolio_name, building_name, self._namespaces, self.term_factory)
+            logger.info(f"Reopened building: {portfolio_name}/{building_name} in graph: {graph_name}")
+
+    def _context(self, graph_name: str) -> BuildingContext:
+        if graph_name not in self._buildings:
+            raise ValueError(f"No building has been processed into graph: {graph_name}. Processed graphs are: {list(self._buildings)}")
+        return self._buildings[graph_name]
+
+    @property
+    def buildings(self) -> dict:
+        """
+        { graph_name: { portfolio, building } } of the buildings processed into this Dataset.
+        """
+        return {graph_name: context.names for graph_name, context in self._buildings.items()}
 
     def generate_namespaces(self):
         # create namespace objects to make querying easier
         self._namespaces = {name: rdflib.Namespace(URI) for name, URI in self.namespaces()}
+        # mints (and caches) the model's URIs from the namespaces. See term_factory.stats() for the cache hit rates.
+        self.term_factory = TermFactory(self._namespaces)
+
+    @property
+    def class_index(self) -> ClassIndex:
+        """
+        Subclass closure of the loaded ontologies, mapping classes to their root category (Equipment, Location, System, Point).
+        """
+        if self._class_index is None:
+            self.load_ontologies()
+            self._class_index = ClassIndex(self, self._namespaces.get('brick', BRICK))
+        return self._class_index
+
+    def classify(self, entity) -> frozenset:
+        """
+        Returns the root categories (Equipment, Location, System, Point) of an entity in the model.
+        """
+        return self.class_index.classify(self, entity)
+
+    @property
+    def ontology_terms(self) -> OntologyTerms:
+        """
+        Sets of the class, substance and property URIs defined by the loaded ontologies, used to validate workbooks.
+        """
+        if self._ontology_terms is None:
+            self.load_ontologies()
+            self._ontology_terms = OntologyTerms(self, self._namespaces.get('brick', BRICK))
+        return self._ontology_terms
+
+    def validate(self, path_to_xlsx: str, relationship_field: tuple = ("Brick", "identifier")) -> ValidationReport:
+        """
+        Checks a workbook against the loaded ontologies without generating any triples: unknown Brick and Switch classes,
+        hasInputSubstance/hasOutputSubstance values that are not substances, relationship properties the ontologies do not define
+        and references that do not match any entity. See modules/validation.py.
+
+        Returns: ValidationReport, with one issue per invalid value and the worksheet rows it is used in
+        """
+        if not os.path.isfile(path_to_xlsx):
+            logger.error(f"File not found at specified path: {path_to_xlsx}")
+            sys.exit('Error: Input file not found')
+
+        df_equipment, df_locations, df_points = helpers.import_model_template_file(path_to_xlsx)
+        for df in [df_equipment, df_locations, df_points]:
+            if not helpers.column_exists(df, relationship_field):
+                logger.error(f"Model input sheet: {df.name} does not have column: {relationship_field} defined. Aborting.")
+                sys.exit("Error: valid reference column not found.")
+        resolver = ReferenceResolver.from_dataframes([df_equipment, df_locations], relationship_field)
+        report = validate_sheets([df_locations, df_equipment, df_points], self.ontology_terms, self.term_factory, SHEET_RELATIONSHIPS, resolver)
+        report.log_summary()
+        return report
     
     
-    def process(self, path_to_xlsx: str, portfolio_name: str = "example", building_name: str = "example_building", relationship_field:tuple = ("Brick", "identifier"), graph_name:str = "building"):
+    def process(self, path_to_xlsx: str, portfolio_name: str = "example", building_name: str = "example_building", relationship_field:tuple = ("Brick", "identifier"), graph_name:str = "building", native_inverses: bool = True, streaming: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                output=None, output_format: str = "nt", compress: bool = False, workers: int = None, incremental: bool = False, tag_mode: str = "list",
+                validate: bool = False):
+        """
+        native_inverses: True; generate inverse relationships from the ontology's owl:inverseOf table as triples are added.
+                    Set to False to use the SPARQL INSERT instead (e.g. if ontologies have been added since the Dataset was created).
+        streaming: False; read the workbook lazily with openpyxl's read-only mode and process it chunk_size rows at a time,
+                    instead of loading every sheet into a DataFrame. Reduces peak memory on large workbooks.
+        output: file path or file-like object. If provided, the building model is written straight to output as it is generated
+                    (using streaming mode) and is not added to this Dataset (graph_name's graph and building are left as they are). Inverse relationships and tags are included.
+        output_format: "nt" (N-Triples) or "nquads" (N-Quads, in the graph_name graph). Only used with output.
+        compress: False; gzip the output. Paths ending in ".gz" are always compressed.
+        workers: None; number of worker processes used to generate the sheets' triples concurrently. The points sheet is split across the workers.
+                    The model is the same as when processed sequentially. Not used in streaming mode.
+        incremental: False; keep a fingerprint of each row so the workbook can be reprocessed incrementally. When the same graph_name is
+                    reprocessed with incremental=True, only the triples (with their inverses and tag collections) of the changed, added and removed
+                    entities, and of the entities referencing them, are retracted and regenerated. The graph is rebuilt in full if the
+                    building, relationship_field, tag_mode or sheet columns change, or if the graph has been processed without incremental
+                    (or a run failed) since. Not used in streaming mode.
+        tag_mode: "list"; encoding of the SwitchTags. "list": a tag collection (rdf:List of key-value nodes) per entity.
+                    "shared": one tag collection per distinct tag set, named by a hash of its content and referenced by every entity with those tags.
+                    "flat": key-value nodes linked from the entity with meta:hasTag, without an rdf:List.
+        validate: False; check the workbook against the loaded ontologies before generating triples (see validate()).
+                    The ValidationReport is returned as the report's validation, and summarised in the log. Processing continues either way.
+
+        Each graph_name keeps its own building (names, namespace and prefix), so several workbooks can be processed into separate graphs
+        of one Dataset, one after another or concurrently from several threads. Writes to the store are made one at a time.
+
+        Returns: ProcessReport with the time, peak RSS growth, and row, triple and warning counts of each stage,
+                    and the number of unresolved references and skipped rows (rows without a class).
+        """
         if not os.path.isfile(path_to_xlsx):
             logger.error(f"File not found at specified path: {path_to_xlsx}")
             sys.exit('Error: Input file not found')
+        if tag_mode not in tg.TAG_MODES:
+            raise ValueError(f"Tag mode: {tag_mode} is not supported. Options are: {tg.TAG_MODES}")
+
+        # NAMESPACES
+        # each graph has its own building context, with a term factory sharing the Dataset's caches
+        context = BuildingContext(graph_name, portfolio_name, building_name, self._namespaces, self.term_factory)
+        factory = context.term_factory
+
+        report = ProcessReport("process", self._report_hook, factory)
 
         # LOAD AND PROCESS INPUT FILE
         # This should be prevalidated by brick-xlsx-validator package
         logger.info("Loading file...")
-        df_equipment, df_locations, df_points = helpers.import_model_template_file(path_to_xlsx)
+        if output is not None:
+            # output is written as it is generated, which requires the rows to be streamed
+            streaming = True
+        if streaming:
+            # rows are read on demand (see modules/workbook_reader.py)
+            reader = WorkbookReader(path_to_xlsx, chunk_size)
+        else:
+            with report.stage("load_excel") as stage:
+                df_equipment, df_locations, df_points = helpers.import_model_template_file(path_to_xlsx)
+                stage['rows'] = len(df_equipment) + len(df_locations) + len(df_points)
         logger.info("File load completed.")
 
-        # CREATE NEW GRAPH
-        g = self.add_graph(self._graph_namespace[graph_name])
+        if output is not None:
+            # the model is only written to output: the graph, its building and any incremental state are left as they are
+            logger.info(f"Writing building model to output as {output_format}...")
+            with reader, TripleWriter(output, output_format, graph=self._graph_namespace[graph_name], compress=compress) as writer:
+                self._process_stream(None, context, reader, relationship_field, native_inverses, report, tag_mode, validate, writer=writer)
+            logger.info(f"{writer.count} triples written.")
+            report.output = output
+            report.triples = writer.count
+            logger.info("Processing complete.")
+            return report.finish()
 
-        # NAMESPACES
+        # CREATE NEW GRAPH
         logger.info("Generating building namespace...")
-
-        self._building = {
-            'portfolio': portfolio_name,
-            'building': building_name
-        }
-        
-        BUILDING = rdflib.Namespace(f"https://{portfolio_name}.com/{building_name}#")
-        META = rdflib.Namespace("https://meta.com#") # temporary namespace to hold the metadata items that are used for tags. TODO: Update this.
-
-        self._namespaces['building'] = BUILDING
-        self._namespaces['ref'] = BUILDING  # used for relative relationship references
-        self._namespaces['meta'] = META
-        
-        g.bind('building', BUILDING)
-        g.bind('meta', META)
-        
+        with self._lock.write():
+            g = self.add_graph(self._graph_namespace[graph_name])
+            # the building namespace is bound to building (or building_{graph_name}), replacing the graph's previous building
+            g.bind(context.prefix, context.namespace, override=True, replace=True)
+            g.bind('meta', context.namespaces['meta'])
+            self._buildings[graph_name] = context
+            # the state of an incremental run only describes the graph until it is next processed.
+            # It is stored again once an incremental run has updated the graph, so a failed run leaves none.
+            previous = self._incremental.pop(graph_name, None)
         logger.info("Namespace generation complete.")
 
         # PROCESS EXCEL DATA & GENERATE TRIPLES
         logger.info("Processing Building Model data...")
 
+        if streaming:
+            with reader:
+                self._process_stream(g, context, reader, relationship_field, native_inverses, report, tag_mode, validate)
+            report.triples = len(g)
+            logger.info("Processing complete.")
+            return report.finish()
+
         # validate relationship column exists
         logger.info(f"Relationships defined by referencing column: {relationship_field}. Validating column exists on all sheets...")
         for df in [df_equipment, df_locations, df_points]:
@@ -264,56 +484,217 @@ class Dataset(rdflib.Dataset):
         # generate id<>relationship_field map (entites must be related via the identifier (subject) field in the rdf graph)
         # if no custom relationship is provided this is not required.
         logger.info(f"Generating {relationship_field}<>identifier entity lookup table... ")
-        df_map = pd.DataFrame(columns=['subject', 'custom'])
-        for df in [df_equipment, df_locations]:
-            df_temp = df[[("Brick", "identifier"), relationship_field]]
-            df_temp.columns = ['subject', 'custom']
-            df_map = df_map.append(df_temp) # this does not consider dups. They should be identified using the validation package.
-        self._df_map = df_map
+        with report.stage("build_df_map") as stage:
+            resolver = ReferenceResolver.from_dataframes([df_equipment, df_locations], relationship_field)
+            stage['rows'] = len(df_equipment) + len(df_locations)
         logger.info("Successfully generated.")
+
+        if validate:
+            logger.info("Validating workbook...")
+            with report.stage("validate") as stage:
+                report.validation = validate_sheets([df_locations, df_equipment, df_points], self.ontology_terms, factory, SHEET_RELATIONSHIPS, resolver)
+                report.validation.log_summary()
+                stage['rows'] = report.validation.rows
         # df_map.to_csv("./_debug.csv")
         # return
 
-        logger.info("Processing Locations...")
-        triples_locations = tg.process_df(df_locations, self._namespaces, "Brick", BRICK_RELATIONSHIPS, relationship_field, self._df_map)
-        triples_locations.extend(tg.process_df(df_locations, self._namespaces, "Switch", SWITCH_RELATIONSHIPS, relationship_field, self._df_map))
+        if incremental:
+            with report.stage("fingerprint") as stage:
+                state = IncrementalState([df_locations, df_equipment, df_points], resolver, relationship_field, context.names, tag_mode)
+                stage['rows'] = sum(len(sheet.rows) for sheet in state.sheets.values())
+            if previous is not None and previous.compatible(state):
+                # the graph is read and updated in place
+                with self._lock.write():
+                    self._process_incremental(g, context, previous, state, report)
+                    self._incremental[graph_name] = state
+                report.triples = len(g)
+                logger.info("Processing complete.")
+                return report.finish()
+            if previous is not None:
+                logger.info("Building or workbook structure has changed. Reprocessing in full.")
+            else:
+                # the graph may hold triples from a non-incremental or failed run
+                logger.info("No previous incremental run of this graph. Reprocessing in full.")
+            with self._lock.write():
+                g.remove((None, None, None))
+
+        # each sheet is traversed once for entities, relationships and tags
+        # triples are held in compact TripleBuffers until they are added to the graph, with the terms shared between sheets
+        terms = TermDictionary()
+        if workers is not None and workers > 1:
+            logger.info(f"Processing Locations, Equipment and Points across {workers} workers...")
+            with report.stage("process_sheets") as stage:
+                (triples_locations, tags_locations), (triples_equipment, tags_equipment), (triples_points, tags_points) = tg.process_sheets(
+                    [df_locations, df_equipment, df_points], factory, SHEET_RELATIONSHIPS, relationship_field, resolver, workers, terms=terms, tag_mode=tag_mode
+                )
+                for df in [df_locations, df_equipment, df_points]:
+                    report.count_rows(stage, df)
+                stage['triples'] = sum(len(triples) for triples in [triples_locations, tags_locations, triples_equipment, tags_equipment, triples_points, tags_points])
+        else:
+            logger.info("Processing Locations...")
+            triples_locations, tags_locations = self._process_sheet(report, df_locations, factory, relationship_field, resolver, terms, tag_mode)
 
-        logger.info("Processing Equipment...")
-        triples_equipment = tg.process_df(df_equipment, self._namespaces, "Brick", BRICK_RELATIONSHIPS, relationship_field, self._df_map)
-        triples_equipment.extend(tg.process_df(df_equipment, self._namespaces, "Switch", SWITCH_RELATIONSHIPS, relationship_field, self._df_map))
+            logger.info("Processing Equipment...")
+            triples_equipment, tags_equipment = self._process_sheet(report, df_equipment, factory, relationship_field, resolver, terms, tag_mode)
 
-        logger.info("Processing Points...")
-        triples_points = tg.process_df(df_points, self._namespaces, "Brick", BRICK_RELATIONSHIPS, relationship_field, self._df_map)
-        triples_points.extend(tg.process_df(df_points, self._namespaces, "Switch", SWITCH_RELATIONSHIPS, relationship_field, self._df_map))
+            logger.info("Processing Points...")
+            triples_points, tags_points = self._process_sheet(report, df_points, factory, relationship_field, resolver, terms, tag_mode)
         logger.info("Building model data successfully processed.")
 
+        with report.stage("resolve_references"):
+            report.count_references(resolver)
+            resolver.log_summary()
+
         # ADD TRIPLES TO GRAPH
         logger.info("Adding Entities to model...")
-        for triple in [*triples_locations, *triples_equipment, *triples_points]:
-            g.add(triple)
+        with report.stage("graph_add") as stage, self._lock.write():
+            add_triples(g, chain(triples_locations, triples_equipment, triples_points))
+            stage['triples'] = len(triples_locations) + len(triples_equipment) + len(triples_points)
         logger.info(f"{len(triples_locations)} location triples added.")
         logger.info(f"{len(triples_equipment)} equipment triples added.")
         logger.info(f"{len(triples_points)} point triples added.")
 
         logger.info("Generating inverse relationships...")
-        # need to look at the whole graph to generate inverses as we need the ontology files
-        # TODO: This isn't going to work. We need to do inverses just for building, and write them to the building.
-        # self.update(sq.generate_inverse_relationships())
-        self.update(sq.generate_inverse_relationships_for_graph(), initBindings={"g": g.identifier})
+        with report.stage("inverses") as stage:
+            if native_inverses:
+                triples_inverse = tg.generate_inverses(chain(triples_locations, triples_equipment, triples_points), self._inverses)
+                with self._lock.write():
+                    add_triples(g, triples_inverse)
+                stage['triples'] = len(triples_inverse)
+                logger.info(f"{len(triples_inverse)} inverse triples added.")
+            else:
+                # need to look at the whole graph to generate inverses as we need the ontology files
+                self.load_ontologies()
+                with self._lock.write():
+                    model_size = len(g)
+                    self.update(sq.generate_inverse_relationships_for_graph(), initBindings={"g": g.identifier})
+                    stage['triples'] = len(g) - model_size
 
         # Process Extensions
         logger.info("Processing model extensions.")
         # SwitchTags
         logger.info("Processing SwitchTags")
-        logger.info("Processing Equipment tags")
-        tg.process_tags(g, df_equipment, self._namespaces)
-        logger.info("Processing Location tags")
-        tg.process_tags(g, df_locations, self._namespaces)
-        logger.info("Processing Point tags")
-        tg.process_tags(g, df_points, self._namespaces)
+        with report.stage("tags") as stage, self._lock.write():
+            add_triples(g, chain(tags_equipment, tags_locations, tags_points))
+            stage['triples'] = len(tags_equipment) + len(tags_locations) + len(tags_points)
+            if incremental:
+                self._incremental[graph_name] = state
 
         logger.info("Entities successfully added to model.")
         logger.info("Processing complete.")
+        report.triples = len(g)
+        return report.finish()
+
+    def _process_sheet(self, report: ProcessReport, df, factory: TermFactory, relationship_field: tuple, resolver: ReferenceResolver, terms: TermDictionary, tag_mode: str):
+        with report.stage(f"process_{df.name}") as stage:
+            triples, tags = tg.process_sheet(df, factory, SHEET_RELATIONSHIPS, relationship_field, resolver, terms=terms, tag_mode=tag_mode)
+            report.count_rows(stage, df)
+            stage['triples'] += len(triples) + len(tags)
+        return triples, tags
+
+    def _process_incremental(self, g: rdflib.Graph, context: BuildingContext, previous: IncrementalState, state: IncrementalState, report: ProcessReport):
+        """
+        Updates g from the previous run's state to the new state, by retracting and regenerating only the affected entities.
+        Inverse relationships are generated natively.
+        """
+        BUILDING = context.namespace
+        factory = context.term_factory
+
+        logger.info("Comparing workbook to the previous run...")
+        with report.stage("diff") as stage:
+            # references that now resolve differently (e.g. to an added entity) affect the entities that use them
+            changed_keys = previous.resolver.changed_keys(state.resolver)
+            retract, add = {}, {}
+            for name, sheet in state.sheets.items():
+                changed, added, removed = sheet.diff(previous.sheets[name])
+                dependents = sheet.referencing(changed_keys, SHEET_RELATIONSHIPS) - added
+                retract[name] = changed | removed | dependents
+                add[name] = changed | added | dependents
+                stage['rows'] += len(sheet.rows)
+                logger.info(f"{name}: {len(changed)} changed, {len(added)} added, {len(removed)} removed, {len(dependents - changed)} referencing changed entities.")
+
+        logger.info("Retracting triples...")
+        with report.stage("retract") as stage:
+            triples = []
+            for name, identifiers in retract.items():
+                if not identifiers: continue
+                sheet_triples, _ = tg.process_sheet(previous.sheets[name].select(identifiers), factory, SHEET_RELATIONSHIPS, state.relationship_field, previous.resolver, tagsHeader=None)
+                triples.extend(sheet_triples)
+                stage['rows'] += len(identifiers)
+            subjects = {s for s, p, o in triples if p == rdflib.RDF.type}
+            retracted = [*triples, *tg.generate_inverses(triples, self._inverses)]
+            for subject in subjects:
+                retracted.extend(tg.tag_collection_triples(g, subject, context.namespaces, state.tag_mode))
+            for triple in retracted:
+                g.remove(triple)
+            stage['triples'] = len(retracted)
+
+        # a retracted triple may also be generated by an unchanged entity (e.g. as the inverse of its own relationship).
+        # Those entities are the objects of the retracted relationships, and are regenerated with the changed entities.
+        fragments = {o[len(BUILDING):] for s, p, o in triples if isinstance(o, rdflib.URIRef) and o.startswith(BUILDING)}
+        neighbours = {name: sheet.with_fragments(fragments) - add[name] for name, sheet in state.sheets.items()}
+
+        logger.info("Adding triples...")
+        with report.stage("add") as stage:
+            triples, tags = [], []
+            for name, identifiers in add.items():
+                if not identifiers: continue
+                sheet_triples, sheet_tags = tg.process_sheet(state.sheets[name].select(identifiers), factory, SHEET_RELATIONSHIPS, state.relationship_field, state.resolver, tag_mode=state.tag_mode)
+                triples.extend(sheet_triples)
+                tags.extend(sheet_tags)
+                stage['rows'] += len(identifiers)
+            for name, identifiers in neighbours.items():
+                if not identifiers: continue
+                sheet_triples, _ = tg.process_sheet(state.sheets[name].select(identifiers), factory, SHEET_RELATIONSHIPS, state.relationship_field, state.resolver, tagsHeader=None)
+                triples.extend(sheet_triples)
+                stage['rows'] += len(identifiers)
+            added = [*triples, *tg.generate_inverses(triples, self._inverses), *tags]
+            add_triples(g, added)
+            stage['triples'] = len(added)
+
+            if state.tag_mode == "shared":
+                # remove the tag sets no longer used by any entity
+                hasTagCollection = self._namespaces['switch']['hasTagCollection']
+                for tag_set in {o for s, p, o in retracted if p == hasTagCollection}:
+                    if next(g.subjects(hasTagCollection, tag_set), None) is None:
+                        for triple in tg.tag_set_triples(g, tag_set):
+                            g.remove(triple)
+
+        with report.stage("resolve_references"):
+            report.count_references(state.resolver)
+            state.resolver.log_summary()
+
+        logger.info("Entities successfully updated.")
+
+    def _process_stream(self, g: rdflib.Graph, context: BuildingContext, reader: WorkbookReader, relationship_field: tuple, native_inverses: bool, report: ProcessReport, tag_mode: str, validate: bool = False, writer: TripleWriter = None):
+        """
+        Streaming version of the process() steps (see triples.stream_model). Each sheet is read and processed one chunk of rows at a time,
+        and the chunk's triples, inverses and tags are added to g (or written to writer) before the next chunk is read.
+        """
+        if writer is not None and not native_inverses:
+            # the SPARQL INSERT needs the model in the graph
+            logger.info("Inverse relationships are generated natively when writing to output.")
+            native_inverses = True
+
+        chunks = stream_model(reader, context, relationship_field, self._inverses if native_inverses else None, report, tag_mode,
+                              ontology_terms=self.ontology_terms if validate else None)
+        for triples in chunks:
+            if writer is not None:
+                writer.write(triples)
+            else:
+                with self._lock.write():
+                    add_triples(g, triples)
+
+        if not native_inverses:
+            logger.info("Generating inverse relationships...")
+            with report.stage("inverses") as stage:
+                self.load_ontologies()
+                with self._lock.write():
+                    model_size = len(g)
+                    self.update(sq.generate_inverse_relationships_for_graph(), initBindings={"g": g.identifier})
+                    stage['triples'] = len(g) - model_size
+
+        logger.info("Entities successfully added to model.")
 
     def export(self, export_mode: str = "building", export_path: str = os.path.join(os.getcwd(), "output"), timestamp: bool = True, graph_name:str = "building"):
         """
@@ -325,11 +706,17 @@ class Dataset(rdflib.Dataset):
         :param export_mode: options = ["full", "building", "equipment_locations_systems"]
             * Default is building only.
             * A full model should rarely be used as it combines all source ontologies into one file
-        :return:
+        :param graph_name: the building graph to export. The file is named after the building processed into it.
+        :return: ProcessReport of the export stages. Its output is the path to the exported file (None if the export mode is not supported).
         """
+        report = ProcessReport("export", self._report_hook)
+        if export_mode not in ["full", *BUILDING_EXPORT_MODES]:
+            logger.info(f"Provided export mode: {export_mode} is not supported.")
+            return report.finish()
+        context = self._context(graph_name)
+
         # check path is OK
-        if not os.path.exists(export_path):
-            os.mkdir(export_path)
+        os.makedirs(export_path, exist_ok=True)
 
         # GENERATE TIMESTAMP FOR FILENAMES
         if timestamp:
@@ -338,35 +725,153 @@ class Dataset(rdflib.Dataset):
         else:
             timestamp_str = "Export"
 
+        # ontologies and indexes are loaded before reading, as loading them writes to the store
         if export_mode == "full":
-            logger.info("Exporting full model...")
-            filename = f"{timestamp_str}_M_{self._building['portfolio']}_{self._building['building']}.ttl"
-            self.serialize(os.path.join(export_path, filename), format='turtle')
-            logger.info(f"Export complete. See file: {filename}")
+            self.load_ontologies()
+        elif export_mode == "equipment_locations_systems":
+            self.class_index
+
+        # exports read the store concurrently, but not while a building is being written
+        with self._lock.read():
+            if export_mode == "full":
+                logger.info("Exporting full model...")
+                filename = f"{timestamp_str}_M_{context.portfolio}_{context.building}.ttl"
+                with report.stage("serialize") as stage:
+                    self.serialize(os.path.join(export_path, filename), format='turtle')
+                    stage['triples'] = len(self)
+                logger.info(f"Export complete. See file: {filename}")
+
+            elif export_mode == "building":
+                logger.info("Exporting building entities only brick model...")
+                filename = f"{timestamp_str}_B_{context.portfolio}_{context.building}.ttl"
+                with report.stage("serialize") as stage:
+                    g = self._building_graph(context)
+                    g.serialize(os.path.join(export_path, filename), format='turtle')
+                    stage['triples'] = len(g)
+                logger.info(f"Export complete. See file: {filename}")
 
-        elif export_mode == "building":
-            logger.info("Exporting building entities only brick model...")
-            filename = f"{timestamp_str}_B_{self._building['portfolio']}_{self._building['building']}.ttl"
-            self.graph(self._graph_namespace[graph_name]).serialize(os.path.join(export_path, filename), format='turtle')
-            logger.info(f"Export complete. See file: {filename}")
+            else:
+                logger.info("Exporting equipment, location, system entities brick model...")
 
-        elif export_mode == "equipment_locations_systems":
-            logger.info("Exporting equipment, location, system entities brick model...")
+                g = self._select_equipment_locations_systems(report, context)
 
-            logger.info("Generating new graph...(this can take a few minutes)")
-            g = rdflib.Graph()
-            g.bind("brick", self._namespaces['brick'])
-            g.bind("building", self._namespaces['building'])
-            g.bind("switch", self._namespaces['switch'])
-            for item in self.query(sq.query_equipment_and_location_triples_in_namespace(self._namespaces), initBindings={'namespace': self._namespaces['building']}):
-                g.add(item)
+                logger.info("Exporting graph...")
+                filename = f"{timestamp_str}_B_{context.portfolio}_{context.building}_noPoints.ttl"
+                with report.stage("serialize") as stage:
+                    g.serialize(os.path.join(export_path, filename), format='turtle')
+                    stage['triples'] = len(g)
+                logger.info(f"Export complete. See file: {filename}")
 
-            logger.info("Exporting graph...")
-            filename = f"{timestamp_str}_B_{self._building['portfolio']}_{self._building['building']}_noPoints.ttl"
-            g.serialize(os.path.join(export_path, filename), format='turtle')
-            logger.info(f"Export complete. See file: {filename}")
-        else:
-            logger.info(f"Provided export mode: {export_mode} is not supported.")
+        report.output = os.path.join(export_path, filename)
+        report.triples = stage['triples']
+        return report.finish()
+
+    def export_all(self, export_mode: str = "building", export_path: str = os.path.join(os.getcwd(), "output"), timestamp: bool = True, workers: int = None) -> dict:
+        """
+        Exports every building graph of the Dataset at once, each to its own TTL file (as export() does for one graph).
+        The graphs are read and serialised concurrently on a pool of threads.
+
+        :param export_mode: options = ["building", "equipment_locations_systems"]
+        :param workers: number of threads. Defaults to one per building graph.
+        :return: { graph_name: ProcessReport }. Raises the first error, once every export has completed.
+        """
+        if export_mode not in BUILDING_EXPORT_MODES:
+            raise ValueError(f"Export mode: {export_mode} is not supported by export_all. Options are: {BUILDING_EXPORT_MODES}")
+        contexts = list(self._buildings.values())
+        names = [(context.portfolio, context.building) for context in contexts]
+        if len(set(names)) < len(names):
+            # the files are named after the buildings
+            raise ValueError(f"More than one graph holds the same building, so their files would overwrite each other: {self.buildings}")
+        if not contexts:
+            return {}
+
+        logger.info(f"Exporting {len(contexts)} building graphs...")
+        if export_mode == "equipment_locations_systems":
+            # built once, before the exports start
+            self.class_index
+        with ThreadPoolExecutor(max_workers=workers or len(contexts)) as executor:
+            futures = {
+                context.graph_name: executor.submit(self.export, export_mode, export_path, timestamp, context.graph_name)
+                for context in contexts
+            }
+        reports = {graph_name: future.result() for graph_name, future in futures.items()}
+        logger.info(f"Exported {len(reports)} building graphs.")
+        return reports
+
+    def _building_graph(self, context: BuildingContext) -> rdflib.Graph:
+        """
+        Returns the building's graph with the Dataset's prefixes, and its building namespace bound to building (whichever graph it is in).
+        """
+        prefixes = rdflib.Graph()
+        for prefix, namespace in self.namespaces():
+            if parse_building_binding(prefix, namespace) is None:
+                prefixes.bind(prefix, namespace)
+        prefixes.bind("building", context.namespace, override=True, replace=True)
+        return rdflib.Graph(store=self.store, identifier=self._graph_namespace[context.graph_name], namespace_manager=prefixes.namespace_manager)
+
+    def _select_equipment_locations_systems(self, report: ProcessReport, context: BuildingContext) -> rdflib.Graph:
+        """
+        Returns a new graph holding the equipment, location and system entities of the building (without their points).
+        """
+        logger.info("Generating new graph...")
+        g = rdflib.Graph()
+        g.bind("brick", self._namespaces['brick'])
+        g.bind("building", context.namespace)
+        g.bind("switch", self._namespaces['switch'])
+        # select entities using the class index (replaces sq.query_equipment_and_location_triples_in_namespace)
+        with report.stage("select") as stage:
+            subjects = self.class_index.subjects_in_categories(self, {"Equipment", "Location", "System"}, context.namespace)
+            excluded = {self._namespaces['brick']['hasPoint'], self._namespaces['brick']['isPointOf']}
+            for s in subjects:
+                for p, o in self.predicate_objects(s):
+                    if p not in excluded:
+                        g.add((s, p, o))
+            stage['rows'] = len(subjects)
+            stage['triples'] = len(g)
+        return g
+
+    def upload(self, endpoint, export_mode: str = "building", graph_name: str = "building", target_graph: str = None, replace: bool = True, **uploader_kwargs):
+        """
+        Uploads a building model to a SPARQL 1.1 Graph Store or Update endpoint, instead of exporting it to a file.
+        Triples are sent in batches over pooled keep-alive connections, several batches at a time, and failed batches are retried
+        (see modules/sparql_upload.py).
+
+        :param endpoint: endpoint URL, or a SparqlUploader to reuse its connection pool and settings (e.g. across many Datasets or threads)
+        :param export_mode: options = ["building", "equipment_locations_systems"], as for export()
+        :param target_graph: URI of the named graph to upload into. Defaults to the Dataset's graph identifier, e.g. https://_graph_.com#building
+        :param replace: True; clear the target graph first. Otherwise the triples are added to it.
+        :param uploader_kwargs: protocol, batch_size, concurrency, retries, backoff, timeout, headers, progress. See SparqlUploader. Only used with an endpoint URL.
+        :return: ProcessReport of the export stages. Its upload is the UploadStats (progress and throughput) of the upload.
+            Raises UploadError if batches still fail after every retry.
+        """
+        if export_mode not in UPLOAD_MODES:
+            raise ValueError(f"Upload mode: {export_mode} is not supported. Options are: {UPLOAD_MODES}")
+        report = ProcessReport("export", self._report_hook)
+
+        context = self._context(graph_name)
+        if export_mode == "equipment_locations_systems":
+            self.class_index
+        target_graph = rdflib.URIRef(target_graph) if target_graph is not None else self._graph_namespace[graph_name]
+
+        uploader = endpoint if isinstance(endpoint, SparqlUploader) else SparqlUploader(endpoint, **uploader_kwargs)
+        logger.info(f"Uploading {export_mode} model to {uploader.endpoint}...")
+        try:
+            with self._lock.read():
+                if export_mode == "building":
+                    g = self._building_graph(context)
+                else:
+                    g = self._select_equipment_locations_systems(report, context)
+                with report.stage("upload") as stage:
+                    report.upload = uploader.upload(g, target_graph, replace=replace)
+                    stage['triples'] = report.upload['triples']
+        finally:
+            if uploader is not endpoint:
+                uploader.close()
+        logger.info("Upload complete.")
+
+        report.output = uploader.endpoint
+        report.triples = report.upload['triples']
+        return report.finish()
 
 # Original all-in-one single graph method.
 class Graph(rdflib.Graph):
@@ -378,7 +883,8 @@ class Graph(rdflib.Graph):
         switch_version: str = "1.1.7", 
         path_to_local_brick: str = None, 
         path_to_local_switch: str = None, 
-        custom_graph: CustomOntology = None
+        custom_graph: CustomOntology = None,
+        use_ontology_cache: bool = True
         ):
         """
         @params:
@@ -389,9 +895,11 @@ class Graph(rdflib.Graph):
         path_to_local_brick: Absolute path to local TTL to use as the Brick ontology. Only evaluated if load_brick=False
         path_to_local_switch: Absolute path to local TTL to use as the Switch ontology. Only evaluated if load_switch=False
         custom_graph: expects a dict of shape { graph: rdflib.Graph, name: string }. The name is used for namespacing the graph depending on store type. It is not used in this class.
+        use_ontology_cache: True; load ontologies from the on-disk parsed ontology cache (BRICK_XLSX_CACHE_DIR, defaults to ~/.cache/brick_xlsx_generator).
+                    Cache entries are keyed on ontology content, so edited TTLs are re-parsed automatically.
 
         """
-        super().__init__()
+        super().__init__(store=BulkMemory())
         self._ontology_versions = {
             'brick_version': brick_version,
             'switch_version': switch_version
@@ -401,50 +909,84 @@ class Graph(rdflib.Graph):
 
         if load_brick:
             # get ontology data from package
-            data = pkgutil.get_data(
-                __name__, f"ontologies/Brick/{brick_version}/Brick.ttl"
-            ).decode()
-            # wrap in StringIO to make it file-like
-            self.parse(source=io.StringIO(data), format="turtle")
+            ontology_cache.load_packaged_ontology(self, 'brick', brick_version, use_cache=use_ontology_cache)
         else:
             # check for local brick path
             if path_to_local_brick:
-                self.parse(path_to_local_brick, format="turtle")
+                ontology_cache.load_ontology(self, 'brick', 'local', path=path_to_local_brick, use_cache=use_ontology_cache)
 
         if load_switch:
             # get ontology data from package
-            data = pkgutil.get_data(
-                __name__, f"ontologies/Switch/{switch_version}/Brick-SwitchExtension.ttl"
-            ).decode()
-            # wrap in StringIO to make it file-like
-            self.parse(source=io.StringIO(data), format="turtle")
+            ontology_cache.load_packaged_ontology(self, 'switch', switch_version, use_cache=use_ontology_cache)
         else:
             # check for local switch path
             if path_to_local_switch:
-                self.parse(path_to_local_switch, format="turtle")
+                ontology_cache.load_ontology(self, 'switch', 'local', path=path_to_local_switch, use_cache=use_ontology_cache)
         
         # load custom graph if exists
         if custom_graph:
             self.parse(custom_graph['ttl_path'], format="turtle")
 
         self.generate_namespaces()
+        # inverse property table, used to generate inverse relationships without SPARQL
+        self._inverses = tg.inverse_relationships(self)
+        # class hierarchy index, generated on first use (see class_index)
+        self._class_index = None
 
     def generate_namespaces(self):
         # generate callable Namespace objects from Graph
         namespaceURIs = dict(self.namespaces())
         # create namespace objects to make querying easier
         self._namespaces = {name: rdflib.Namespace(URI) for name, URI in namespaceURIs.items()}
-        
+
+    @property
+    def class_index(self) -> ClassIndex:
+        """
+        Subclass closure of the loaded ontologies, mapping classes to their root category (Equipment, Location, System, Point).
+        """
+        if self._class_index is None:
+            self._class_index = ClassIndex(self, self._namespaces.get('brick', BRICK))
+        return self._class_index
+
+    def classify(self, entity) -> frozenset:
+        """
+        Returns the root categories (Equipment, Location, System, Point) of an entity in the model.
+        """
+        return self.class_index.classify(self, entity)
+
+    def building_graph(self, namespace: rdflib.Namespace = None) -> rdflib.Graph:
+        """
+        Returns a new graph of the triples whose subject is in a building namespace (defaults to the processed building's),
+        i.e. the triples selected by sq.query_all_triples_in_namespace, with the brick, building and switch prefixes bound.
+        The triples are selected by filtering this graph's triples on the namespace, without a SPARQL query.
+        """
+        namespace = namespace if namespace is not None else self._namespaces['building']
+        g = rdflib.Graph(store=BulkMemory())
+        for prefix in ["brick", "building", "switch"]:
+            if prefix in self._namespaces:
+                g.bind(prefix, self._namespaces[prefix])
+        add_triples(g, self._partition(self, namespace))
+        return g
+
+    def _partition(self, triples, namespace: rdflib.Namespace) -> list:
+        # the triples whose subject is in the namespace
+        return [triple for triple in triples if triple[0].startswith(namespace)]
 
     def load_ontology(self, ontology_name: str, ontology_version: str, path_to_ontology: str):
         # get ontology data from path
         if os.path.isfile(path_to_ontology):
             self.parse(path_to_ontology, format=rdflib.util.guess_format(path_to_ontology))
             self._ontology_versions[ontology_name] = ontology_version
+            self._inverses = tg.inverse_relationships(self)
+            self._class_index = None
         else:
             logger.error(f"File not found at specified path: {path_to_ontology}")
 
-    def process(self, path_to_xlsx: str, portfolio_name: str = "example", building_name: str = "example_building", relationship_field:tuple = ("Brick", "identifier")):
+    def process(self, path_to_xlsx: str, portfolio_name: str = "example", building_name: str = "example_building", relationship_field:tuple = ("Brick", "identifier"), native_inverses: bool = True):
+        """
+        native_inverses: True; generate inverse relationships from the ontology's owl:inverseOf table.
+                    Set to False to use the SPARQL INSERT instead.
+        """
         if not os.path.isfile(path_to_xlsx):
             logger.error(f"File not found at specified path: {path_to_xlsx}")
             sys.exit('Error: Input file not found')
@@ -505,50 +1047,44 @@ class Graph(rdflib.Graph):
         # generate id<>relationship_field map (entites must be related via the identifier (subject) field in the rdf graph)
         # if no custom relationship is provided this is not required.
         logger.info(f"Generating {relationship_field}<>identifier entity lookup table... ")
-        df_map = pd.DataFrame(columns=['subject', 'custom'])
-        for df in [df_equipment, df_locations]:
-            df_temp = df[[("Brick", "identifier"), relationship_field]]
-            df_temp.columns = ['subject', 'custom']
-            df_map = df_map.append(df_temp) # this does not consider dups. They should be identified using the validation package.
-        self._df_map = df_map
+        self._resolver = ReferenceResolver.from_dataframes([df_equipment, df_locations], relationship_field)
         logger.info("Successfully generated.")
         # df_map.to_csv("./_debug.csv")
         # return
 
+        # each sheet is traversed once for entities, relationships and tags
         logger.info("Processing Locations...")
-        triples_locations = tg.process_df(df_locations, self._namespaces, "Brick", BRICK_RELATIONSHIPS, relationship_field, self._df_map)
-        triples_locations.extend(tg.process_df(df_locations, self._namespaces, "Switch", SWITCH_RELATIONSHIPS, relationship_field, self._df_map))
+        triples_locations, tags_locations = tg.process_sheet(df_locations, self._namespaces, SHEET_RELATIONSHIPS, relationship_field, self._resolver)
 
         logger.info("Processing Equipment...")
-        triples_equipment = tg.process_df(df_equipment, self._namespaces, "Brick", BRICK_RELATIONSHIPS, relationship_field, self._df_map)
-        triples_equipment.extend(tg.process_df(df_equipment, self._namespaces, "Switch", SWITCH_RELATIONSHIPS, relationship_field, self._df_map))
+        triples_equipment, tags_equipment = tg.process_sheet(df_equipment, self._namespaces, SHEET_RELATIONSHIPS, relationship_field, self._resolver)
 
         logger.info("Processing Points...")
-        triples_points = tg.process_df(df_points, self._namespaces, "Brick", BRICK_RELATIONSHIPS, relationship_field, self._df_map)
-        triples_points.extend(tg.process_df(df_points, self._namespaces, "Switch", SWITCH_RELATIONSHIPS, relationship_field, self._df_map))
+        triples_points, tags_points = tg.process_sheet(df_points, self._namespaces, SHEET_RELATIONSHIPS, relationship_field, self._resolver)
         logger.info("Building model data successfully processed.")
 
         # ADD TRIPLES TO GRAPH
         logger.info("Adding Entities to model...")
-        for triple in [*triples_locations, *triples_equipment, *triples_points]:
-            self.add(triple)
+        add_triples(self, [*triples_locations, *triples_equipment, *triples_points])
         logger.info(f"{len(triples_locations)} location triples added.")
         logger.info(f"{len(triples_equipment)} equipment triples added.")
         logger.info(f"{len(triples_points)} point triples added.")
+        self._resolver.log_summary()
 
         logger.info("Generating inverse relationships...")
-        self.update(sq.generate_inverse_relationships())
+        if native_inverses:
+            # as with the SPARQL query, inverses are generated across the whole graph (ontology included)
+            triples_inverse = tg.generate_graph_inverses(self, self._inverses)
+            add_triples(self, triples_inverse)
+            logger.info(f"{len(triples_inverse)} inverse triples added.")
+        else:
+            self.update(sq.generate_inverse_relationships())
 
         # Process Extensions
         logger.info("Processing model extensions.")
         # SwitchTags
         logger.info("Processing SwitchTags")
-        logger.info("Processing Equipment tags")
-        tg.process_tags(self, df_equipment, self._namespaces)
-        logger.info("Processing Location tags")
-        tg.process_tags(self, df_locations, self._namespaces)
-        logger.info("Processing Point tags")
-        tg.process_tags(self, df_points, self._namespaces)
+        add_triples(self, [*tags_equipment, *tags_locations, *tags_points])
 
         logger.info("Entities successfully added to model.")
         logger.info("Processing complete.")
@@ -583,14 +1119,8 @@ class Graph(rdflib.Graph):
         elif export_mode == "building":
             logger.info("Exporting building entities only brick model...")
 
-            logger.info("Generating new graph...")
-            g = rdflib.Graph()
-            g.bind("brick", self._namespaces['brick'])
-            g.bind("building", self._namespaces['building'])
-            g.bind("switch", self._namespaces['switch'])
-
-            for item in self.query(sq.query_all_triples_in_namespace(), initBindings={'namespace': self._namespaces['building']}):
-                g.add(item)
+            # the building's triples are selected by namespace (replaces sq.query_all_triples_in_namespace)
+            g = self.building_graph()
 
             logger.info("Exporting graph...")
             filename = f"{timestamp_str}_B_{self._building['portfolio']}_{self._building['building']}.ttl"
@@ -600,13 +1130,18 @@ class Graph(rdflib.Graph):
         elif export_mode == "equipment_locations_systems":
             logger.info("Exporting equipment, location, system entities brick model...")
 
-            logger.info("Generating new graph...(this can take a few minutes)")
+            logger.info("Generating new graph...")
             g = rdflib.Graph()
             g.bind("brick", self._namespaces['brick'])
             g.bind("building", self._namespaces['building'])
             g.bind("switch", self._namespaces['switch'])
-            for item in self.query(sq.query_equipment_and_location_triples_in_namespace(self._namespaces), initBindings={'namespace': self._namespaces['building']}):
-                g.add(item)
+            # select entities using the class index (replaces sq.query_equipment_and_location_triples_in_namespace)
+            subjects = self.class_index.subjects_in_categories(self, {"Equipment", "Location", "System"}, self._namespaces['building'])
+            excluded = {self._namespaces['brick']['hasPoint'], self._namespaces['brick']['isPointOf']}
+            for s in subjects:
+                for p, o in self.predicate_objects(s):
+                    if p not in excluded:
+                        g.add((s, p, o))
 
             logger.info("Exporting graph...")
             filename = f"{timestamp_str}_B_{self._building['portfolio']}_{self._building['building']}_noPoints.ttl"
@@ -0,0 +1,130 @@
+import rdflib
+import re
+import threading
+from contextlib import contextmanager
+from .term_factory import TermFactory
+
+# temporary namespace to hold the metadata items that are used for tags. TODO: Update this.
+META = rdflib.Namespace("https://meta.com#")
+
+# Prefix the building namespace of the default graph is bound to. Other graphs are bound to building_{graph_name}
+BUILDING_PREFIX = "building"
+
+
+class BuildingContext:
+    """
+    State of one building processed into a Dataset graph: its names, namespaces and term factory.
+
+    Each graph_name has its own context, so buildings processed into separate graphs (one after another or concurrently)
+    do not overwrite each other's building namespace. The term factory shares the Dataset's caches.
+
+    :param namespaces: the Dataset's namespaces (e.g. brick, switch). The building, ref and meta namespaces are added.
+    :param term_factory: the Dataset's TermFactory
+    """
+    def __init__(self, graph_name: str, portfolio_name: str, building_name: str, namespaces: dict, term_factory: TermFactory):
+        self.graph_name = graph_name
+        self.portfolio = portfolio_name
+        self.building = building_name
+        self.namespace = building_namespace(portfolio_name, building_name)
+        self.namespaces = {
+            **namespaces,
+            'building': self.namespace,
+            'ref': self.namespace,  # used for relative relationship references
+            'meta': META
+        }
+        self.term_factory = term_factory.with_namespaces(self.namespaces)
+
+    @property
+    def names(self) -> dict:
+        return {
+            'portfolio': self.portfolio,
+            'building': self.building
+        }
+
+    @property
+    def prefix(self) -> str:
+        """
+        Prefix the building namespace is bound to in the Dataset.
+        """
+        return building_prefix(self.graph_name)
+
+    def __repr__(self):
+        return f"<BuildingContext {self.graph_name}: {self.portfolio}/{self.building}>"
+
+
+def building_namespace(portfolio_name: str, building_name: str) -> rdflib.Namespace:
+    return rdflib.Namespace(f"https://{portfolio_name}.com/{building_name}#")
+
+
+def building_prefix(graph_name: str) -> str:
+    return BUILDING_PREFIX if graph_name == BUILDING_PREFIX else f"{BUILDING_PREFIX}_{graph_name}"
+
+
+def parse_building_binding(prefix: str, namespace: str):
+    """
+    Returns (graph_name, portfolio_name, building_name) for a bound building namespace, e.g. from a reopened store. None for other bindings.
+    """
+    if prefix == BUILDING_PREFIX:
+        graph_name = BUILDING_PREFIX
+    elif prefix.startswith(f"{BUILDING_PREFIX}_"):
+        graph_name = prefix[len(BUILDING_PREFIX) + 1:]
+    else:
+        return None
+    match = re.fullmatch(r"https://(.+)\.com/(.+)#", str(namespace))
+    if match is None:
+        return None
+    return graph_name, match.group(1), match.group(2)
+
+
+class ReadWriteLock:
+    """
+    Lock allowing any number of readers or one writer at a time.
+
+    Both locks are re-entrant: a thread may nest read() in read(), write() in write(), and read() in write().
+    A thread holding only a read lock cannot upgrade it: write() raises RuntimeError instead of waiting forever
+    for its own read (or another upgrading reader's) to be released. Release the read lock before writing.
+
+    Used to serialise writes to a Dataset's store (which is shared by all of its building graphs) while
+    exports of different graphs read from it concurrently.
+    """
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = {}  # thread ident: read locks held
+        self._writer = None
+        self._writes = 0
+
+    @contextmanager
+    def read(self):
+        ident = threading.get_ident()
+        with self._condition:
+            if self._writer != ident:
+                # readers do not wait for queued writers, so a nested read cannot deadlock
+                self._condition.wait_for(lambda: self._writer is None)
+            self._readers[ident] = self._readers.get(ident, 0) + 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers[ident] -= 1
+                if self._readers[ident] == 0:
+                    del self._readers[ident]
+                self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        ident = threading.get_ident()
+        with self._condition:
+            if self._writer != ident:
+                if ident in self._readers:
+                    raise RuntimeError("Cannot acquire the write lock while holding a read lock. Release the read lock first.")
+                self._condition.wait_for(lambda: self._writer is None and not self._readers)
+                self._writer = ident
+            self._writes += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writes -= 1
+                if self._writes == 0:
+                    self._writer = None
+                self._condition.notify_all()
@@ -0,0 +1,25 @@
+import rdflib
+from rdflib.plugins.stores.memory import Memory
+from itertools import groupby
+
+
+class BulkMemory(Memory):
+    """
+    rdflib Memory store with a batched addN.
+
+    Quads are grouped by context and each group is passed to Memory.addN in one call, so the context is checked
+    once per group rather than once per triple, and no Graph.add (with its per-triple term checks) is made.
+    Only rdflib's public store API is used; the resulting store is identical to adding the triples one at a time.
+    """
+    def addN(self, quads):
+        for context, group in groupby(quads, key=lambda quad: quad[3]):
+            if context is None:
+                raise Exception("Context associated with %s %s %s is None!" % next(group)[:3])
+            super().addN(group)
+
+
+def add_triples(g: rdflib.Graph, triples):
+    """
+    Adds triples to graph g in one batch (via the store's addN). Equivalent to g.add() for each triple.
+    """
+    g.store.addN((s, p, o, g) for s, p, o in triples)
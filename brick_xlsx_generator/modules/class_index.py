@@ -0,0 +1,74 @@
+import rdflib
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+BRICK = rdflib.Namespace("https://brickschema.org/schema/Brick#")
+
+# Root Brick classes that entities are classified under
+ROOT_CLASSES = ["Equipment", "Location", "System", "Point"]
+
+
+class ClassIndex:
+    """
+    Transitive subclass closure of the loaded ontologies, mapping each class to the root categories it falls under
+    (Equipment, Location, System, Point). A class is in a category if it is the root class or any (indirect) subclass of it,
+    i.e. the equivalent of `?class rdfs:subClassOf* brick:Equipment`.
+
+    Classes are usually in a single category, but a class can fall under more than one.
+    """
+    def __init__(self, g: rdflib.Graph, brick_namespace: rdflib.Namespace = BRICK, roots: list = ROOT_CLASSES):
+        # parent -> direct subclasses
+        children = {}
+        for subclass, superclass in g.subject_objects(rdflib.RDFS.subClassOf):
+            children.setdefault(superclass, set()).add(subclass)
+
+        categories = {}
+        for root in roots:
+            stack = [brick_namespace[root]]
+            visited = set()
+            while stack:
+                entity_class = stack.pop()
+                if entity_class in visited: continue
+                visited.add(entity_class)
+                stack.extend(children.get(entity_class, ()))
+            for entity_class in visited:
+                categories.setdefault(entity_class, set()).add(root)
+
+        self._categories = {entity_class: frozenset(roots) for entity_class, roots in categories.items()}
+        logger.info(f"Class index generated for {len(self._categories)} classes.")
+
+    def __len__(self):
+        return len(self._categories)
+
+    def __contains__(self, entity_class):
+        return entity_class in self._categories
+
+    def categories(self, entity_class) -> frozenset:
+        """
+        Returns the root categories of a class, e.g. frozenset({'Equipment'}). Empty if the class is not under any root.
+        """
+        return self._categories.get(entity_class, frozenset())
+
+    def classify(self, g: rdflib.Graph, entity) -> frozenset:
+        """
+        Returns the root categories of an entity in graph g, based on all of its rdf:type statements.
+        """
+        categories = frozenset()
+        for entity_class in g.objects(entity, rdflib.RDF.type):
+            categories |= self.categories(entity_class)
+        return categories
+
+    def subjects_in_categories(self, g: rdflib.Graph, categories: set, namespace: str = None) -> set:
+        """
+        Returns the subjects in g that fall under any of the given categories, in a single pass over g's rdf:type statements.
+        If namespace is provided only URI subjects under that namespace are returned.
+        """
+        categories = set(categories)
+        subjects = set()
+        for entity, entity_class in g.subject_objects(rdflib.RDF.type):
+            if namespace is not None and not (isinstance(entity, rdflib.URIRef) and entity.startswith(namespace)): continue
+            if self.categories(entity_class) & categories:
+                subjects.add(entity)
+        return subjects
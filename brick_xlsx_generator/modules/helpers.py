@@ -51,14 +51,17 @@ def validate_relationships(df_headers, relationships_to_process):
 def column_exists(df_headers, column_name):
     return column_name in df_headers
 
-# return first matched id by custom_field in dataframe map
-# df_map must have columns subject, custom
-def lookupValue(df_map, custom_value:str):
-    try: 
-        return df_map.loc[df_map.custom == custom_value]['subject'].values[0]
-    except:
-        logger.warning(f"Id not found for referenced entity: {custom_value}. Skipping.")
-        return None
+
+def split_cells(column: pd.DataFrame, field: str) -> pd.DataFrame:
+    """
+    Drops empty cells from column[field], then splits multi-value cells ("|" separated) into one (stripped) item per row.
+    """
+    cells = column[(column[field] != 0) & (column[field] != "") & column[field].astype(bool)]
+    if cells.empty:
+        return cells
+    items = cells.assign(**{field: cells[field].str.split("|")}).explode(field, ignore_index=True)
+    items[field] = items[field].str.strip()
+    return items
 
 
 
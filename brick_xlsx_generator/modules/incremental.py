@@ -0,0 +1,96 @@
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+IDENTIFIER_COLUMN = ('Brick', 'identifier')
+CLASS_COLUMN = ('Brick', 'class')
+
+
+class SheetSnapshot:
+    """
+    The entity rows of one model sheet from a process() run, indexed by identifier, with a fingerprint (hash) of each row.
+    Rows without a class do not define an entity and are not included.
+    """
+    def __init__(self, df: pd.DataFrame):
+        rows = df[df[CLASS_COLUMN] != 0]
+        self.name = df.name
+        self.columns = df.columns
+        self.rows = rows.set_index(rows[IDENTIFIER_COLUMN].rename("identifier"), drop=False)
+        self.fingerprints = pd.util.hash_pandas_object(self.rows, index=False)
+        # identifiers as they appear in entity URIs (see helpers.format_fragment)
+        self.fragments = pd.Series(self.rows.index, index=self.rows.index).astype(str).str.replace(" ", "_").str.replace("/", "_")
+
+    @property
+    def unique(self) -> bool:
+        # each entity must be defined by a single row to be compared
+        return self.rows.index.is_unique
+
+    def diff(self, previous: "SheetSnapshot"):
+        """
+        Returns the identifiers of the (changed, added, removed) entities compared to a previous snapshot of the sheet.
+        """
+        shared = self.fingerprints.index.intersection(previous.fingerprints.index)
+        changed = shared[self.fingerprints[shared].to_numpy() != previous.fingerprints[shared].to_numpy()]
+        added = self.fingerprints.index.difference(previous.fingerprints.index)
+        removed = previous.fingerprints.index.difference(self.fingerprints.index)
+        return set(changed), set(added), set(removed)
+
+    def referencing(self, keys: set, relationships_by_header: dict) -> set:
+        """
+        Returns the identifiers of the entities with a 'ref' relationship cell containing any of the keys.
+        """
+        identifiers = set()
+        if not keys:
+            return identifiers
+        for multiIndexHeader, relationships in relationships_by_header.items():
+            for relationship in relationships:
+                column = (multiIndexHeader, relationship.name)
+                if relationship.datatype != "ref" or column not in self.columns: continue
+                cells = self.rows[column]
+                cells = cells[cells.astype(bool) & (cells != 0)]
+                if cells.empty: continue
+                items = cells.astype(str).str.split("|").explode().str.strip()
+                identifiers.update(items.index[items.isin(keys)])
+        return identifiers
+
+    def with_fragments(self, fragments: set) -> set:
+        """
+        Returns the identifiers of the entities whose URI fragment is in fragments.
+        """
+        return set(self.fragments.index[self.fragments.isin(fragments)])
+
+    def select(self, identifiers: set) -> pd.DataFrame:
+        """
+        Returns the rows of the given entities, shaped like the sheet's DataFrame.
+        """
+        df = self.rows[self.rows.index.isin(identifiers)].reset_index(drop=True)
+        df.name = self.name
+        return df
+
+
+class IncrementalState:
+    """
+    State kept from a process() run, used to reprocess an edited workbook incrementally:
+    a snapshot of each sheet and the reference resolver.
+    """
+    def __init__(self, dfs: list, resolver, relationship_field: tuple, building: dict, tag_mode: str = "list"):
+        self.sheets = {df.name: SheetSnapshot(df) for df in dfs}
+        self.resolver = resolver
+        self.relationship_field = relationship_field
+        self.building = dict(building)
+        self.tag_mode = tag_mode
+
+    def compatible(self, other: "IncrementalState") -> bool:
+        """
+        True if other can be applied incrementally: same building, reference column, tag mode and sheet columns, and one row per entity.
+        """
+        return (
+            self.building == other.building
+            and self.relationship_field == other.relationship_field
+            and self.tag_mode == other.tag_mode
+            and self.sheets.keys() == other.sheets.keys()
+            and all(other.sheets[name].columns.equals(sheet.columns) for name, sheet in self.sheets.items())
+            and all(sheet.unique for sheet in [*self.sheets.values(), *other.sheets.values()])
+        )
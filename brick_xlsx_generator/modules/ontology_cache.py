@@ -0,0 +1,204 @@
+import rdflib
+import hashlib
+import io
+import logging
+import os
+import pickle
+import pkgutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Bump this if the layout of the cache files changes. Old files are then ignored (and cleaned up).
+CACHE_FORMAT_VERSION = 1
+
+# Cache location. Can be overridden with the BRICK_XLSX_CACHE_DIR environment variable.
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "brick_xlsx_generator")
+
+# Predicates kept in an ontology subset (see subset_ontology): inverse property pairs and the class hierarchy
+SUBSET_PREDICATES = (rdflib.OWL.inverseOf, rdflib.RDFS.subClassOf)
+
+# Packaged ontology files, by ontology name
+PACKAGED_ONTOLOGIES = {
+    'brick': "ontologies/Brick/{version}/Brick.ttl",
+    'switch': "ontologies/Switch/{version}/Brick-SwitchExtension.ttl"
+}
+
+
+class _RecordingGraph(rdflib.Graph):
+    """
+    Graph that records the prefixes bound by the parser (in order) so that they can be
+    replayed against the target graph when the ontology is loaded from cache.
+    """
+    def __init__(self, *args, **kwargs):
+        self.declared_prefixes = []
+        super().__init__(*args, **kwargs)
+
+    def bind(self, prefix, namespace, override=True, replace=False):
+        self.declared_prefixes.append((prefix, str(namespace)))
+        return super().bind(prefix, namespace, override=override, replace=replace)
+
+
+def get_cache_dir():
+    return os.environ.get("BRICK_XLSX_CACHE_DIR", DEFAULT_CACHE_DIR)
+
+
+def read_packaged_ontology(name: str, version: str) -> bytes:
+    """
+    Returns the raw TTL for an ontology shipped with this package.
+    """
+    return pkgutil.get_data("brick_xlsx_generator", PACKAGED_ONTOLOGIES[name].format(version=version))
+
+
+def cache_key(name: str, version: str, data: bytes, subset: bool = False) -> str:
+    """
+    Cache entries are keyed by ontology name, version and a hash of the TTL content (and whether the entry is the ontology's subset).
+    The rdflib version is included as pickled terms are not guaranteed to be portable across releases.
+    """
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    subset_str = "-subset" if subset else ""
+    return f"{name}-{version}-{digest}{subset_str}-rdflib{rdflib.__version__}-v{CACHE_FORMAT_VERSION}"
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(get_cache_dir(), f"{key}.pickle")
+
+
+def parse_ontology(data: bytes = None, path: str = None):
+    """
+    Parses an ontology TTL (provided as raw bytes, or a path to a local file).
+
+    Returns: (declared_prefixes, triples)
+    """
+    g = _RecordingGraph()
+    if path:
+        g.parse(path, format="turtle")
+    else:
+        # wrap in StringIO to make it file-like
+        g.parse(source=io.StringIO(data.decode()), format="turtle")
+
+    # intern terms so repeated URIs are stored once in the pickle
+    terms = {}
+    triples = [tuple(terms.setdefault(t, t) for t in triple) for triple in g]
+    return g.declared_prefixes, triples
+
+
+def _read_cache(key: str):
+    try:
+        with open(_cache_path(key), "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ontology cache entry {key} could not be read ({e}). Re-parsing.")
+        return None
+
+
+def _write_cache(key: str, name: str, version: str, entry: dict):
+    cache_dir = get_cache_dir()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # write to a temp file and swap in, so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _cache_path(key))
+    except OSError as e:
+        logger.warning(f"Unable to write ontology cache to {cache_dir} ({e}). Continuing without cache.")
+        return
+
+    # remove stale entries for this ontology name & version (i.e. the TTL has changed). The full ontology and its subset share a digest.
+    prefix = f"{name}-{version}-"
+    digest = key[len(prefix):].split("-", 1)[0]
+    for filename in os.listdir(cache_dir):
+        if filename.startswith(prefix) and filename.endswith(".pickle") and not filename.startswith(f"{prefix}{digest}-"):
+            try:
+                os.remove(os.path.join(cache_dir, filename))
+            except OSError:
+                pass
+
+
+def local_version(path: str) -> str:
+    """
+    Cache version of a local ontology file: 'local' and a hash of its absolute path. Stale entries are cleaned up per version,
+    so an edited file replaces its own entries without evicting those of another local file of the same ontology.
+    """
+    digest = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:8]
+    return f"local_{digest}"
+
+
+def subset_ontology(entry: dict) -> dict:
+    """
+    Returns the minimal subset of a parsed ontology needed to generate a building model: its prefixes, the owl:inverseOf pairs
+    and the rdfs:subClassOf edges between named classes (i.e. the class hierarchy, without restrictions).
+    """
+    triples = [
+        (s, p, o) for s, p, o in entry['triples']
+        if p in SUBSET_PREDICATES and not isinstance(s, rdflib.BNode) and not isinstance(o, rdflib.BNode)
+    ]
+    return {'prefixes': entry['prefixes'], 'triples': triples}
+
+
+def get_ontology(name: str, version: str, data: bytes = None, path: str = None, use_cache: bool = True, subset: bool = False) -> dict:
+    """
+    Returns the parsed ontology as a dict of shape { prefixes: [(prefix, uri)], triples: [(s, p, o)] }.
+    Loaded from the on-disk cache if an entry exists for the ontology content, otherwise the TTL is parsed
+    and the result is written to cache.
+
+    :param name: ontology name, e.g. 'brick', 'switch'
+    :param version: ontology version. Use 'local' for user provided files. Local files are cached by path
+                    (see local_version), so the entries of different local files of an ontology are kept side by side.
+    :param data: raw TTL content. Required if path is not provided.
+    :param path: path to a local TTL file.
+    :param subset: return the ontology's subset (see subset_ontology) instead. Subsets are built from the full ontology once,
+                    then cached separately, so loading one does not read the full ontology.
+    """
+    if data is None:
+        with open(path, "rb") as f:
+            data = f.read()
+    cache_version = local_version(path) if version == 'local' and path else version
+    key = cache_key(name, cache_version, data, subset=subset)
+
+    if use_cache:
+        entry = _read_cache(key)
+        if entry is not None:
+            logger.info(f"Loaded {name} ({version}){' subset' if subset else ''} from ontology cache.")
+            return entry
+
+    if subset:
+        logger.info(f"Building {name} ({version}) ontology subset...")
+        entry = subset_ontology(get_ontology(name, version, data=data, path=path, use_cache=use_cache))
+    else:
+        logger.info(f"Parsing {name} ({version}) ontology...")
+        prefixes, triples = parse_ontology(data=data, path=path)
+        entry = {'prefixes': prefixes, 'triples': triples}
+    if use_cache:
+        _write_cache(key, name, cache_version, entry)
+    return entry
+
+
+def load_ontology(g: rdflib.Graph, name: str, version: str, data: bytes = None, path: str = None, use_cache: bool = True, subset: bool = False):
+    """
+    Loads an ontology (or its subset) into graph g. Equivalent to g.parse(...) on the TTL, but served from cache where possible.
+    """
+    entry = get_ontology(name, version, data=data, path=path, use_cache=use_cache, subset=subset)
+    for prefix, uri in entry['prefixes']:
+        g.bind(prefix, uri)
+    g.addN((s, p, o, g) for s, p, o in entry['triples'])
+
+
+def load_packaged_ontology(g: rdflib.Graph, name: str, version: str, use_cache: bool = True, subset: bool = False):
+    load_ontology(g, name, version, data=read_packaged_ontology(name, version), use_cache=use_cache, subset=subset)
+
+
+def clear_cache():
+    """
+    Removes all cached ontologies.
+    """
+    cache_dir = get_cache_dir()
+    if not os.path.isdir(cache_dir):
+        return
+    for filename in os.listdir(cache_dir):
+        if filename.endswith(".pickle"):
+            os.remove(os.path.join(cache_dir, filename))
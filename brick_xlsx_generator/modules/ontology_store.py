@@ -0,0 +1,241 @@
+import rdflib
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID, ModificationException
+from itertools import groupby
+from rdflib.store import Store
+import logging
+import threading
+from . import ontology_cache
+from .bulk_store import BulkMemory
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Namespace used for the named graph identifiers in a Dataset, e.g. _graph_:brick, _graph_:building
+GRAPH_NAMESPACE = rdflib.Namespace("https://_graph_.com#")
+
+# How a Dataset loads its ontologies (Dataset(ontology_mode=...)):
+#   full:   the full ontologies, when the Dataset is created
+#   lazy:   only the prefixes and inverse property table when the Dataset is created (from the ontology subsets);
+#           the full ontologies are loaded by the first operation that needs them (see Dataset.load_ontologies)
+#   subset: the ontology subsets only: prefixes, owl:inverseOf pairs and rdfs:subClassOf edges (see ontology_cache.subset_ontology)
+ONTOLOGY_MODES = ["full", "lazy", "subset"]
+
+# Process-wide ontology stores, keyed by the ontologies they hold. See get_shared_ontology_store()
+_SHARED_STORES = {}
+_SHARED_STORES_LOCK = threading.Lock()
+
+
+class OverlayStore(Store):
+    """
+    Context aware store that layers a private, writable store over a shared read-only ontology store.
+
+    Reads are served from both stores. The named graphs held by the base store (e.g. _graph_:brick, _graph_:switch)
+    are read-only; everything else (building graphs, the default graph, namespace bindings) is written to the overlay.
+    This lets many Datasets reference a single loaded copy of the ontologies.
+    """
+    context_aware = True
+    formula_aware = False
+    graph_aware = True
+    transaction_aware = False
+
+    def __init__(self, base: Store, overlay: Store = None):
+        super().__init__()
+        self.base = base
+        self.overlay = overlay if overlay is not None else BulkMemory()
+        # base graph objects by identifier. Always query the base store with its own graph objects,
+        # as Memory records the context object it is handed.
+        self._base_contexts = {ctx.identifier: ctx for ctx in base.contexts() if ctx.identifier != DATASET_DEFAULT_GRAPH_ID}
+        self._base_views = {}
+        # start from the ontology prefixes, so namespaces() matches a Dataset that parsed the ontologies itself
+        for prefix, namespace in base.namespaces():
+            self.overlay.bind(prefix, namespace)
+
+    def set_base(self, base: Store):
+        """
+        Replaces the shared ontology store, e.g. with one holding the full ontologies rather than their subsets.
+        The overlay (building graphs and namespace bindings) is kept; the new store's prefixes are bound where not already.
+        """
+        self.base = base
+        self._base_contexts = {ctx.identifier: ctx for ctx in base.contexts() if ctx.identifier != DATASET_DEFAULT_GRAPH_ID}
+        self._base_views = {}
+        for prefix, namespace in base.namespaces():
+            if self.overlay.namespace(prefix) is None:
+                self.overlay.bind(prefix, namespace)
+
+    def close(self, commit_pending_transaction: bool = False):
+        # the base store is shared, and left open
+        self.overlay.close(commit_pending_transaction)
+
+    def _is_base(self, context) -> bool:
+        return context is not None and getattr(context, 'identifier', context) in self._base_contexts
+
+    def _check_writable(self, context):
+        if self._is_base(context):
+            raise ModificationException()
+
+    def _view(self, ctx):
+        # present base contexts as graphs bound to this store (so they are never written to directly)
+        identifier = ctx.identifier
+        if identifier not in self._base_views:
+            self._base_views[identifier] = rdflib.Graph(store=self, identifier=identifier)
+        return self._base_views[identifier]
+
+    # WRITES - overlay only
+
+    def add(self, triple, context, quoted=False):
+        self._check_writable(context)
+        self.overlay.add(triple, context, quoted)
+
+    def addN(self, quads):
+        def _checked(quads):
+            # quads are added a graph at a time, so only check each run of the same context
+            for c, group in groupby(quads, key=lambda quad: quad[3]):
+                self._check_writable(c)
+                yield from group
+        self.overlay.addN(_checked(quads))
+
+    def remove(self, triple, context=None):
+        self._check_writable(context)
+        self.overlay.remove(triple, context)
+
+    def add_graph(self, graph):
+        # base graphs already exist
+        if not self._is_base(graph):
+            self.overlay.add_graph(graph)
+
+    def remove_graph(self, graph):
+        self._check_writable(graph)
+        self.overlay.remove_graph(graph)
+
+    # READS
+
+    def triples(self, triple_pattern, context=None):
+        if self._is_base(context):
+            base_ctx = self._base_contexts[getattr(context, 'identifier', context)]
+            for triple, contexts in self.base.triples(triple_pattern, base_ctx):
+                yield triple, (self._view(c) for c in contexts)
+            return
+
+        if context is None:
+            for triple, contexts in self.base.triples(triple_pattern, None):
+                yield triple, (self._view(c) for c in contexts)
+            for triple, contexts in self.overlay.triples(triple_pattern, None):
+                # a triple asserted in both layers is only reported once
+                if next(self.base.triples(triple, None), None) is None:
+                    yield triple, contexts
+            return
+
+        yield from self.overlay.triples(triple_pattern, context)
+
+    def __len__(self, context=None):
+        if self._is_base(context):
+            return self.base.__len__(self._base_contexts[getattr(context, 'identifier', context)])
+        if context is None:
+            return self.base.__len__() + self.overlay.__len__()
+        return self.overlay.__len__(context)
+
+    def contexts(self, triple=None):
+        for ctx in self.base.contexts(triple):
+            if self._is_base(ctx):
+                yield self._view(ctx)
+        yield from self.overlay.contexts(triple)
+
+    # NAMESPACES - overlay only (seeded from base at creation)
+
+    def bind(self, prefix, namespace, override=True):
+        self.overlay.bind(prefix, namespace, override=override)
+
+    def prefix(self, namespace):
+        return self.overlay.prefix(namespace)
+
+    def namespace(self, prefix):
+        return self.overlay.namespace(prefix)
+
+    def namespaces(self):
+        return self.overlay.namespaces()
+
+
+def shared_store_key(
+        load_brick: bool = True,
+        load_switch: bool = True,
+        brick_version: str = "1.2",
+        switch_version: str = "1.1.5",
+        path_to_local_brick: str = None,
+        path_to_local_switch: str = None,
+        subset: bool = False
+    ):
+    """
+    Key identifying a set of loaded ontologies (or their subsets). Uses the ontology content hash, so edited local files get a new store.
+    """
+    key = []
+    for name, load, version, local_path in [
+        ('brick', load_brick, brick_version, path_to_local_brick),
+        ('switch', load_switch, switch_version, path_to_local_switch)
+    ]:
+        if load:
+            key.append(ontology_cache.cache_key(name, version, ontology_cache.read_packaged_ontology(name, version), subset=subset))
+        elif local_path:
+            with open(local_path, "rb") as f:
+                key.append(ontology_cache.cache_key(name, 'local', f.read(), subset=subset))
+    return tuple(key)
+
+
+def load_ontologies(
+        ds: rdflib.Dataset,
+        load_brick: bool = True,
+        load_switch: bool = True,
+        brick_version: str = "1.2",
+        switch_version: str = "1.1.5",
+        path_to_local_brick: str = None,
+        path_to_local_switch: str = None,
+        use_cache: bool = True,
+        subset: bool = False
+    ):
+    """
+    Loads the requested ontologies (or their subsets) into the _graph_:brick and _graph_:switch named graphs of a Dataset.
+    Packaged ontologies are loaded by version; local files are only used if the packaged ontology is not loaded.
+    """
+    if load_brick:
+        ontology_cache.load_packaged_ontology(ds.graph(GRAPH_NAMESPACE['brick']), 'brick', brick_version, use_cache=use_cache, subset=subset)
+    elif path_to_local_brick:
+        ontology_cache.load_ontology(ds.graph(GRAPH_NAMESPACE['brick']), 'brick', 'local', path=path_to_local_brick, use_cache=use_cache, subset=subset)
+
+    if load_switch:
+        ontology_cache.load_packaged_ontology(ds.graph(GRAPH_NAMESPACE['switch']), 'switch', switch_version, use_cache=use_cache, subset=subset)
+    elif path_to_local_switch:
+        ontology_cache.load_ontology(ds.graph(GRAPH_NAMESPACE['switch']), 'switch', 'local', path=path_to_local_switch, use_cache=use_cache, subset=subset)
+
+
+def get_shared_ontology_store(
+        load_brick: bool = True,
+        load_switch: bool = True,
+        brick_version: str = "1.2",
+        switch_version: str = "1.1.5",
+        path_to_local_brick: str = None,
+        path_to_local_switch: str = None,
+        use_cache: bool = True,
+        subset: bool = False
+    ) -> Store:
+    """
+    Returns the process-wide store holding the requested ontologies (or their subsets) under the _graph_:brick and _graph_:switch named graphs.
+    The store is created on first request and reused after that. It must be treated as read-only;
+    wrap it in an OverlayStore to use it in a Dataset.
+    """
+    key = shared_store_key(load_brick, load_switch, brick_version, switch_version, path_to_local_brick, path_to_local_switch, subset=subset)
+    with _SHARED_STORES_LOCK:
+        if key in _SHARED_STORES:
+            return _SHARED_STORES[key]
+
+        logger.info(f"Loading shared ontology{' subset' if subset else ''} store...")
+        ds = rdflib.Dataset(store=BulkMemory(), default_union=True)
+        load_ontologies(ds, load_brick, load_switch, brick_version, switch_version, path_to_local_brick, path_to_local_switch, use_cache=use_cache, subset=subset)
+        _SHARED_STORES[key] = ds.store
+        return ds.store
+
+
+def clear_shared_ontology_stores():
+    """
+    Releases all process-wide ontology stores. Datasets created before this call keep their reference.
+    """
+    with _SHARED_STORES_LOCK:
+        _SHARED_STORES.clear()
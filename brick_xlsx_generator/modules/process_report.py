@@ -0,0 +1,180 @@
+from contextlib import contextmanager
+from typing import TypedDict
+import logging
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Warnings logged by any module of the package, in the thread running a stage, are counted against the stage
+PACKAGE_LOGGER = "brick_xlsx_generator"
+
+# Column that defines an entity. Rows without a class are skipped.
+CLASS_COLUMN = ('Brick', 'class')
+
+
+class StageReport(TypedDict):
+    name: str
+    seconds: float
+    # bytes the process's peak resident set size (the ru_maxrss high-water mark) rose by during the stage, by any thread.
+    # 0 for a stage that stays below an earlier peak, however much it allocates. None if not available.
+    peak_rss_growth: int
+    rows: int               # input rows read
+    triples: int            # triples generated, added or exported
+    warnings: int           # warnings logged
+
+
+class ProcessReport:
+    """
+    Structured report of a Dataset.process() or Dataset.export() run, with the wall time, peak RSS growth,
+    and row, triple and warning counts of every stage.
+
+    Stages are recorded in the order they are first run. A stage that is run more than once (e.g. per chunk when streaming)
+    accumulates into the same entry.
+
+    Warnings are counted for the thread that runs the stage, so concurrent runs (e.g. several process() calls on one Dataset)
+    each count their own. Memory is measured for the whole process, so under concurrency a stage's peak RSS growth includes
+    the other runs' allocations.
+
+    :param operation: "process" or "export"
+    :param hook: optional callable, passed the report once it is complete. e.g. to forward the metrics to a monitoring system.
+    :param term_factory: optional TermFactory. The hits and misses of its caches during the run are reported as term_cache.
+    """
+    def __init__(self, operation: str, hook=None, term_factory=None):
+        self.operation = operation
+        self.stages = {}
+        self.seconds = None
+        # reference and row counts, reported here rather than one log line per row
+        self.unresolved_references = 0
+        self.duplicate_references = 0
+        self.skipped_rows = 0
+        # triples in the resulting model (or written to output, or exported)
+        self.triples = 0
+        # exported file or stream output, if any
+        self.output = None
+        # ValidationReport of the validate stage, if run (see process(validate=True))
+        self.validation = None
+        # UploadStats of the upload stage, if run (see Dataset.upload)
+        self.upload = None
+        # { cache: { hits, misses, size, maxsize, hit_rate } } for this run, if a term factory was given
+        self.term_cache = None
+        self._term_factory = term_factory
+        self._term_cache_start = term_factory.stats() if term_factory is not None else None
+        self._hook = hook
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Times a stage. Yields the stage's StageReport so rows and triples can be counted against it.
+        """
+        stage = self.stages.setdefault(name, StageReport(name=name, seconds=0.0, peak_rss_growth=0 if resource else None, rows=0, triples=0, warnings=0))
+        counter = _WarningCounter(threading.get_ident())
+        package_logger = logging.getLogger(PACKAGE_LOGGER)
+        package_logger.addHandler(counter)
+        peak_memory = _peak_memory()
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage['seconds'] += time.perf_counter() - start
+            if peak_memory is not None:
+                stage['peak_rss_growth'] += _peak_memory() - peak_memory
+            package_logger.removeHandler(counter)
+            stage['warnings'] += counter.count
+
+    def count_rows(self, stage: StageReport, df):
+        """
+        Counts a sheet's (or chunk's) rows against a stage, and the rows without a class as skipped.
+        """
+        stage['rows'] += len(df)
+        if CLASS_COLUMN in df.columns:
+            self.skipped_rows += int((df[CLASS_COLUMN] == 0).sum())
+
+    def count_references(self, resolver):
+        """
+        Records the unresolved and duplicate reference counts of a ReferenceResolver.
+        """
+        self.unresolved_references = sum(resolver.unresolved.values())
+        self.duplicate_references = len(resolver.duplicates)
+
+    @property
+    def warnings(self) -> int:
+        return sum(stage['warnings'] for stage in self.stages.values())
+
+    def finish(self):
+        """
+        Completes the report, logs a summary and passes it to the hook.
+        """
+        self.seconds = time.perf_counter() - self._start
+        for stage in self.stages.values():
+            logger.info(f"\t{stage['name']}: {stage['seconds']:.3f}s, {stage['rows']} rows, {stage['triples']} triples, {stage['warnings']} warnings")
+        if self._term_factory is not None:
+            self.term_cache = _cache_delta(self._term_cache_start, self._term_factory.stats())
+            for name, cache in self.term_cache.items():
+                if cache['hit_rate'] is not None:
+                    logger.info(f"\t{name} cache: {cache['hit_rate']:.1%} hits ({cache['hits']} hits, {cache['misses']} misses, {cache['size']} entries)")
+        logger.info(f"{self.operation.capitalize()} completed in {self.seconds:.3f}s.")
+        if self._hook is not None:
+            try:
+                self._hook(self)
+            except Exception as e:
+                # monitoring must never break a run
+                logger.warning(f"Report hook failed: {e!r}")
+        return self
+
+    def as_dict(self) -> dict:
+        return {
+            'operation': self.operation,
+            'seconds': self.seconds,
+            'triples': self.triples,
+            'warnings': self.warnings,
+            'unresolved_references': self.unresolved_references,
+            'duplicate_references': self.duplicate_references,
+            'skipped_rows': self.skipped_rows,
+            'term_cache': self.term_cache,
+            'output': os.fspath(self.output) if isinstance(self.output, (str, os.PathLike)) else None,
+            'validation': self.validation.as_dict() if self.validation is not None else None,
+            'upload': dict(self.upload) if self.upload is not None else None,
+            'stages': [dict(stage) for stage in self.stages.values()]
+        }
+
+    def __repr__(self):
+        return f"<ProcessReport {self.operation}: {self.seconds}s, {len(self.stages)} stages, {self.triples} triples, {self.warnings} warnings>"
+
+
+class _WarningCounter(logging.Handler):
+    # counts the warnings logged by one thread
+    def __init__(self, thread: int):
+        super().__init__(logging.WARNING)
+        self.thread = thread
+        self.count = 0
+
+    def emit(self, record):
+        if record.thread == self.thread:
+            self.count += 1
+
+
+def _cache_delta(start: dict, end: dict) -> dict:
+    # cache stats for the lookups made between start and end
+    delta = {}
+    for name, cache in end.items():
+        hits, misses = cache['hits'] - start[name]['hits'], cache['misses'] - start[name]['misses']
+        delta[name] = {**cache, 'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses) if hits + misses else None}
+    return delta
+
+
+def _peak_memory():
+    # peak resident set size of the process, in bytes
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
@@ -0,0 +1,102 @@
+import pandas as pd
+from collections import Counter
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Max number of example values to include in summary log lines
+_SUMMARY_EXAMPLES = 10
+
+
+class ReferenceResolver:
+    """
+    Resolves the values used in 'ref' relationship cells (e.g. a label) to entity identifiers.
+
+    Replaces the df_map lookup table (and helpers.lookupValue). The map is a dict built once, so each lookup is O(1)
+    instead of a scan of the whole table. As with the lookup table, the first entity defined for a key wins.
+
+    Duplicate keys and unresolved references are collected and reported once via log_summary(),
+    rather than one warning per reference.
+    """
+    def __init__(self):
+        self._map = {}
+        # key -> identifiers of the entities that were ignored because the key was already defined
+        self.duplicates = {}
+        # reference value -> number of times it could not be resolved
+        self.unresolved = Counter()
+
+    @classmethod
+    def from_dataframes(cls, dfs: list, relationship_field: tuple = ("Brick", "identifier")):
+        """
+        Builds the resolver from the model sheets. Entities are referenced by relationship_field and resolve to ('Brick', 'identifier').
+        """
+        resolver = cls()
+        for df in dfs:
+            resolver.add(df[("Brick", "identifier")], df[relationship_field])
+        return resolver
+
+    def __len__(self):
+        return len(self._map)
+
+    def __contains__(self, key):
+        return key in self._map
+
+    def add(self, subjects, keys):
+        """
+        Adds entities to the map. subjects and keys are equal length iterables (e.g. dataframe columns).
+        """
+        for subject, key in zip(subjects, keys):
+            # empty cells can never be referenced
+            if key == 0 or key == "" or not key: continue
+            if key in self._map:
+                self.duplicates.setdefault(key, []).append(subject)
+            else:
+                self._map[key] = subject
+
+    def changed_keys(self, other: "ReferenceResolver") -> set:
+        """
+        Returns the keys that resolve differently in other, including keys only defined in one of the resolvers.
+        """
+        return {key for key in self._map.keys() | other._map.keys() if self._map.get(key) != other._map.get(key)}
+
+    def resolve(self, value):
+        """
+        Returns the identifier for a referenced value, or None if it is not defined.
+        """
+        subject = self._map.get(value)
+        if subject is None:
+            self.unresolved[value] += 1
+        return subject
+
+    def resolve_many(self, values) -> list:
+        """
+        Resolves a list of referenced values, dropping any that cannot be resolved.
+        """
+        return list(filter(None, [self.resolve(value) for value in values]))
+
+    def resolve_column(self, column: pd.Series) -> pd.Series:
+        """
+        Bulk resolves a column of single referenced values. Unresolved values are returned as None.
+        """
+        subjects = column.map(self._map)
+        missing = column[subjects.isna()]
+        self.unresolved.update(missing)
+        return subjects.astype(object).where(subjects.notna(), None)
+
+    def contains_column(self, column: pd.Series) -> pd.Series:
+        """
+        Bulk tests whether each value of a column is a defined key. Unlike resolve_column(), misses are not counted as unresolved.
+        """
+        return column.isin(self._map.keys())
+
+    def log_summary(self):
+        """
+        Logs one summary line each for duplicate keys and unresolved references.
+        """
+        if self.duplicates:
+            examples = ", ".join(str(key) for key in list(self.duplicates)[:_SUMMARY_EXAMPLES])
+            logger.warning(f"{len(self.duplicates)} reference keys are defined by more than one entity. The first entity is used. e.g. {examples}")
+        if self.unresolved:
+            examples = ", ".join(str(value) for value, _ in self.unresolved.most_common(_SUMMARY_EXAMPLES))
+            logger.warning(f"{sum(self.unresolved.values())} references ({len(self.unresolved)} unique) could not be resolved and were skipped. e.g. {examples}")
@@ -0,0 +1,321 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypedDict
+import http.client
+import logging
+import queue
+import select
+import threading
+import time
+import urllib.parse
+import rdflib
+from .triple_writer import nt_row
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# How triples are sent to the endpoint:
+#   graph_store: SPARQL 1.1 Graph Store HTTP Protocol. Each batch is POSTed as N-Triples to endpoint?graph=<graph>.
+#   update:      SPARQL 1.1 Update. Each batch is POSTed as an INSERT DATA into the graph.
+PROTOCOLS = ["graph_store", "update"]
+
+# Response statuses worth retrying (the request may succeed once the server recovers)
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Response statuses after which a request was not applied, so a batch that is not idempotent can be retried
+NOT_APPLIED_STATUSES = {429, 503}
+
+DEFAULT_BATCH_SIZE = 10000
+
+# Min seconds between progress log lines
+_PROGRESS_INTERVAL = 1.0
+
+
+class UploadStats(TypedDict):
+    endpoint: str
+    graph: str
+    batches: int            # batches uploaded
+    failed_batches: int     # batches that still failed after every retry
+    triples: int            # triples uploaded
+    bytes: int              # request body bytes uploaded
+    requests: int           # HTTP requests sent, including retries and the graph clear
+    retries: int
+    connections: int        # connections opened. Fewer than requests when connections are kept alive.
+    seconds: float
+    triples_per_second: float
+
+
+class UploadError(Exception):
+    """
+    Raised when batches could not be uploaded after every retry. stats is the UploadStats of the upload.
+    """
+    def __init__(self, message: str, stats: UploadStats):
+        super().__init__(message)
+        self.stats = stats
+
+
+class SparqlUploader:
+    """
+    Uploads triples into a named graph of a SPARQL 1.1 Graph Store or Update endpoint.
+
+    Triples are sent in batches of batch_size, concurrency at a time, over a pool of keep-alive HTTP connections
+    that is reused between uploads. A batch that fails with a connection error or one of RETRY_STATUSES is retried
+    up to retries times, backing off exponentially. Batches of blank node triples are not idempotent (each request
+    mints new blank nodes), so they are only retried when the server cannot have applied them: the request could not
+    be sent, or was answered with one of NOT_APPLIED_STATUSES. The uploader is thread-safe, so one pool can serve
+    uploads run from several threads; close it (or use it as a context manager) to close the connections.
+
+    :param endpoint: Graph Store URL (e.g. http://localhost:7200/repositories/model/rdf-graphs/service) or Update URL
+    :param protocol: one of PROTOCOLS
+    :param headers: extra request headers, e.g. { "Authorization": "Basic ..." }
+    :param progress: optional callable, passed the UploadStats so far after each batch
+    """
+    def __init__(self, endpoint: str, protocol: str = "graph_store", batch_size: int = DEFAULT_BATCH_SIZE, concurrency: int = 4,
+                 retries: int = 3, backoff: float = 0.5, timeout: float = 60, headers: dict = None, progress=None):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Protocol: {protocol} is not supported. Options are: {PROTOCOLS}")
+        url = urllib.parse.urlsplit(endpoint)
+        if url.scheme not in ["http", "https"]:
+            raise ValueError(f"Endpoint: {endpoint} is not an http or https URL.")
+        self.endpoint = endpoint
+        self.protocol = protocol
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.progress = progress
+        self._url = url
+        self._connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        # idle keep-alive connections
+        self._pool = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def upload(self, triples, graph: rdflib.URIRef, replace: bool = True) -> UploadStats:
+        """
+        Uploads triples (any iterable, e.g. a graph or iter_triples()) into graph.
+        Unless triples is a graph, each blank node group must come before the triple linking it from its entity,
+        as iter_triples() and triple_generator generate them (see batch_triples).
+
+        :param replace: True; clear the graph first. Otherwise the triples are added to it.
+
+        Returns: UploadStats. Raises UploadError if any batch failed after every retry.
+        """
+        stats = UploadStats(endpoint=self.endpoint, graph=str(graph), batches=0, failed_batches=0, triples=0, bytes=0,
+                            requests=0, retries=0, connections=0, seconds=0.0, triples_per_second=0.0)
+        opened = self._opened
+        start = time.perf_counter()
+        last_log = start
+        errors = []
+
+        if replace:
+            logger.info(f"Clearing graph: {graph}...")
+            if self.protocol == "graph_store":
+                self._send("DELETE", self._graph_path(graph), None, {}, stats, ok_statuses={404})
+            else:
+                self._send("POST", self._url_path(), f"DROP SILENT GRAPH <{graph}>".encode(), {"Content-Type": "application/sparql-update"}, stats)
+
+        def upload_batch(batch):
+            body, headers = self._batch_request(batch, graph)
+            idempotent = not any(isinstance(term, rdflib.BNode) for triple in batch for term in (triple[0], triple[2]))
+            try:
+                self._send("POST", self._graph_path(graph) if self.protocol == "graph_store" else self._url_path(), body, headers, stats, idempotent=idempotent)
+            except (OSError, http.client.HTTPException, UploadError) as e:
+                return len(batch), len(body), e
+            return len(batch), len(body), None
+
+        logger.info(f"Uploading to graph: {graph} in batches of {self.batch_size}, {self.concurrency} at a time...")
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            # only a few batches are serialised ahead of the requests in flight
+            pending = []
+            for batch in batch_triples(triples, self.batch_size, linked_last=not isinstance(triples, rdflib.Graph)):
+                pending.append(executor.submit(upload_batch, batch))
+                if len(pending) >= self.concurrency * 2:
+                    last_log = self._collect(pending.pop(0), stats, errors, start, last_log)
+            for future in pending:
+                last_log = self._collect(future, stats, errors, start, last_log)
+
+        stats['seconds'] = time.perf_counter() - start
+        stats['triples_per_second'] = stats['triples'] / stats['seconds'] if stats['seconds'] else 0.0
+        stats['connections'] = self._opened - opened
+        logger.info(f"Uploaded {stats['triples']} triples in {stats['batches']} batches in {stats['seconds']:.3f}s "
+                    f"({stats['triples_per_second']:.0f} triples/s, {stats['requests']} requests, {stats['retries']} retries, {stats['connections']} connections opened).")
+        if errors:
+            logger.error(f"{stats['failed_batches']} batches failed to upload. e.g. {errors[0]!r}")
+            raise UploadError(f"{stats['failed_batches']} of {stats['batches'] + stats['failed_batches']} batches failed to upload to {self.endpoint}: {errors[0]}", stats)
+        return stats
+
+    def _collect(self, future, stats: UploadStats, errors: list, start: float, last_log: float) -> float:
+        # records a completed batch. Returns the time of the last progress log line.
+        triples, size, error = future.result()
+        if error is not None:
+            stats['failed_batches'] += 1
+            errors.append(error)
+        else:
+            stats['batches'] += 1
+            stats['triples'] += triples
+            stats['bytes'] += size
+        now = time.perf_counter()
+        stats['seconds'] = now - start
+        stats['triples_per_second'] = stats['triples'] / stats['seconds'] if stats['seconds'] else 0.0
+        if self.progress is not None:
+            self.progress(stats)
+        if now - last_log >= _PROGRESS_INTERVAL:
+            logger.info(f"Uploaded {stats['triples']} triples ({stats['batches']} batches, {stats['triples_per_second']:.0f} triples/s)...")
+            return now
+        return last_log
+
+    def _batch_request(self, batch: list, graph: rdflib.URIRef):
+        # request body and headers for a batch
+        lines = "".join(nt_row(triple) for triple in batch)
+        if self.protocol == "graph_store":
+            return lines.encode(), {"Content-Type": "application/n-triples"}
+        return f"INSERT DATA {{ GRAPH <{graph}> {{\n{lines}}} }}".encode(), {"Content-Type": "application/sparql-update"}
+
+    def _url_path(self) -> str:
+        return self._url.path or "/"
+
+    def _graph_path(self, graph: rdflib.URIRef) -> str:
+        # indirect graph identification: endpoint?graph=<graph>
+        query = urllib.parse.urlencode({'graph': str(graph)})
+        return f"{self._url_path()}?{self._url.query + '&' if self._url.query else ''}{query}"
+
+    def _send(self, method: str, path: str, body: bytes, headers: dict, stats: UploadStats, ok_statuses: set = (), idempotent: bool = True):
+        """
+        Sends a request on a pooled connection, retrying connection errors and RETRY_STATUSES.
+        Unless idempotent, only failures before the request was sent and NOT_APPLIED_STATUSES are retried.
+        Raises the last error, or UploadError for a response that is not 2xx (or in ok_statuses).
+        """
+        headers = {**self.headers, **headers}
+        attempt = 0
+        while True:
+            connection = self._acquire()
+            with self._lock:
+                stats['requests'] += 1
+            sent = False
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                sent = True
+                response = connection.getresponse()
+                # the response must be read in full before the connection is reused
+                content = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                # e.g. the connection was refused or reset. Discard it.
+                connection.close()
+                error = e
+                if sent and not idempotent:
+                    # the server may have applied the request before the connection failed
+                    raise
+            else:
+                if response.will_close:
+                    connection.close()
+                else:
+                    self._pool.put(connection)
+                if 200 <= response.status < 300 or response.status in ok_statuses:
+                    return
+                error = UploadError(f"{method} {path} failed: {response.status} {response.reason} {content[:200]!r}", stats)
+                if response.status not in (RETRY_STATUSES if idempotent else NOT_APPLIED_STATUSES):
+                    raise error
+            if attempt >= self.retries:
+                raise error
+            with self._lock:
+                stats['retries'] += 1
+            logger.warning(f"Retrying request ({attempt + 1} of {self.retries}): {error!r}")
+            time.sleep(self.backoff * 2 ** attempt)
+            attempt += 1
+
+    def _acquire(self):
+        # an idle pooled connection, or a new one. Connections the server has closed while idle are discarded.
+        while True:
+            try:
+                connection = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            if not _dropped(connection):
+                return connection
+            connection.close()
+        with self._lock:
+            self._opened += 1
+        return self._connection_class(self._url.hostname, self._url.port, timeout=self.timeout)
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def batch_triples(triples, batch_size: int, linked_last: bool = True):
+    """
+    Splits triples into lists of about batch_size, yielding each one as soon as it is full.
+
+    Blank node labels are scoped to a request, so the triples connected through blank nodes (e.g. a tag collection,
+    with its rdf:List nodes and key-value nodes) are kept in one batch. They are batched apart from the other triples,
+    as they are not idempotent (see SparqlUploader). A group larger than batch_size is sent as one batch.
+
+    :param linked_last: True; each group comes before the triple linking it from a named subject (e.g. the entity's
+        hasTagCollection or hasTag link), as triple_generator generates them. A group is batched as soon as it is linked,
+        so only the groups being generated are held. False for triples in any order (e.g. a graph's):
+        the groups are batched once every triple has been read.
+    """
+    batch, linked = [], []
+    # union-find over the blank nodes of the groups not yet batched, and the triples of each group by its root
+    parent = {}
+    groups = {}
+
+    def find(bnode):
+        root = parent.setdefault(bnode, bnode)
+        while root != parent[root]:
+            parent[root] = parent[parent[root]]
+            root = parent[root]
+        return root
+
+    for triple in triples:
+        bnodes = [term for term in (triple[0], triple[2]) if isinstance(term, rdflib.BNode)]
+        if not bnodes:
+            batch.append(triple)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+            continue
+        root = find(bnodes[0])
+        group = groups.setdefault(root, [])
+        for bnode in bnodes[1:]:
+            other = find(bnode)
+            if other != root:
+                parent[other] = root
+                group.extend(groups.pop(other, []))
+        group.append(triple)
+        if linked_last and not isinstance(triple[0], rdflib.BNode):
+            # the group's link from its entity: the group is complete
+            del groups[root]
+            for s, p, o in group:
+                parent.pop(s, None)
+                parent.pop(o, None)
+            linked.extend(group)
+            if len(linked) >= batch_size:
+                yield linked
+                linked = []
+
+    for group in groups.values():
+        linked.extend(group)
+        if len(linked) >= batch_size:
+            yield linked
+            linked = []
+    if batch:
+        yield batch
+    if linked:
+        yield linked
+
+
+def _dropped(connection) -> bool:
+    # an idle keep-alive connection is only readable once the server has closed it
+    return connection.sock is not None and bool(select.select([connection.sock], [], [], 0)[0])
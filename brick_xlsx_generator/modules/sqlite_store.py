@@ -0,0 +1,327 @@
+import rdflib
+from rdflib.graph import Graph
+from rdflib.store import Store, VALID_STORE, NO_STORE
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import groupby, islice
+import logging
+import os.path
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Quads are inserted and read this many rows at a time
+BATCH_SIZE = 50000
+
+# Max terms held in each direction of the term id cache
+DEFAULT_CACHE_SIZE = 500000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    datatype TEXT NOT NULL DEFAULT '',
+    lang TEXT NOT NULL DEFAULT '',
+    UNIQUE (kind, value, datatype, lang)
+);
+CREATE TABLE IF NOT EXISTS quads (
+    s INTEGER NOT NULL,
+    p INTEGER NOT NULL,
+    o INTEGER NOT NULL,
+    g INTEGER NOT NULL,
+    PRIMARY KEY (g, s, p, o)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS quads_spo ON quads (s, p, o);
+CREATE INDEX IF NOT EXISTS quads_pos ON quads (p, o, s);
+CREATE INDEX IF NOT EXISTS quads_osp ON quads (o, s, p);
+CREATE TABLE IF NOT EXISTS graphs (
+    g INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS namespaces (
+    prefix TEXT PRIMARY KEY,
+    uri TEXT NOT NULL UNIQUE
+);
+"""
+
+# term kinds
+_URI, _BNODE, _LITERAL = "U", "B", "L"
+
+
+class SQLiteStore(Store):
+    """
+    Context aware rdflib store that keeps its quads in an SQLite database on disk, so a Dataset of many building graphs
+    is not limited by RAM and can be reopened without reprocessing the workbooks.
+
+    Terms are stored once, in a terms table, and each quad as four integer term ids. The quads table is clustered on
+    (g, s, p, o), with (s, p, o), (p, o, s) and (o, s, p) indexes, so every triple pattern, in one graph or across all of them,
+    is an index lookup. addN inserts a batch of quads in a single transaction; other writes are committed as they are made.
+    The most recently used term ids (up to cache_size) are cached in memory. The connection is shared between threads, one statement at a time.
+
+    :param path: database file. Created if it does not exist. Use ":memory:" for a temporary database.
+    """
+    context_aware = True
+    formula_aware = False
+    graph_aware = True
+    transaction_aware = False
+
+    def __init__(self, path: str = None, cache_size: int = DEFAULT_CACHE_SIZE, configuration=None, identifier=None):
+        self.path = None
+        self._connection = None
+        self._lock = threading.RLock()
+        self._cache_size = cache_size
+        self._ids = OrderedDict()  # term: id, least recently used first
+        self._terms = {}
+        super().__init__(configuration=path or configuration, identifier=identifier)
+
+    def open(self, configuration: str, create: bool = True):
+        """
+        Opens (or with create, creates) the database at the path given by configuration.
+        """
+        if self._connection is not None:
+            return VALID_STORE
+        if not create and configuration != ":memory:" and not os.path.exists(configuration):
+            return NO_STORE
+        self.path = configuration
+        # transactions are managed explicitly (see _transaction)
+        self._connection = sqlite3.connect(configuration, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._connection.executescript(_SCHEMA)
+        logger.info(f"Opened SQLite store: {configuration}")
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction: bool = False):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+            self._ids.clear()
+            self._terms.clear()
+
+    def destroy(self, configuration: str):
+        self.close()
+        for suffix in ["", "-wal", "-shm"]:
+            if os.path.exists(configuration + suffix):
+                os.remove(configuration + suffix)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                # ids cached during the transaction may have been rolled back
+                self._ids.clear()
+                self._terms.clear()
+                raise
+            self._connection.execute("COMMIT")
+
+    # TERMS
+
+    def _term_id(self, term, create: bool = False):
+        """
+        Id of a term (or a graph's identifier). None if the term is not stored, unless create.
+        """
+        term = getattr(term, 'identifier', term)
+        term_id = self._ids.get(term)
+        if term_id is not None:
+            self._ids.move_to_end(term)
+            return term_id
+        key = _encode(term)
+        row = self._connection.execute("SELECT id FROM terms WHERE kind = ? AND value = ? AND datatype = ? AND lang = ?", key).fetchone()
+        if row is not None:
+            term_id = row[0]
+        elif create:
+            term_id = self._connection.execute("INSERT INTO terms (kind, value, datatype, lang) VALUES (?, ?, ?, ?)", key).lastrowid
+        else:
+            return None
+        self._cache(term_id, term)
+        return term_id
+
+    def _term(self, term_id: int):
+        term = self._terms.get(term_id)
+        if term is None:
+            term = _decode(*self._connection.execute("SELECT kind, value, datatype, lang FROM terms WHERE id = ?", (term_id,)).fetchone())
+            self._cache(term_id, term)
+        else:
+            self._ids.move_to_end(term)
+        return term
+
+    def _cache(self, term_id: int, term):
+        """
+        Caches a term and its id, evicting the least recently used term when the cache is full.
+        """
+        if len(self._ids) >= self._cache_size:
+            _, evicted_id = self._ids.popitem(last=False)
+            del self._terms[evicted_id]
+        self._ids[term] = term_id
+        self._terms[term_id] = term
+
+    def _graph(self, graph_id: int) -> Graph:
+        return Graph(store=self, identifier=self._term(graph_id))
+
+    def _pattern(self, triple_pattern, context):
+        """
+        WHERE clause and parameters matching a triple pattern (in context, if given). None if a bound term is not stored, so nothing can match.
+        """
+        clauses, params = [], []
+        for column, term in zip(["s", "p", "o", "g"], [*triple_pattern, context]):
+            if term is None:
+                continue
+            term_id = self._term_id(term)
+            if term_id is None:
+                return None
+            clauses.append(f"{column} = ?")
+            params.append(term_id)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    # WRITES
+
+    def add(self, triple, context, quoted=False):
+        Store.add(self, triple, context, quoted)
+        with self._transaction() as connection:
+            connection.execute("INSERT OR IGNORE INTO quads VALUES (?, ?, ?, ?)", [self._term_id(term, create=True) for term in (*triple, context)])
+
+    def addN(self, quads):
+        """
+        Adds quads in batches of BATCH_SIZE, each in a single transaction.
+        """
+        quads = iter(quads)
+        while True:
+            batch = list(islice(quads, BATCH_SIZE))
+            if not batch:
+                return
+            with self._transaction() as connection:
+                rows = []
+                for context, group in groupby(batch, key=lambda quad: quad[3]):
+                    if context is None:
+                        raise Exception("Context associated with %s %s %s is None!" % next(group)[:3])
+                    graph_id = self._term_id(context, create=True)
+                    term_id = self._term_id
+                    rows.extend((term_id(s, True), term_id(p, True), term_id(o, True), graph_id) for s, p, o, _ in group)
+                connection.executemany("INSERT OR IGNORE INTO quads VALUES (?, ?, ?, ?)", rows)
+
+    def remove(self, triple_pattern, context=None):
+        with self._transaction() as connection:
+            pattern = self._pattern(triple_pattern, context)
+            if pattern is not None:
+                where, params = pattern
+                connection.execute(f"DELETE FROM quads{where}", params)
+
+    def add_graph(self, graph):
+        with self._transaction() as connection:
+            connection.execute("INSERT OR IGNORE INTO graphs VALUES (?)", (self._term_id(graph, create=True),))
+
+    def remove_graph(self, graph):
+        with self._transaction() as connection:
+            graph_id = self._term_id(graph)
+            if graph_id is not None:
+                connection.execute("DELETE FROM quads WHERE g = ?", (graph_id,))
+                connection.execute("DELETE FROM graphs WHERE g = ?", (graph_id,))
+
+    # READS
+
+    def triples(self, triple_pattern, context=None):
+        with self._lock:
+            pattern = self._pattern(triple_pattern, context)
+            if pattern is None:
+                return
+            if context is not None and not isinstance(context, Graph):
+                context = self._graph(self._term_id(context))
+        where, params = pattern
+        if context is not None:
+            for s, p, o in self._select(f"SELECT s, p, o FROM quads{where}", params):
+                yield (s, p, o), iter([context])
+            return
+        for s, p, o in self._select(f"SELECT DISTINCT s, p, o FROM quads{where}", params):
+            yield (s, p, o), self._contexts_of(s, p, o)
+
+    def _select(self, sql: str, params: list):
+        # rows are fetched in batches and decoded to terms
+        with self._lock:
+            cursor = self._connection.execute(sql, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(BATCH_SIZE)
+                if not rows:
+                    return
+                terms = [tuple(self._term(term_id) for term_id in row) for row in rows]
+            yield from terms
+
+    def _contexts_of(self, s, p, o):
+        # only queried if the contexts are read
+        with self._lock:
+            params = [self._term_id(term) for term in (s, p, o)]
+            graphs = [self._graph(row[0]) for row in self._connection.execute("SELECT g FROM quads WHERE s = ? AND p = ? AND o = ?", params).fetchall()]
+        yield from graphs
+
+    def __len__(self, context=None):
+        with self._lock:
+            if context is None:
+                return self._connection.execute("SELECT COUNT(*) FROM (SELECT DISTINCT s, p, o FROM quads)").fetchone()[0]
+            graph_id = self._term_id(context)
+            if graph_id is None:
+                return 0
+            return self._connection.execute("SELECT COUNT(*) FROM quads WHERE g = ?", (graph_id,)).fetchone()[0]
+
+    def contexts(self, triple=None):
+        with self._lock:
+            if triple is None:
+                ids = [row[0] for row in self._connection.execute("SELECT g FROM graphs UNION SELECT DISTINCT g FROM quads").fetchall()]
+            else:
+                pattern = self._pattern(triple, None)
+                if pattern is None:
+                    return
+                where, params = pattern
+                ids = [row[0] for row in self._connection.execute(f"SELECT DISTINCT g FROM quads{where}", params).fetchall()]
+            graphs = [self._graph(graph_id) for graph_id in ids]
+        yield from graphs
+
+    # NAMESPACES
+
+    def bind(self, prefix, namespace, override=True):
+        with self._transaction() as connection:
+            bound = connection.execute("SELECT prefix FROM namespaces WHERE prefix = ? OR uri = ?", (prefix, str(namespace))).fetchone()
+            if override:
+                connection.execute("DELETE FROM namespaces WHERE prefix = ? OR uri = ?", (prefix, str(namespace)))
+                connection.execute("INSERT INTO namespaces VALUES (?, ?)", (prefix, str(namespace)))
+            elif bound is None:
+                connection.execute("INSERT INTO namespaces VALUES (?, ?)", (prefix, str(namespace)))
+
+    def prefix(self, namespace):
+        with self._lock:
+            row = self._connection.execute("SELECT prefix FROM namespaces WHERE uri = ?", (str(namespace),)).fetchone()
+        return row[0] if row is not None else None
+
+    def namespace(self, prefix):
+        with self._lock:
+            row = self._connection.execute("SELECT uri FROM namespaces WHERE prefix = ?", (prefix,)).fetchone()
+        return rdflib.URIRef(row[0]) if row is not None else None
+
+    def namespaces(self):
+        with self._lock:
+            rows = self._connection.execute("SELECT prefix, uri FROM namespaces").fetchall()
+        for prefix, uri in rows:
+            yield prefix, rdflib.URIRef(uri)
+
+
+def _encode(term) -> tuple:
+    # (kind, value, datatype, lang)
+    if isinstance(term, rdflib.Literal):
+        return _LITERAL, str(term), str(term.datatype or ""), term.language or ""
+    if isinstance(term, rdflib.BNode):
+        return _BNODE, str(term), "", ""
+    return _URI, str(term), "", ""
+
+
+def _decode(kind: str, value: str, datatype: str, lang: str):
+    if kind == _LITERAL:
+        return rdflib.Literal(value, lang=lang or None, datatype=datatype or None)
+    if kind == _BNODE:
+        return rdflib.BNode(value)
+    return rdflib.URIRef(value)
@@ -0,0 +1,111 @@
+from functools import lru_cache
+import rdflib
+from . import helpers
+
+# Entries kept in each of the fragment and URI caches. Classes, predicates and referenced entities
+# (e.g. equipment referenced by many points) are used most and stay cached; one-off identifiers are evicted first.
+DEFAULT_CACHE_SIZE = 65536
+
+
+class TermFactory:
+    """
+    Mints the URIRefs of a model (entities, classes, references and predicates) from a set of namespaces,
+    caching formatted fragments and minted terms so values that repeat across rows, columns, sheets or chunks are only built once.
+    Both caches are LRU caches bounded to maxsize entries.
+
+    The factory can be used in place of the namespaces dict, e.g. factory['brick']. Terms are cached by namespace URI,
+    so factories over different namespaces (e.g. one per building, see with_namespaces) can share the caches.
+
+    :param namespaces: { prefix: rdflib.Namespace }
+    :param maxsize: maximum number of entries in each cache
+    """
+    def __init__(self, namespaces: dict, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.namespaces = namespaces
+        self.maxsize = maxsize
+        self._fragment = lru_cache(maxsize=maxsize, typed=True)(helpers.format_fragment)
+        self._term = lru_cache(maxsize=maxsize, typed=True)(_namespace_term)
+
+    def __getitem__(self, prefix: str) -> rdflib.Namespace:
+        return self.namespaces[prefix]
+
+    def __contains__(self, prefix: str) -> bool:
+        return prefix in self.namespaces
+
+    def term(self, prefix: str, name: str) -> rdflib.URIRef:
+        """
+        Returns namespaces[prefix][name], e.g. a predicate.
+        """
+        return self._term(self.namespaces[prefix], name)
+
+    def uri(self, prefix: str, value) -> rdflib.URIRef:
+        """
+        Returns the URI for a cell value in a namespace, with the value formatted as a URI fragment (see helpers.format_fragment).
+        """
+        return self._term(self.namespaces[prefix], self._fragment(value))
+
+    def entity(self, identifier) -> rdflib.URIRef:
+        return self.uri('building', identifier)
+
+    def entity_class(self, value: str) -> rdflib.URIRef:
+        """
+        Returns the URI of a Brick class, or a Switch class if prefixed with "switch:".
+        """
+        fragment = self._fragment(value)
+        if "switch:" in fragment:
+            return self._term(self.namespaces['switch'], fragment.replace("switch:", ""))
+        return self._term(self.namespaces['brick'], fragment)
+
+    def predicate(self, relationship) -> rdflib.URIRef:
+        return self.term(relationship.namespace, relationship.name)
+
+    def with_namespaces(self, namespaces: dict) -> "TermFactory":
+        """
+        Returns a factory over another namespaces dict (e.g. with a building's namespace) that shares this factory's caches.
+        The caches are thread-safe, so factories for several buildings can be used concurrently.
+        """
+        factory = TermFactory.__new__(TermFactory)
+        factory.namespaces = namespaces
+        factory.maxsize = self.maxsize
+        factory._fragment = self._fragment
+        factory._term = self._term
+        return factory
+
+    def stats(self) -> dict:
+        """
+        Returns the hits, misses, size and hit rate of the fragment and URI caches.
+        """
+        return {name: _cache_stats(cache) for name, cache in [('fragments', self._fragment), ('uris', self._term)]}
+
+    def clear(self):
+        self._fragment.cache_clear()
+        self._term.cache_clear()
+
+    # the caches are rebuilt when sent to a worker process
+    def __getstate__(self):
+        return {'namespaces': self.namespaces, 'maxsize': self.maxsize}
+
+    def __setstate__(self, state):
+        self.__init__(state['namespaces'], state['maxsize'])
+
+
+def term_factory(namespaces) -> TermFactory:
+    """
+    Returns namespaces if it is already a TermFactory, otherwise a new TermFactory over the namespaces dict.
+    """
+    return namespaces if isinstance(namespaces, TermFactory) else TermFactory(namespaces)
+
+
+def _namespace_term(namespace: rdflib.Namespace, name) -> rdflib.URIRef:
+    return namespace[name]
+
+
+def _cache_stats(cache) -> dict:
+    info = cache.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'maxsize': info.maxsize,
+        'hit_rate': info.hits / lookups if lookups else None
+    }
@@ -0,0 +1,276 @@
+from array import array
+from itertools import islice
+import rdflib
+from .bulk_store import add_triples
+from .triple_writer import TripleWriter
+
+# Triples written to a TripleWriter at a time, so a buffer is never fully expanded into rdflib terms
+WRITE_BATCH_SIZE = 100000
+
+
+# TermDictionary kinds of term
+URI, LITERAL, TERM = 0, 1, 2
+
+
+class TermDictionary:
+    """
+    Interned rdflib terms, numbered in order of first use. Every distinct URI or literal is held once, however many triples use it.
+    URIs and plain literals (the bulk of a building model) are held as plain strings, and only created as rdflib terms when looked up.
+
+    Blank nodes minted with bnode() are numbered too, but nothing is stored for them: they are negative ids,
+    created as BNodes the first time the dictionary is looked up. Blank nodes passed in as rdflib terms are interned like any other term.
+
+    A dictionary can be shared between buffers, so the terms common to them (e.g. classes, predicates, referenced entities) are only held once.
+
+    While terms are added, each is held as a string and indexed to intern it. A dictionary that is kept once it is complete can be
+    compact()ed, packing the strings into a single UTF-8 buffer and dropping the index. It is unpacked again when a term is added or looked up.
+    """
+    def __init__(self):
+        self._ids = {URI: {}, LITERAL: {}, TERM: {}}
+        self._values = []
+        self._kinds = bytearray()
+        self._packed = None
+        self._bnode_count = 0
+        self._reset_lookup()
+
+    def _reset_lookup(self):
+        self._terms = []
+        self._bnodes = []
+        self._lookup = None
+
+    def id(self, term) -> int:
+        """
+        Returns the id of a term, adding it if new. Ids minted by bnode() are returned as is.
+        """
+        term_type = type(term)
+        if term_type is int:
+            return term
+        if term_type is rdflib.URIRef:
+            kind, key = URI, str(term)
+        elif term_type is rdflib.Literal and term.language is None and term.datatype is None:
+            kind, key = LITERAL, str(term)
+        else:
+            kind, key = TERM, term
+        ids = self._ids[kind]
+        term_id = ids.get(key)
+        if term_id is None:
+            if self._packed is not None:
+                # the index was dropped by compact()
+                self._unpack()
+                return self.id(term)
+            term_id = ids[key] = len(self._values)
+            self._values.append(key)
+            self._kinds.append(kind)
+        return term_id
+
+    def _merge(self, other: "TermDictionary") -> list:
+        # adds the terms of other, returning their ids here (indexed by their ids in other)
+        self._unpack()
+        other._unpack()
+        mapping = []
+        for kind, value in zip(other._kinds, other._values):
+            ids = self._ids[kind]
+            term_id = ids.get(value)
+            if term_id is None:
+                term_id = ids[value] = len(self._values)
+                self._values.append(value)
+                self._kinds.append(kind)
+            mapping.append(term_id)
+        return mapping
+
+    def bnode(self) -> int:
+        """
+        Mints a new blank node id.
+        """
+        self._bnode_count += 1
+        return -self._bnode_count
+
+    def lookup(self) -> list:
+        """
+        Returns a list that maps ids to rdflib terms: the terms, followed by the blank nodes in reverse so negative ids index from the end.
+        Terms are only created once, so repeated lookups return the same objects.
+        """
+        if self._lookup is None or len(self._lookup) != len(self):
+            self._unpack()
+            make_term = {URI: rdflib.URIRef, LITERAL: rdflib.Literal, TERM: lambda term: term}
+            start = len(self._terms)
+            self._terms.extend(make_term[kind](value) for kind, value in zip(self._kinds[start:], self._values[start:]))
+            self._bnodes.extend(rdflib.BNode() for _ in range(self._bnode_count - len(self._bnodes)))
+            self._lookup = self._terms + self._bnodes[::-1]
+        return self._lookup
+
+    def term(self, term_id: int):
+        return self.lookup()[term_id]
+
+    def __len__(self):
+        return len(self._kinds) + self._bnode_count
+
+    def compact(self):
+        """
+        Packs the URIs and plain literals into one UTF-8 buffer, with an offset per term, and drops the index used to intern them
+        and the rdflib URIs and literals created by lookup(). Each term then takes its encoded length plus 9 bytes, rather than over 100.
+        """
+        if self._packed is None:
+            self._packed = self._pack()
+            self._ids = {URI: {}, LITERAL: {}, TERM: {}}
+            self._values = None
+            # blank nodes already created are kept, so the buffer yields the same ones after compacting
+            self._terms, self._lookup = [], None
+
+    def _pack(self) -> tuple:
+        # (UTF-8 buffer, end offset of each term, { id: term } of the TERM kind terms)
+        data, offsets, others = bytearray(), array('q'), {}
+        for term_id, (kind, value) in enumerate(zip(self._kinds, self._values)):
+            if kind == TERM:
+                others[term_id] = value
+            else:
+                data += value.encode("utf-8", "surrogatepass")
+            offsets.append(len(data))
+        return bytes(data), offsets, others
+
+    def _unpack(self):
+        if self._packed is None:
+            return
+        data, offsets, others = self._packed
+        self._values, start = [], 0
+        for term_id, end in enumerate(offsets):
+            self._values.append(others[term_id] if term_id in others else data[start:end].decode("utf-8", "surrogatepass"))
+            start = end
+        self._ids = {URI: {}, LITERAL: {}, TERM: {}}
+        for term_id, (kind, value) in enumerate(zip(self._kinds, self._values)):
+            self._ids[kind][value] = term_id
+        self._packed = None
+
+    # only the packed values are pickled (e.g. when returned from a worker process); rdflib terms are slow to pickle
+    def __getstate__(self):
+        return {'packed': self._packed or self._pack(), 'kinds': self._kinds, 'bnode_count': self._bnode_count}
+
+    def __setstate__(self, state):
+        self._packed = state['packed']
+        self._kinds = state['kinds']
+        self._ids = {URI: {}, LITERAL: {}, TERM: {}}
+        self._values = None
+        self._bnode_count = state['bnode_count']
+        self._reset_lookup()
+
+
+class TripleBuffer:
+    """
+    Compact store of generated triples: a TermDictionary and integer coded subject, predicate and object arrays.
+    Each triple takes 12 bytes (fewer once compacted), plus its share of the distinct terms, rather than a tuple of rdflib terms.
+
+    Triples are added as rdflib terms, or ids from the buffer's TermDictionary (e.g. terms.bnode()). Iterating the buffer
+    yields rdflib triples, in the order they were added. Use add_to() to load it into a graph and write() to save it to a file.
+    Call compact() on a complete buffer that is kept, to cut the memory it holds further.
+
+    :param terms: TermDictionary to intern terms in. Defaults to a new one.
+    """
+    def __init__(self, terms: TermDictionary = None):
+        self.terms = terms if terms is not None else TermDictionary()
+        self._s = array('i')
+        self._p = array('i')
+        self._o = array('i')
+        self._compact = False
+
+    def add(self, triple):
+        if self._compact:
+            self._widen()
+        term_id = self.terms.id
+        s, p, o = triple
+        self._s.append(term_id(s))
+        self._p.append(term_id(p))
+        self._o.append(term_id(o))
+
+    def extend(self, triples):
+        if self._compact:
+            self._widen()
+        term_id = self.terms.id
+        s_ids, p_ids, o_ids = self._s.append, self._p.append, self._o.append
+        for s, p, o in triples:
+            s_ids(term_id(s))
+            p_ids(term_id(p))
+            o_ids(term_id(o))
+
+    def merge(self, other: "TripleBuffer"):
+        """
+        Appends the triples of another buffer (e.g. one returned by a worker process), re-coding its terms into this buffer's dictionary.
+        Blank nodes minted by the other buffer's dictionary get new ids here.
+        """
+        if self._compact:
+            self._widen()
+        if other.terms is self.terms:
+            self._s.extend(_widened(other._s))
+            self._p.extend(_widened(other._p))
+            self._o.extend(_widened(other._o))
+            return
+        mapping = self.terms._merge(other.terms)
+        offset = self.terms._bnode_count
+        self.terms._bnode_count += other.terms._bnode_count
+        for ids, other_ids in [(self._s, other._s), (self._p, other._p), (self._o, other._o)]:
+            ids.extend(mapping[i] if i >= 0 else i - offset for i in other_ids)
+
+    def compact(self):
+        """
+        Compacts the buffer's TermDictionary (see TermDictionary.compact) and stores each id array in the smallest integer type
+        holding its ids, e.g. 1 or 2 bytes per predicate. Adding triples afterwards restores 4 byte ids.
+        """
+        self.terms.compact()
+        self._s, self._p, self._o = (_narrowed(ids) for ids in [self._s, self._p, self._o])
+        self._compact = True
+
+    def _widen(self):
+        self._s, self._p, self._o = (_widened(ids) for ids in [self._s, self._p, self._o])
+        self._compact = False
+
+    def __len__(self):
+        return len(self._s)
+
+    def __iter__(self):
+        term = self.terms.lookup().__getitem__
+        return zip(map(term, self._s), map(term, self._p), map(term, self._o))
+
+    def add_to(self, g: rdflib.Graph):
+        """
+        Adds the triples to graph g, in one batch.
+        """
+        add_triples(g, self)
+
+    def write(self, destination, output_format: str = "nt", graph: rdflib.URIRef = None, compress: bool = False) -> int:
+        """
+        Writes the triples to a file or file-like object. See TripleWriter for the parameters.
+
+        Returns: the number of triples written
+        """
+        triples = iter(self)
+        with TripleWriter(destination, output_format, graph=graph, compress=compress) as writer:
+            while True:
+                batch = list(islice(triples, WRITE_BATCH_SIZE))
+                if not batch:
+                    break
+                writer.write(batch)
+        return writer.count
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes used by the id arrays (excluding the term dictionary).
+        """
+        return sum(ids.itemsize * len(ids) for ids in [self._s, self._p, self._o])
+
+    def __repr__(self):
+        return f"<TripleBuffer: {len(self)} triples, {len(self.terms)} terms>"
+
+
+def _narrowed(ids: array) -> array:
+    # the ids in the smallest signed integer type that holds them all
+    if ids:
+        low, high = min(ids), max(ids)
+        for typecode in "bh":
+            limit = 1 << (8 * array(typecode).itemsize - 1)
+            if -limit <= low and high < limit:
+                return array(typecode, ids)
+    return ids
+
+
+def _widened(ids: array) -> array:
+    return ids if ids.typecode == 'i' else array('i', ids)
@@ -1,136 +1,359 @@
 from argparse import ArgumentError
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import hashlib
+import json
+import math
+import pandas as pd
 import rdflib
-from rdflib.collection import Collection
 import logging
 from . import helpers
+from .bulk_store import add_triples
+from .triple_buffer import TermDictionary, TripleBuffer
+from .term_factory import TermFactory, term_factory
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# SwitchTags encodings. See _tag_triples()
+#   list:   a tag collection (rdf:List of key-value nodes) per entity [DEFAULT]
+#   shared: one tag collection per distinct tag set, named by its content and referenced by every entity with those tags
+#   flat:   key-value nodes linked from the entity with meta:hasTag, without an rdf:List
+TAG_MODES = ["list", "shared", "flat"]
+
+# Local name prefix of the tag set nodes in "shared" mode (in the building namespace)
+TAG_SET_PREFIX = "tagset_"
+
 
 # Create rdf triples from input dataframes
-def process_df(df, namespaces:dict, multiIndexHeader:str, relationships_to_process:list, relationship_field:tuple, df_map):
+def process_sheet(df, namespaces: dict, relationships_by_header: dict, relationship_field: tuple, resolver, tagsHeader: str = "SwitchTags", terms: TermDictionary = None, tag_mode: str = "list"):
     '''
+    Generates all triples for one model sheet in a single pass: entity types, the relationships for each multi-index header
+    (e.g. Brick, Switch) and tag collections. Rows are filtered and subjects are minted once for the whole sheet.
+
+    :namespaces: { prefix: rdflib.Namespace }, or a TermFactory to share its URI cache between calls.
+
+    :relationships_by_header: { multiIndexHeader: relationships_to_process }, e.g. { "Brick": BRICK_RELATIONSHIPS, "Switch": SWITCH_RELATIONSHIPS }
     :relationship_field: column that is referenced by the relationships fields. Typically 'identifier', but 'label' is also widely used.
-    '''
-    print(f"Processing {multiIndexHeader} relationships.")
-    triples = []
+    :resolver: ReferenceResolver used to convert referenced values to entity identifiers.
+    :tagsHeader: multi-index header holding the tag columns. None to skip tags.
+    :tag_mode: encoding of the tags, one of TAG_MODES.
+    :terms: optional TermDictionary. If provided, the triples are collected in TripleBuffers interning their terms in it, rather than lists.
 
-    # validate that multi-index header has been provided
-    # validate if input file has SwitchTags
-    headerExists = multiIndexHeader in df.columns
+    Returns: (triples, tag_triples). Tag triples are returned separately so they can be added after inverses are generated.
+    '''
+    if terms is not None:
+        triples, tag_triples = TripleBuffer(terms), TripleBuffer(terms)
+        bnode = terms.bnode
+    else:
+        triples, tag_triples = [], []
+        bnode = rdflib.BNode
+    factory = term_factory(namespaces)
 
-    if not headerExists:
-        print(f"No {multiIndexHeader} columns have been provided")
-        return triples
-    
     # validate input df has a valid identifier column (this is used for entity definition).
-    # Df must have this column
-    # PRIOR METHOD
-    # if helpers.validate_relationships(df['Brick'].columns, [("identifier", "Literal", "")]) == []:
-    #     print("No valid identifier column found. Aborting.")
-    #     return triples
-    # NEW METHOD
     if not helpers.column_exists(df.columns, relationship_field):
         logger.error("No valid identifier column found. Aborting.")
-        return triples
+        return triples, tag_triples
+
+    # validate input df has each header & select the relationships it defines
+    headers = {}
+    for multiIndexHeader, relationships_to_process in relationships_by_header.items():
+        print(f"Processing {multiIndexHeader} relationships.")
+        if multiIndexHeader not in df.columns:
+            print(f"No {multiIndexHeader} columns have been provided")
+            continue
+        headers[multiIndexHeader] = helpers.validate_relationships(df[multiIndexHeader].columns, relationships_to_process)
+
+    # only rows with a class define an entity
+    df = df[df[('Brick', 'class')] != 0]
+    if df.empty:
+        return triples, tag_triples
+    subjects = _subjects(df, factory)
 
-    # validate input df has all relationships
-    relationships = helpers.validate_relationships(df[multiIndexHeader].columns, relationships_to_process)
-
-    # process data for each row
-    for idx, row in df.iterrows():
-
-        # set identifier name & class
-        identifier = helpers.format_fragment(row['Brick']['identifier'])
-        entity_class = helpers.format_fragment(row['Brick']['class'])
-
-        # define entity
-        try:
-            if entity_class == 0:
-                continue
-            elif "switch:" in entity_class:
-                triples.append((namespaces['building'][identifier], rdflib.RDF.type, namespaces['switch'][entity_class.replace("switch:", "")]))
-            else:
-                triples.append((namespaces['building'][identifier], rdflib.RDF.type, namespaces['brick'][entity_class]))
-        except:
-            print(identifier, entity_class, namespaces)
-            raise Exception("DEBUG ->> Error in making triples.")
-
-        # create relationships
+    # define entities. These are only created once, even if multiple headers are processed.
+    if headers:
+        triples.extend(_type_triples(df, subjects, factory))
+
+    # create relationships, one column at a time
+    for multiIndexHeader, relationships in headers.items():
         for relationship in relationships:
-            # prepare data
-        
-            data = row[multiIndexHeader][relationship.name]
-            if data == 0 or data == "" or not data: continue
-            data = [x.strip() for x in data.split("|")]
-
-            # convert to ids using the df_map; remove unknown items. Only for references.
-            if relationship.datatype == "ref":
-                data = [ helpers.lookupValue(df_map, item) for item in data ]
-                data = list(filter(None, data))
-
-
-            if relationship.datatype == "Literal":
-                for item in data:
-                    triples.append( (namespaces['building'][identifier], namespaces[relationship.namespace][relationship.name], rdflib.Literal( item )) )
-            elif relationship.datatype == "brick":
-                for item in data:
-                    if "switch:" in item:
-                        # target is from switch namespace
-                        triples.append((namespaces['building'][identifier], namespaces[relationship.namespace][relationship.name], namespaces["switch"][helpers.format_fragment(item.replace("switch:", ""))]))
-                    else:
-                        # continue as normal
-                        triples.append((namespaces['building'][identifier], namespaces[relationship.namespace][relationship.name], namespaces[relationship.datatype][helpers.format_fragment(item)]))
-            else:
-                for item in data:
-                    triples.append((namespaces['building'][identifier], namespaces[relationship.namespace][relationship.name], namespaces[relationship.datatype][helpers.format_fragment(item)]))
-
-        # create switch:tags if they exist
+            data = df[multiIndexHeader][relationship.name]
+            triples.extend(_relationship_triples(subjects, data.to_numpy(), relationship, factory, resolver))
+
+    # create switch:tags if they exist
+    if tagsHeader is not None:
+        if tagsHeader in df.columns:
+            tag_triples.extend(_tag_triples(subjects, df[tagsHeader], factory, bnode, tag_mode))
+        else:
+            print("No Switch Tags have been provided")
+
+    return triples, tag_triples
+
+
+def process_df(df, namespaces:dict, multiIndexHeader:str, relationships_to_process:list, relationship_field:tuple, resolver):
+    '''
+    Generates the entity and relationship triples for one multi-index header of a sheet. See process_sheet() to process all headers at once.
 
+    :relationship_field: column that is referenced by the relationships fields. Typically 'identifier', but 'label' is also widely used.
+    :resolver: ReferenceResolver used to convert referenced values to entity identifiers.
+    '''
+    triples, _ = process_sheet(df, namespaces, {multiIndexHeader: relationships_to_process}, relationship_field, resolver, tagsHeader=None)
     return triples
 
 
-# this method is separate for debugging purposes for now
-def process_tags(g: rdflib.Graph, df, namespaces: dict, multiIndexHeader: str = "SwitchTags"):
-    # validate if input file has SwitchTags
-    switchTagsExist = "SwitchTags" in df.columns
+def process_sheets(dfs: list, namespaces: dict, relationships_by_header: dict, relationship_field: tuple, resolver, workers: int, tagsHeader: str = "SwitchTags", terms: TermDictionary = None, tag_mode: str = "list") -> list:
+    '''
+    Runs process_sheet() for each sheet concurrently in a pool of worker processes.
+    Sheets are split into row chunks (sized so the largest sheet, typically points, is spread across all workers).
+    The namespaces and resolver are sent to each worker once.
+
+    Chunk results are merged in row order, so the output is deterministic and has the same triples as processing each sheet in turn.
+    References the workers could not resolve are added to resolver.unresolved.
+
+    Returns: [(triples, tag_triples)] as TripleBuffers interning their terms in terms (a new TermDictionary if not provided), one per sheet in dfs.
+    '''
+    chunk_size = max(math.ceil(max(len(df) for df in dfs) / workers), 1)
+    tasks = [(i, df.iloc[start:start + chunk_size]) for i, df in enumerate(dfs) for start in range(0, max(len(df), 1), chunk_size)]
+
+    terms = terms if terms is not None else TermDictionary()
+    results = [(TripleBuffer(terms), TripleBuffer(terms)) for _ in dfs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_sheet_worker, initargs=(namespaces, relationships_by_header, relationship_field, resolver, tagsHeader, tag_mode)) as executor:
+        # map() returns results in task order
+        for (i, _), (triples, tag_triples, unresolved) in zip(tasks, executor.map(_process_sheet_chunk, [chunk for _, chunk in tasks])):
+            results[i][0].merge(triples)
+            results[i][1].merge(tag_triples)
+            resolver.unresolved.update(unresolved)
+    return results
+
+
+# Worker process state for process_sheets(). Set by _init_sheet_worker().
+_sheet_worker = {}
+
+
+def _init_sheet_worker(namespaces, relationships_by_header, relationship_field, resolver, tagsHeader, tag_mode):
+    _sheet_worker.update(
+        # one URI cache for all the chunks processed by the worker
+        namespaces=term_factory(namespaces),
+        relationships_by_header=relationships_by_header,
+        relationship_field=relationship_field,
+        resolver=resolver,
+        tagsHeader=tagsHeader,
+        tag_mode=tag_mode
+    )
+
+
+def _process_sheet_chunk(df):
+    resolver = _sheet_worker['resolver']
+    # only report the references missed by this chunk
+    resolver.unresolved = Counter()
+    # TripleBuffers are cheap to send back (see TermDictionary), rdflib terms are not
+    triples, tag_triples = process_sheet(df, _sheet_worker['namespaces'], _sheet_worker['relationships_by_header'], _sheet_worker['relationship_field'], resolver, _sheet_worker['tagsHeader'], terms=TermDictionary(), tag_mode=_sheet_worker['tag_mode'])
+    return triples, tag_triples, resolver.unresolved
 
-    if not switchTagsExist:
-        print("No Switch Tags have been provided")
-        return
 
-    # iterate rows and create tags on entities
-    for idx, row in df.iterrows():
-        # validate that row is valid
-        identifier = helpers.format_fragment(row['Brick']['identifier'])
-        entity_class = helpers.format_fragment(row['Brick']['class'])
-        if entity_class == 0: continue
+def _subjects(df, factory: TermFactory) -> list:
+    return _to_terms(df[('Brick', 'identifier')], factory.entity)
 
-        # get tags
-        switchTags = row[multiIndexHeader]
 
-        # generate holding container and list of entities (nodes)
-        tag_list = rdflib.BNode()
-        nodes = []
+def _type_triples(df, subjects: list, factory: TermFactory):
+    try:
+        classes = _to_terms(df[('Brick', 'class')], factory.entity_class)
+    except:
+        print(factory.namespaces)
+        raise Exception("DEBUG ->> Error in making triples.")
+    return zip(subjects, repeat(rdflib.RDF.type), classes)
 
-        for tagGroup, tagValue in switchTags.items():
-            # validate input exists
-            if tagGroup == 0 or tagGroup == "" or not tagGroup: continue
-            if tagValue == 0 or tagValue == "" or not tagValue: continue
 
-            # split tagValue if multiple are provided
-            tagValues = [x.strip() for x in tagValue.split("|")]
+def _to_terms(column: pd.Series, make_term) -> list:
+    """
+    Maps a column of values to rdflib terms. Each unique value (e.g. a class, or an equipment referenced by many points) is only converted once.
+    """
+    terms = {value: make_term(value) for value in column.unique()}
+    return [terms[value] for value in column]
 
-            # generate individual k-v pairs
-            for tag in tagValues:
-                tagDef = rdflib.BNode()  # generate BNode per tag pair
-                nodes.append(tagDef)  # record this node in a list that will be used to generate collection
-                g.add((tagDef, namespaces["meta"]["key"], rdflib.Literal(tagGroup)))
-                g.add((tagDef, namespaces["meta"]["value"], rdflib.Literal(tag)))
 
-        # add to RDF collection and insert into model
-        Collection(g, tag_list, nodes)
-        g.add((namespaces['building'][identifier], namespaces['switch']['hasTagCollection'], tag_list))
+def _relationship_triples(subjects: list, data, relationship, factory: TermFactory, resolver):
+    """
+    Generates the triples for one relationship column. data is the column values, aligned with subjects.
+    """
+    items = helpers.split_cells(pd.DataFrame({'subject': subjects, 'data': data}), 'data')
+    if items.empty:
+        return []
 
+    # convert to ids using the resolver; remove unknown items. Only for references.
+    if relationship.datatype == "ref":
+        items['data'] = resolver.resolve_column(items['data'])
+        items = items[items['data'].astype(bool)]
+
+    predicate = factory.predicate(relationship)
+    if relationship.datatype == "Literal":
+        objects = [rdflib.Literal(item) for item in items['data']]
+    elif relationship.datatype == "brick":
+        # target may be from the switch namespace
+        objects = _to_terms(items['data'], factory.entity_class)
+    else:
+        objects = _to_terms(items['data'], lambda item: factory.uri(relationship.datatype, item))
+
+    return list(zip(items['subject'], repeat(predicate), objects))
+
+
+def _tag_triples(subjects: list, switchTags: pd.DataFrame, factory: TermFactory, bnode=rdflib.BNode, tag_mode: str = "list"):
+    """
+    Generates the tags of every entity, in one of the TAG_MODES. switchTags is the tag columns, aligned with subjects.
+    The nodes of a tag are generated before the triple linking them from the entity (see sparql_upload.batch_triples).
+
+    :bnode: blank node factory, e.g. TermDictionary.bnode to mint ids rather than rdflib BNodes.
+    """
+    # collect k-v pairs from every tag column, then order them by row (and column within row)
+    frames = []
+    for tagGroup, tagValues in switchTags.items():
+        # validate input exists
+        if tagGroup == 0 or tagGroup == "" or not tagGroup: continue
+        items = helpers.split_cells(pd.DataFrame({'row': range(len(subjects)), 'value': tagValues.to_numpy()}), 'value')
+        if not items.empty:
+            frames.append(items.assign(key=tagGroup))
+    tags = [[] for _ in subjects]
+    if frames:
+        items = pd.concat(frames, ignore_index=True).sort_values('row', kind='stable')
+        for row, key, value in zip(items['row'], items['key'], items['value']):
+            tags[row].append((key, value))
+
+    # tag keys and values repeat across entities; create each literal once
+    literals = {}
+    def literal(value):
+        return literals.get(value) or literals.setdefault(value, rdflib.Literal(value))
+
+    hasTagCollection = factory.term('switch', 'hasTagCollection')
+    if tag_mode == "list":
+        # a tag collection (rdf:List of key-value BNodes) per entity. Entities without tags get an empty collection.
+        for subject, pairs in zip(subjects, tags):
+            tag_list = bnode()
+            yield from _tag_collection(tag_list, pairs, factory, literal, lambda kind, i: bnode())
+            yield subject, hasTagCollection, tag_list
+
+    elif tag_mode == "shared":
+        # one collection per distinct tag set, with nodes named by a hash of the set. Entities with the same tags reference the same collection,
+        # and generating a set again (e.g. in another sheet or chunk) produces the same triples.
+        tag_sets = {}
+        for subject, pairs in zip(subjects, tags):
+            pairs = tuple(pairs)
+            tag_set = tag_sets.get(pairs)
+            if tag_set is None:
+                name = f"{TAG_SET_PREFIX}{hashlib.sha256(json.dumps(pairs).encode()).hexdigest()[:16]}"
+                tag_set = tag_sets[pairs] = factory.term('building', name)
+                yield from _tag_collection(tag_set, pairs, factory, literal, lambda kind, i: factory.term('building', f"{name}_{kind}{i}"))
+            yield subject, hasTagCollection, tag_set
+
+    elif tag_mode == "flat":
+        # a key-value BNode per tag, linked straight from the entity
+        hasTag, key_predicate, value_predicate = factory.term("meta", "hasTag"), factory.term("meta", "key"), factory.term("meta", "value")
+        for subject, pairs in zip(subjects, tags):
+            for key, value in pairs:
+                tagDef = bnode()
+                yield tagDef, key_predicate, literal(key)
+                yield tagDef, value_predicate, literal(value)
+                yield subject, hasTag, tagDef
+
+    else:
+        raise ValueError(f"Tag mode: {tag_mode} is not supported. Options are: {TAG_MODES}")
+
+
+def _tag_collection(tag_list, pairs: list, factory: TermFactory, literal, new_node):
+    """
+    Generates an rdf:List of key-value nodes headed by tag_list, as rdflib.collection.Collection would.
+    new_node(kind, i) returns the node for the i'th tag ("tag") or list cell ("cell").
+    """
+    key_predicate, value_predicate = factory.term("meta", "key"), factory.term("meta", "value")
+    node = tag_list
+    for i, (key, value) in enumerate(pairs):
+        tagDef = new_node("tag", i)  # generate node per tag pair
+        yield tagDef, key_predicate, literal(key)
+        yield tagDef, value_predicate, literal(value)
+        # link into the RDF collection
+        if i > 0:
+            rest = new_node("cell", i)
+            yield node, rdflib.RDF.rest, rest
+            node = rest
+        yield node, rdflib.RDF.first, tagDef
+    yield node, rdflib.RDF.rest, rdflib.RDF.nil
+
+
+def tag_collection_triples(g: rdflib.Graph, subject, namespaces: dict, tag_mode: str = "list") -> list:
+    """
+    Returns the triples of an entity's tags in g, as generated by process_sheet() in tag_mode. For "list", the hasTagCollection link,
+    the rdf:List cells and the key-value BNodes. For "shared", only the hasTagCollection link, as the tag set may be used by other entities
+    (see tag_set_triples()). For "flat", the hasTag links and the key-value BNodes.
+    """
+    if tag_mode == "flat":
+        hasTag = namespaces['meta']['hasTag']
+        triples = []
+        for tagDef in g.objects(subject, hasTag):
+            triples.append((subject, hasTag, tagDef))
+            triples.extend(g.triples((tagDef, None, None)))
+        return triples
+
+    hasTagCollection = namespaces['switch']['hasTagCollection']
+    triples = []
+    for tag_list in g.objects(subject, hasTagCollection):
+        triples.append((subject, hasTagCollection, tag_list))
+        if tag_mode != "shared":
+            triples.extend(tag_set_triples(g, tag_list))
+    return triples
+
+
+def tag_set_triples(g: rdflib.Graph, tag_list) -> list:
+    """
+    Returns the triples of a tag collection in g: the rdf:List cells and the key-value nodes.
+    """
+    triples = []
+    node = tag_list
+    while node is not None and node != rdflib.RDF.nil:
+        for tagDef in g.objects(node, rdflib.RDF.first):
+            triples.extend(g.triples((tagDef, None, None)))
+            triples.append((node, rdflib.RDF.first, tagDef))
+        rest = g.value(node, rdflib.RDF.rest)
+        if rest is not None:
+            triples.append((node, rdflib.RDF.rest, rest))
+        node = rest
+    return triples
+
+
+def inverse_relationships(g: rdflib.Graph) -> dict:
+    """
+    Returns the inverse property table from the owl:inverseOf statements in g (i.e. the loaded ontologies),
+    as { property: [inverse properties] }. Only the direction that is declared is included.
+    """
+    inverses = {}
+    for prop, invprop in g.subject_objects(rdflib.OWL.inverseOf):
+        if invprop not in inverses.setdefault(prop, []):
+            inverses[prop].append(invprop)
+    return inverses
+
+
+def generate_inverses(triples, inverses: dict) -> list:
+    """
+    Returns the inverse triples for the given triples. Equivalent to sparql_queries.generate_inverse_relationships_for_graph().
+    """
+    return [(o, invprop, s) for s, p, o in triples if p in inverses for invprop in inverses[p]]
+
+
+def generate_graph_inverses(g: rdflib.Graph, inverses: dict) -> list:
+    """
+    Returns the inverse triples for every triple in g. Equivalent to sparql_queries.generate_inverse_relationships().
+    Only the triples using a property from the table are visited.
+    """
+    return [(o, invprop, s) for prop, invprops in inverses.items() for s, o in g.subject_objects(prop) for invprop in invprops]
+
+
+def process_tags(g: rdflib.Graph, df, namespaces: dict, multiIndexHeader: str = "SwitchTags", tag_mode: str = "list"):
+    # validate if input file has SwitchTags
+    switchTagsExist = multiIndexHeader in df.columns
+
+    if not switchTagsExist:
+        print("No Switch Tags have been provided")
+        return
 
+    df = df[df[('Brick', 'class')] != 0]
+    factory = term_factory(namespaces)
+    add_triples(g, _tag_triples(_subjects(df, factory), df[multiIndexHeader], factory, tag_mode=tag_mode))
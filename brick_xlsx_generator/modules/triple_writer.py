@@ -0,0 +1,113 @@
+import rdflib
+import gzip
+import io
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Supported output formats (rdflib format names)
+OUTPUT_FORMATS = ["nt", "nquads"]
+
+# Characters escaped in N-Triples string literals
+_LITERAL_ESCAPES = str.maketrans({"\\": "\\\\", "\n": "\\n", '"': '\\"', "\r": "\\r"})
+
+
+class TripleWriter:
+    """
+    Writes triples straight to a file or file-like object as N-Triples, or as N-Quads in a named graph.
+    Lines are written as triples are produced, so the model is never held in memory.
+
+    Triples are not de-duplicated (e.g. a relationship defined on both entities will be written twice).
+    This is harmless, as a store loading the file treats the triples as a set.
+
+    :param destination: file path (str or os.PathLike), or a binary/text file-like object
+    :param output_format: "nt" or "nquads"
+    :param graph: graph identifier written with each quad. Required for "nquads".
+    :param compress: gzip the output. Also enabled by a destination path ending in ".gz".
+    """
+    def __init__(self, destination, output_format: str = "nt", graph: rdflib.URIRef = None, compress: bool = False):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Output format: {output_format} is not supported. Options are: {OUTPUT_FORMATS}")
+        if output_format == "nquads" and graph is None:
+            raise ValueError("A graph identifier is required for nquads output.")
+        self.output_format = output_format
+        self.graph = graph
+        self.count = 0
+
+        # files we open are also closed by close(); caller provided streams are only flushed
+        self._owned = []
+        if isinstance(destination, (str, os.PathLike)):
+            destination = os.fspath(destination)
+            if compress or destination.endswith(".gz"):
+                stream = gzip.open(destination, "wb")
+            else:
+                stream = open(destination, "wb")
+            self._owned.append(stream)
+        elif compress:
+            stream = gzip.GzipFile(fileobj=_binary(destination), mode="wb")
+            self._owned.append(stream)
+        else:
+            stream = destination
+        self._text = isinstance(stream, io.TextIOBase)
+        self._stream = stream
+
+    def write(self, triples):
+        if self.output_format == "nquads":
+            rows = [nq_row(triple, self.graph) for triple in triples]
+        else:
+            rows = [nt_row(triple) for triple in triples]
+        lines = "".join(rows)
+        self._stream.write(lines if self._text else lines.encode())
+        self.count += len(rows)
+
+    def close(self):
+        for stream in self._owned:
+            stream.close()
+        if not self._owned:
+            self._stream.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def nt_term(term) -> str:
+    """
+    Returns a term as written in N-Triples. URIs and blank nodes use Node.n3(); literals are quoted and escaped here,
+    as Literal.n3() writes Turtle (e.g. long strings in triple quotes).
+    """
+    if isinstance(term, rdflib.Literal):
+        quoted = f'"{str(term).translate(_LITERAL_ESCAPES)}"'
+        if term.language:
+            return f"{quoted}@{term.language}"
+        if term.datatype:
+            return f"{quoted}^^<{term.datatype}>"
+        return quoted
+    return term.n3()
+
+
+def nt_row(triple) -> str:
+    """
+    Returns a triple as an N-Triples line.
+    """
+    s, p, o = triple
+    return f"{s.n3()} {p.n3()} {nt_term(o)} .\n"
+
+
+def nq_row(triple, graph) -> str:
+    """
+    Returns a triple as an N-Quads line in graph (a graph identifier).
+    """
+    s, p, o = triple
+    return f"{s.n3()} {p.n3()} {nt_term(o)} {graph.n3()} .\n"
+
+
+def _binary(stream):
+    # gzip output must be written to a binary stream
+    if isinstance(stream, io.TextIOBase):
+        raise ValueError("Compressed output requires a binary file-like object.")
+    return stream
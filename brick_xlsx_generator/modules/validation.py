@@ -0,0 +1,247 @@
+from typing import TypedDict
+import logging
+import time
+import numpy as np
+import pandas as pd
+import rdflib
+from . import helpers
+from .class_index import ClassIndex, BRICK
+from .term_factory import term_factory
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Checks run by validate_sheet(), in report order, with the summary logged for each
+CHECKS = {
+    'unknown_class': "Brick.class values are not classes of the loaded Brick ontology",
+    'unknown_switch_class': "Brick.class 'switch:' values are not classes of the loaded Switch ontology",
+    'invalid_substance': "substance values are not a brick:Substance",
+    'unknown_property': "relationship values use a property the loaded ontologies do not define",
+    'unresolved_reference': "references do not match any entity"
+}
+
+# Column that defines an entity. Rows without a class are skipped.
+CLASS_COLUMN = ('Brick', 'class')
+
+# Relationships whose values must be a brick:Substance (or one of its subclasses)
+SUBSTANCE_RELATIONSHIPS = ["hasInputSubstance", "hasOutputSubstance"]
+
+# Namespaces of the relationships whose property is checked against the ontologies (rdfs:label etc. are not defined by them)
+PROPERTY_NAMESPACES = ["brick", "switch"]
+
+# rdf:type values that declare a property
+PROPERTY_TYPES = [rdflib.RDF.Property, rdflib.OWL.ObjectProperty, rdflib.OWL.DatatypeProperty, rdflib.OWL.AnnotationProperty]
+
+# Worksheet row number of the first row of data, below the two header rows.
+# Blank rows are dropped when a sheet is read, so the rows below one are numbered as if it was not there.
+FIRST_ROW = 3
+
+# Max number of example values to include in summary log lines
+_SUMMARY_EXAMPLES = 10
+
+
+class ValidationIssue(TypedDict):
+    check: str      # one of CHECKS
+    sheet: str
+    column: str     # e.g. "Brick.class"
+    value: str      # the invalid value (an item of a multi-value cell, or the property name for unknown_property)
+    count: int      # number of times the value is used
+    rows: list      # worksheet row numbers the value is used in
+
+
+class OntologyTerms:
+    """
+    Hash sets of the class, substance and property URIs defined by the loaded ontologies, to validate model sheets against.
+
+    Classes are those declared as owl:Class or in an rdfs:subClassOf edge, so an ontology subset (see ontology_cache.subset_ontology) is enough.
+    Properties are those declared with one of PROPERTY_TYPES, plus the owl:inverseOf pairs. If g declares no properties (e.g. it only holds
+    ontology subsets) properties is None and they are not checked.
+
+    :param g: graph holding the ontologies, e.g. a Dataset
+    """
+    def __init__(self, g: rdflib.Graph, brick_namespace: rdflib.Namespace = BRICK):
+        classes = set(g.subjects(rdflib.RDF.type, rdflib.OWL.Class))
+        for subclass, superclass in g.subject_objects(rdflib.RDFS.subClassOf):
+            classes.add(subclass)
+            classes.add(superclass)
+        self.classes = {entity_class for entity_class in classes if isinstance(entity_class, rdflib.URIRef)}
+
+        substances = ClassIndex(g, brick_namespace, roots=["Substance"])
+        self.substances = {entity_class for entity_class in self.classes if entity_class in substances}
+
+        properties = {prop for property_type in PROPERTY_TYPES for prop in g.subjects(rdflib.RDF.type, property_type)}
+        if properties:
+            for prop, invprop in g.subject_objects(rdflib.OWL.inverseOf):
+                properties.add(prop)
+                properties.add(invprop)
+        self.properties = properties or None
+        logger.info(f"Ontology terms indexed: {len(self.classes)} classes, {len(self.substances)} substances, {len(properties)} properties.")
+
+
+class ValidationReport:
+    """
+    Structured report of the problems found in model sheets before any triples are generated.
+    There is one ValidationIssue per check, sheet, column and value, with the worksheet rows the value is used in.
+    Issues found in several chunks of a sheet (i.e. when streaming) are merged.
+    """
+    def __init__(self):
+        self.issues = []
+        # rows checked
+        self.rows = 0
+        self.seconds = 0.0
+        # checks that could not be run, e.g. unknown_property against ontology subsets
+        self.skipped_checks = []
+        self._issues = {}
+
+    @property
+    def valid(self) -> bool:
+        return not self.issues
+
+    def counts(self) -> dict:
+        """
+        Returns the number of invalid values (cells, or items of multi-value cells) found by each check.
+        """
+        counts = {}
+        for issue in self.issues:
+            counts[issue['check']] = counts.get(issue['check'], 0) + issue['count']
+        return counts
+
+    def add(self, check: str, sheet: str, column: str, values, rows):
+        """
+        Adds the invalid values found by a check in a column, one issue per distinct value. values and rows are aligned.
+        """
+        if len(values) == 0:
+            return
+        grouped = pd.Series(np.asarray(rows)).groupby(np.asarray(values, dtype=object), sort=False).agg(list)
+        for value, value_rows in grouped.items():
+            key = (check, sheet, column, value)
+            issue = self._issues.get(key)
+            if issue is None:
+                issue = self._issues[key] = ValidationIssue(check=check, sheet=sheet, column=column, value=value, count=0, rows=[])
+                self.issues.append(issue)
+            issue['count'] += len(value_rows)
+            issue['rows'].extend(value_rows)
+
+    def skip(self, check: str):
+        if check not in self.skipped_checks:
+            self.skipped_checks.append(check)
+
+    def log_summary(self):
+        """
+        Logs one summary line per check that found issues.
+        """
+        counts = self.counts()
+        for check, message in CHECKS.items():
+            if check not in counts: continue
+            issues = sorted((issue for issue in self.issues if issue['check'] == check), key=lambda issue: -issue['count'])
+            examples = ", ".join(f"{issue['value']} ({issue['sheet']} {issue['column']})" for issue in issues[:_SUMMARY_EXAMPLES])
+            logger.warning(f"{counts[check]} {message} ({len(issues)} unique). e.g. {examples}")
+        if self.skipped_checks:
+            logger.info(f"Checks skipped: {', '.join(self.skipped_checks)}")
+        if self.valid:
+            logger.info(f"Validation passed: {self.rows} rows checked in {self.seconds:.3f}s.")
+
+    def as_dict(self) -> dict:
+        return {
+            'valid': self.valid,
+            'rows': self.rows,
+            'seconds': self.seconds,
+            'counts': self.counts(),
+            'skipped_checks': self.skipped_checks,
+            'issues': [dict(issue) for issue in self.issues]
+        }
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Returns the issues as a DataFrame, one row per issue.
+        """
+        return pd.DataFrame(self.issues, columns=list(ValidationIssue.__annotations__))
+
+    def __len__(self):
+        return len(self.issues)
+
+    def __iter__(self):
+        return iter(self.issues)
+
+    def __repr__(self):
+        return f"<ValidationReport: {self.rows} rows, {len(self.issues)} issues, {sum(self.counts().values())} invalid values>"
+
+
+def validate_sheets(dfs: list, ontology: OntologyTerms, namespaces: dict, relationships_by_header: dict, resolver) -> ValidationReport:
+    """
+    Validates model sheets (e.g. as loaded by helpers.import_model_template_file) before triples are generated. See validate_sheet().
+    Sheets are named by their df.name.
+    """
+    report = ValidationReport()
+    for df in dfs:
+        validate_sheet(report, df, df.name, ontology, namespaces, relationships_by_header, resolver)
+    return report
+
+
+def validate_sheet(report: ValidationReport, df, sheet_name: str, ontology: OntologyTerms, namespaces: dict, relationships_by_header: dict, resolver, first_row: int = FIRST_ROW):
+    """
+    Checks one model sheet, or a chunk of one starting at worksheet row first_row, and adds the issues found to report.
+    Each check is a membership test of a whole column against one of the ontology's hash sets (or the resolver's keys);
+    each distinct value is only converted to a URI once.
+
+    :namespaces: { prefix: rdflib.Namespace }, or a TermFactory
+    :relationships_by_header: { multiIndexHeader: relationships_to_process }, e.g. SHEET_RELATIONSHIPS
+    :resolver: ReferenceResolver holding the keys 'ref' relationships can refer to. Values that do not resolve are not counted as unresolved on it.
+    """
+    start = time.perf_counter()
+    factory = term_factory(namespaces)
+    report.rows += len(df)
+
+    def class_uri(value):
+        # as generated (see TermFactory.entity_class). None if the namespace is not loaded.
+        try:
+            return factory.entity_class(value)
+        except KeyError:
+            return None
+
+    # only rows with a class define an entity
+    entities = (df[CLASS_COLUMN] != 0).to_numpy()
+    rows = np.arange(first_row, first_row + len(df))[entities]
+    df = df[entities]
+    if df.empty:
+        report.seconds += time.perf_counter() - start
+        return report
+
+    classes = df[CLASS_COLUMN].astype(str)
+    known = _map_unique(classes, class_uri).isin(ontology.classes).to_numpy()
+    switch = classes.str.contains("switch:", regex=False).to_numpy()
+    report.add('unknown_class', sheet_name, "Brick.class", classes[~known & ~switch], rows[~known & ~switch])
+    report.add('unknown_switch_class', sheet_name, "Brick.class", classes[~known & switch], rows[~known & switch])
+
+    for multiIndexHeader, relationships in relationships_by_header.items():
+        if multiIndexHeader not in df.columns: continue
+        headers = df[multiIndexHeader].columns
+        for relationship in relationships:
+            if relationship.name not in headers: continue
+            column = f"{multiIndexHeader}.{relationship.name}"
+            items = helpers.split_cells(pd.DataFrame({'row': rows, 'value': df[multiIndexHeader][relationship.name].to_numpy()}), 'value')
+            if items.empty: continue
+
+            if relationship.namespace in PROPERTY_NAMESPACES:
+                if ontology.properties is None:
+                    report.skip('unknown_property')
+                elif relationship.namespace not in factory or factory.predicate(relationship) not in ontology.properties:
+                    report.add('unknown_property', sheet_name, column, [relationship.name] * len(items), items['row'])
+
+            if relationship.datatype == "ref":
+                resolved = resolver.contains_column(items['value']).to_numpy()
+                report.add('unresolved_reference', sheet_name, column, items['value'][~resolved], items['row'][~resolved])
+            elif relationship.name in SUBSTANCE_RELATIONSHIPS:
+                substance = _map_unique(items['value'], class_uri).isin(ontology.substances).to_numpy()
+                report.add('invalid_substance', sheet_name, column, items['value'][~substance], items['row'][~substance])
+
+    report.seconds += time.perf_counter() - start
+    return report
+
+
+def _map_unique(column: pd.Series, convert) -> pd.Series:
+    """
+    Maps a column through convert, calling it once per distinct value.
+    """
+    converted = {value: convert(value) for value in column.unique()}
+    return column.map(converted)
@@ -0,0 +1,136 @@
+import openpyxl
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Model sheets, in processing order
+SHEET_NAMES = ["locations", "equipment", "points"]
+
+# Default number of rows per chunk yielded by WorkbookReader.iter_chunks()
+DEFAULT_CHUNK_SIZE = 10000
+
+# Cell values read as null by pandas.read_excel (and so cleared by helpers.import_model_template_file):
+# the default na_values documented for pandas 1.x, which pyproject.toml requires. pandas 2.0 adds 'None'.
+NA_VALUES = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'n/a', 'nan', 'null'
+})
+
+
+def clean_value(value):
+    """
+    Converts a raw cell value to the value helpers.import_model_template_file produces for it:
+    nulls become 0, everything else becomes a string with non-breaking spaces replaced.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, float) and value == int(value):
+        value = int(value)
+    value = str(value)
+    if value in NA_VALUES:
+        return 0
+    return value.replace(u'\xa0', u' ')
+
+
+class WorkbookReader:
+    """
+    Streaming loader for model template files, built on openpyxl's read-only mode.
+    An alternative to helpers.import_model_template_file that never holds a whole sheet in memory.
+
+    The two header rows of each sheet are parsed once. Rows are then read lazily, either one at a time (iter_rows)
+    or as small DataFrames shaped like the ones import_model_template_file returns (iter_chunks).
+    Peak memory depends on the chunk size rather than the size of the workbook.
+    """
+    def __init__(self, path_to_xlsx: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.path = path_to_xlsx
+        self.chunk_size = chunk_size
+        self._workbook = openpyxl.load_workbook(path_to_xlsx, read_only=True, data_only=True)
+        self._headers = {}
+
+    def close(self):
+        self._workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _sheet(self, sheet_name: str):
+        sheet = self._workbook[sheet_name]
+        # some writers record incorrect sheet dimensions, which read-only mode relies on
+        sheet.reset_dimensions()
+        return sheet
+
+    def headers(self, sheet_name: str) -> pd.MultiIndex:
+        """
+        Returns the two-level column header of a sheet, e.g. ('Brick', 'identifier').
+        As with pandas, the top level is forward filled (for merged cells) and blank names become 'Unnamed: {i}_level_{j}'.
+        """
+        if sheet_name not in self._headers:
+            rows = self._sheet(sheet_name).iter_rows(min_row=1, max_row=2, values_only=True)
+            top, sub = [list(row) for row in rows]
+            # trim trailing empty header cells
+            width = max([i + 1 for i, (a, b) in enumerate(zip(top, sub)) if a is not None or b is not None], default=0)
+            columns = []
+            current_top = None
+            for i in range(width):
+                if top[i] is not None:
+                    current_top = str(top[i])
+                columns.append((
+                    current_top if current_top is not None else f"Unnamed: {i}_level_0",
+                    str(sub[i]) if sub[i] is not None else f"Unnamed: {i}_level_1"
+                ))
+            self._headers[sheet_name] = pd.MultiIndex.from_tuples(_dedup(columns))
+        return self._headers[sheet_name]
+
+    def iter_rows(self, sheet_name: str):
+        """
+        Lazily yields the cleaned values of each data row in a sheet, as a tuple aligned with headers(sheet_name).
+        Fully empty rows are skipped.
+        """
+        width = len(self.headers(sheet_name))
+        for row in self._sheet(sheet_name).iter_rows(min_row=3, values_only=True):
+            values = tuple(clean_value(value) for value in row[:width])
+            if not any(values): continue
+            # pad short rows
+            yield values + (0,) * (width - len(values))
+
+    def iter_chunks(self, sheet_name: str, columns: list = None):
+        """
+        Lazily yields a sheet as DataFrames of up to chunk_size rows, with the same columns and cleaning as helpers.import_model_template_file.
+
+        :param columns: optional list of columns to keep, e.g. [('Brick', 'identifier')]
+        """
+        headers = self.headers(sheet_name)
+        positions = [headers.get_loc(column) for column in columns] if columns else None
+        frame_columns = pd.MultiIndex.from_tuples(columns) if columns else headers
+
+        chunk = []
+        for values in self.iter_rows(sheet_name):
+            chunk.append([values[i] for i in positions] if positions else values)
+            if len(chunk) >= self.chunk_size:
+                yield _frame(chunk, frame_columns, sheet_name)
+                chunk = []
+        if chunk:
+            yield _frame(chunk, frame_columns, sheet_name)
+
+
+def _frame(rows, columns, sheet_name):
+    df = pd.DataFrame(rows, columns=columns, dtype=object)
+    # Name the dataframes (for use later)
+    df.name = sheet_name
+    return df
+
+
+def _dedup(columns):
+    # duplicate column names are numbered, as pandas does
+    seen = {}
+    deduped = []
+    for top, sub in columns:
+        count = seen.get((top, sub), 0)
+        seen[(top, sub)] = count + 1
+        deduped.append((top, f"{sub}.{count}") if count else (top, sub))
+    return deduped
@@ -32,3 +32,9 @@ BRICK_RELATIONSHIPS = [
     Rel("hasSubMeter", "ref", "brick"),     # V1.3
     Rel("isSubMeterOf", "ref", "brick")     # V1.3
 ]
+
+# Relationships to process for each multi-index header of a model sheet
+SHEET_RELATIONSHIPS = {
+    "Brick": BRICK_RELATIONSHIPS,
+    "Switch": SWITCH_RELATIONSHIPS
+}
@@ -0,0 +1,133 @@
+import logging
+import os.path
+import sys
+
+import rdflib
+
+from .relationships import SHEET_RELATIONSHIPS
+from .modules import helpers, triple_generator as tg, ontology_store
+from .modules.bulk_store import BulkMemory
+from .modules.building_context import BuildingContext, BUILDING_PREFIX
+from .modules.process_report import ProcessReport
+from .modules.reference_resolver import ReferenceResolver
+from .modules.term_factory import TermFactory
+from .modules.validation import OntologyTerms, ValidationReport, validate_sheet, FIRST_ROW
+from .modules.workbook_reader import WorkbookReader, SHEET_NAMES, DEFAULT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def iter_triples(
+        path_to_xlsx: str,
+        portfolio_name: str = "example",
+        building_name: str = "example_building",
+        relationship_field: tuple = ("Brick", "identifier"),
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        tag_mode: str = "list",
+        load_brick: bool = True,
+        load_switch: bool = True,
+        brick_version: str = "1.2",
+        switch_version: str = "1.1.5",
+        path_to_local_brick: str = None,
+        path_to_local_switch: str = None,
+        use_ontology_cache: bool = True
+    ):
+    """
+    Yields the building model's triples as they are generated, without building a Dataset: entities, relationships,
+    inverse relationships and tags. The workbook is read chunk_size rows at a time (as in Dataset.process(streaming=True)),
+    and each chunk's triples are yielded before the next chunk is read.
+
+    The ontologies are not loaded. The prefixes and inverse property table are read from the ontology subsets
+    (see ontology_cache.subset_ontology) and the subsets are released before the first triple is yielded.
+    Memory is bounded by the chunk size and the reference lookup table (two columns of the equipment & locations sheets).
+
+    Triples are not de-duplicated (e.g. a relationship defined on both entities is yielded twice, see TripleWriter).
+    Loaded into a graph, they give the same model as Dataset.process() with native inverses.
+
+    :param tag_mode: encoding of the SwitchTags, one of triple_generator.TAG_MODES. See Dataset.process().
+    :param load_brick, load_switch, brick_version, switch_version, path_to_local_brick, path_to_local_switch, use_ontology_cache: as for Dataset().
+
+    Yields: (subject, predicate, object) triples of rdflib terms
+    """
+    if not os.path.isfile(path_to_xlsx):
+        logger.error(f"File not found at specified path: {path_to_xlsx}")
+        sys.exit('Error: Input file not found')
+    if tag_mode not in tg.TAG_MODES:
+        raise ValueError(f"Tag mode: {tag_mode} is not supported. Options are: {tg.TAG_MODES}")
+
+    # prefixes and inverse property table, from the ontology subsets (which are not kept)
+    subsets = rdflib.Dataset(store=BulkMemory(), default_union=True)
+    ontology_store.load_ontologies(subsets, load_brick, load_switch, brick_version, switch_version, path_to_local_brick, path_to_local_switch,
+                                   use_cache=use_ontology_cache, subset=True)
+    namespaces = {name: rdflib.Namespace(URI) for name, URI in subsets.namespaces()}
+    inverses = tg.inverse_relationships(subsets)
+    del subsets
+
+    context = BuildingContext(BUILDING_PREFIX, portfolio_name, building_name, namespaces, TermFactory(namespaces))
+    with WorkbookReader(path_to_xlsx, chunk_size) as reader:
+        for triples in stream_model(reader, context, relationship_field, inverses, ProcessReport("iter_triples"), tag_mode):
+            yield from triples
+
+
+def stream_model(reader: WorkbookReader, context: BuildingContext, relationship_field: tuple, inverses: dict, report: ProcessReport,
+                 tag_mode: str = "list", ontology_terms: OntologyTerms = None):
+    """
+    Generates a building model from a workbook one chunk of rows at a time, as used by Dataset.process(streaming=True)
+    and iter_triples(). Each chunk's triples (entities and relationships, their inverses, then tags) are yielded as a list
+    before the next chunk is read, so the caller decides where they go (e.g. a graph, a TripleWriter or a generator).
+
+    :param inverses: owl:inverseOf table (see triple_generator.inverse_relationships). None to generate no inverses.
+    :param report: ProcessReport the build_df_map, validate, process_{sheet} and resolve_references stages are recorded in.
+        A process_{sheet} stage includes the caller's handling of the sheet's triples.
+    :param ontology_terms: if given, the sheets are validated against them before any triples are generated (see validation.py),
+        and the ValidationReport is set as report.validation.
+    """
+    # validate relationship column exists
+    logger.info(f"Relationships defined by referencing column: {relationship_field}. Validating column exists on all sheets...")
+    for sheet_name in SHEET_NAMES:
+        if not helpers.column_exists(reader.headers(sheet_name), relationship_field):
+            logger.error(f"Model input sheet: {sheet_name} does not have column: {relationship_field} defined. Aborting.")
+            sys.exit("Error: valid reference column not found.")
+        else:
+            logger.info(f"OK. {sheet_name} reference column found.")
+
+    # the lookup table only needs two columns of the equipment & locations sheets
+    logger.info(f"Generating {relationship_field}<>identifier entity lookup table... ")
+    with report.stage("build_df_map") as stage:
+        resolver = ReferenceResolver()
+        columns = list(dict.fromkeys([("Brick", "identifier"), relationship_field]))
+        for sheet_name in ["equipment", "locations"]:
+            for chunk in reader.iter_chunks(sheet_name, columns=columns):
+                resolver.add(chunk[("Brick", "identifier")], chunk[relationship_field])
+                stage['rows'] += len(chunk)
+    logger.info("Successfully generated.")
+
+    if ontology_terms is not None:
+        # the sheets are read an extra time, so issues are reported before any triples are generated
+        logger.info("Validating workbook...")
+        with report.stage("validate") as stage:
+            report.validation = ValidationReport()
+            for sheet_name in SHEET_NAMES:
+                first_row = FIRST_ROW
+                for chunk in reader.iter_chunks(sheet_name):
+                    validate_sheet(report.validation, chunk, sheet_name, ontology_terms, context.term_factory, SHEET_RELATIONSHIPS, resolver, first_row)
+                    first_row += len(chunk)
+            report.validation.log_summary()
+            stage['rows'] = report.validation.rows
+
+    for sheet_name in SHEET_NAMES:
+        logger.info(f"Processing {sheet_name}...")
+        with report.stage(f"process_{sheet_name}") as stage:
+            for chunk in reader.iter_chunks(sheet_name):
+                triples, tags = tg.process_sheet(chunk, context.term_factory, SHEET_RELATIONSHIPS, relationship_field, resolver, tag_mode=tag_mode)
+                if inverses is not None:
+                    triples.extend(tg.generate_inverses(triples, inverses))
+                report.count_rows(stage, chunk)
+                stage['triples'] += len(triples) + len(tags)
+                yield [*triples, *tags]
+        logger.info(f"{stage['triples']} {sheet_name} triples generated.")
+
+    with report.stage("resolve_references"):
+        report.count_references(resolver)
+        resolver.log_summary()
@@ -0,0 +1,80 @@
+import contextlib
+import hashlib
+import io
+import os
+import sys
+from collections import Counter
+
+import openpyxl
+import pytest
+import rdflib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# the synthetic workbooks the benchmarks use
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from synthetic_workbook import write_workbook  # noqa: E402
+from brick_xlsx_generator.modules.ontology_store import GRAPH_NAMESPACE  # noqa: E402
+
+POINTS = 60
+
+
+@pytest.fixture(scope="session")
+def workbook(tmp_path_factory) -> str:
+    """
+    A small synthetic workbook: one location per 10 equipment and one equipment per 20 points, with refs, Switch relationships and tags.
+    """
+    path = str(tmp_path_factory.mktemp("workbooks") / "building.xlsx")
+    write_workbook(path, POINTS)
+    return path
+
+
+@pytest.fixture(scope="session")
+def edited_workbook(workbook, tmp_path_factory) -> str:
+    """
+    The workbook with a point relabelled, a point deleted and an equipment reclassified.
+    """
+    path = str(tmp_path_factory.mktemp("workbooks") / "edited.xlsx")
+    wb = openpyxl.load_workbook(workbook)
+    points = wb["points"]
+    points.cell(row=3, column=3, value="Relabelled point")
+    points.delete_rows(5)
+    wb["equipment"].cell(row=4, column=1, value="Pump")
+    wb.save(path)
+    return path
+
+
+def building_graph(ds, graph_name: str = "building") -> rdflib.Graph:
+    return ds.graph(GRAPH_NAMESPACE[graph_name])
+
+
+def quiet(function, *args, **kwargs):
+    """
+    Calls function, discarding the progress printed by the triple generator.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+def canonical(triples) -> Counter:
+    """
+    The triples with each blank node replaced by a hash of the triples below it, so models can be compared without rdflib's
+    (slow) isomorphism check. The blank nodes of a model (tag collections and key-value nodes) form trees, so this is exact for them.
+    """
+    triples = list(triples)
+    below = {}
+    for s, p, o in triples:
+        if isinstance(s, rdflib.BNode):
+            below.setdefault(s, []).append((p, o))
+    labels = {}
+
+    def label(term):
+        if not isinstance(term, rdflib.BNode):
+            return term
+        if term not in labels:
+            content = sorted(f"{p.n3()} {label(o).n3()}" for p, o in below.get(term, []))
+            labels[term] = rdflib.BNode(hashlib.sha256("\n".join(content).encode()).hexdigest())
+        return labels[term]
+
+    return Counter((label(s), p, label(o)) for s, p, o in triples)
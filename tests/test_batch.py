@@ -0,0 +1,52 @@
+import os
+import shutil
+
+import pytest
+import rdflib
+
+import brick_xlsx_generator as bg
+from brick_xlsx_generator.batch import convert_batch, load_jobs
+from conftest import building_graph, canonical, quiet
+
+
+@pytest.fixture(scope="module")
+def batch_dir(workbook, tmp_path_factory) -> str:
+    path = tmp_path_factory.mktemp("batch")
+    shutil.copy(workbook, path / "site.xlsx")
+    (path / "broken.xlsx").write_text("not a workbook")
+    # Excel lock files are skipped
+    (path / "~$site.xlsx").write_text("")
+    return str(path)
+
+
+def test_load_jobs_from_a_manifest(batch_dir, tmp_path):
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text(f"path,portfolio_name,building_name\n{os.path.join(batch_dir, 'site.xlsx')},campus,main\nbroken.xlsx,,\n")
+
+    assert load_jobs(str(manifest), "portfolio") == [
+        {'path': os.path.join(batch_dir, "site.xlsx"), 'portfolio_name': "campus", 'building_name': "main"},
+        {'path': str(tmp_path / "broken.xlsx"), 'portfolio_name': "portfolio", 'building_name': "broken"}
+    ]
+    with pytest.raises(FileNotFoundError):
+        load_jobs(str(tmp_path / "missing.csv"))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failed_files_do_not_stop_the_batch(workbook, batch_dir, tmp_path, workers):
+    results = quiet(convert_batch, batch_dir, str(tmp_path), "portfolio", timestamp=False, workers=workers)
+
+    assert [(result['building_name'], result['status']) for result in results] == [("broken", "failed"), ("site", "ok")]
+    assert results[0]['error']
+    site = results[1]
+    assert site['output'] == os.path.join(str(tmp_path), "Export_B_portfolio_site.ttl")
+
+    ds = bg.Dataset()
+    quiet(ds.process, workbook, "portfolio", "site")
+    assert site['triples'] == len(building_graph(ds))
+    assert canonical(rdflib.Graph().parse(site['output'])) == canonical(building_graph(ds))
+
+
+def test_unsupported_export_mode_is_rejected_up_front(batch_dir, tmp_path):
+    with pytest.raises(ValueError, match="Export mode: everything is not supported"):
+        convert_batch(batch_dir, str(tmp_path / "output"), export_mode="everything", workers=1)
+    assert not os.path.exists(tmp_path / "output")
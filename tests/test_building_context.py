@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+import rdflib
+
+import brick_xlsx_generator as bg
+from brick_xlsx_generator.modules.building_context import (BuildingContext, ReadWriteLock, building_namespace, building_prefix,
+                                                           parse_building_binding)
+from brick_xlsx_generator.modules.term_factory import TermFactory
+from conftest import quiet
+
+
+def test_namespaces_and_bindings():
+    context = BuildingContext("annex", "portfolio", "site", {}, TermFactory({}))
+
+    assert context.namespace == rdflib.Namespace("https://portfolio.com/site#")
+    assert context.namespaces['ref'] == context.namespace
+    assert context.names == {'portfolio': "portfolio", 'building': "site"}
+    assert context.prefix == "building_annex"
+    assert building_prefix("building") == "building"
+    assert parse_building_binding(context.prefix, context.namespace) == ("annex", "portfolio", "site")
+    assert parse_building_binding("building", building_namespace("p", "b")) == ("building", "p", "b")
+    assert parse_building_binding("brick", building_namespace("p", "b")) is None
+    assert parse_building_binding("building_x", "https://example.com/") is None
+
+
+def test_buildings_in_separate_graphs_keep_their_namespaces(workbook):
+    ds = bg.Dataset()
+    quiet(ds.process, workbook, "portfolio", "site")
+    quiet(ds.process, workbook, "portfolio", "annex", graph_name="annex")
+
+    assert ds.buildings == {
+        'building': {'portfolio': "portfolio", 'building': "site"},
+        'annex': {'portfolio': "portfolio", 'building': "annex"}
+    }
+    namespaces = dict(ds.namespaces())
+    assert namespaces["building"] == rdflib.URIRef("https://portfolio.com/site#")
+    assert namespaces["building_annex"] == rdflib.URIRef("https://portfolio.com/annex#")
+
+
+def test_locks_are_reentrant():
+    lock = ReadWriteLock()
+    with lock.read():
+        with lock.read():
+            pass
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+    # all released
+    with lock.write():
+        pass
+
+
+def test_read_lock_cannot_be_upgraded():
+    lock = ReadWriteLock()
+    with lock.read():
+        with pytest.raises(RuntimeError, match="holding a read lock"):
+            with lock.write():
+                pass
+    # the failed upgrade left nothing held
+    with lock.write():
+        pass
+
+
+def test_writer_waits_for_readers():
+    lock = ReadWriteLock()
+    events = []
+    reading, written = threading.Event(), threading.Event()
+
+    def write():
+        reading.wait()
+        with lock.write():
+            events.append("write")
+        written.set()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    with lock.read():
+        reading.set()
+        assert not written.wait(0.1)
+        events.append("read")
+    thread.join(5)
+
+    assert events == ["read", "write"]
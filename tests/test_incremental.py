@@ -0,0 +1,53 @@
+import pytest
+
+import brick_xlsx_generator as bg
+from conftest import building_graph, canonical, quiet
+
+
+def full_graph(path, tag_mode):
+    ds = bg.Dataset()
+    quiet(ds.process, path, tag_mode=tag_mode)
+    return building_graph(ds)
+
+
+@pytest.mark.parametrize("tag_mode", ["list", "shared", "flat"])
+def test_incremental_update_matches_full_run(workbook, edited_workbook, tag_mode):
+    ds = bg.Dataset()
+    quiet(ds.process, workbook, tag_mode=tag_mode, incremental=True)
+    report = quiet(ds.process, edited_workbook, tag_mode=tag_mode, incremental=True)
+
+    assert canonical(full_graph(workbook, tag_mode)) != canonical(full_graph(edited_workbook, tag_mode))
+    # only the edited entities are regenerated
+    assert report.stages['retract']['rows'] > 0
+    assert report.stages['add']['triples'] < len(building_graph(ds)) / 2
+    assert canonical(building_graph(ds)) == canonical(full_graph(edited_workbook, tag_mode))
+
+
+def test_unchanged_workbook_is_a_no_op(workbook):
+    ds = bg.Dataset()
+    quiet(ds.process, workbook, incremental=True)
+    before = set(building_graph(ds))
+    report = quiet(ds.process, workbook, incremental=True)
+
+    assert report.stages['retract']['rows'] == 0
+    assert report.stages['add']['triples'] == 0
+    assert set(building_graph(ds)) == before
+
+
+def test_tag_mode_change_rebuilds_graph(workbook):
+    ds = bg.Dataset()
+    quiet(ds.process, workbook, tag_mode="list", incremental=True)
+    report = quiet(ds.process, workbook, tag_mode="shared", incremental=True)
+
+    assert 'diff' not in report.stages
+    assert canonical(building_graph(ds)) == canonical(full_graph(workbook, "shared"))
+
+
+def test_non_incremental_run_discards_state(workbook, edited_workbook):
+    ds = bg.Dataset()
+    quiet(ds.process, workbook, incremental=True)
+    quiet(ds.process, edited_workbook)
+    # the state of the first run no longer describes the graph, so this run rebuilds it in full
+    quiet(ds.process, workbook, incremental=True)
+
+    assert canonical(building_graph(ds)) == canonical(full_graph(workbook, "list"))
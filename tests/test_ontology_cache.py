@@ -0,0 +1,120 @@
+import os
+
+import pytest
+import rdflib
+from rdflib.compare import isomorphic
+
+from brick_xlsx_generator.modules import ontology_cache
+
+ONTOLOGY = """
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <https://example.com#> .
+
+ex:Equipment a owl:Class .
+ex:Pump a owl:Class ; rdfs:subClassOf ex:Equipment, [ a owl:Restriction ; owl:onProperty ex:feeds ] .
+ex:feeds a owl:ObjectProperty ; owl:inverseOf ex:isFedBy ; rdfs:label "feeds" .
+"""
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch) -> str:
+    path = str(tmp_path / "cache")
+    monkeypatch.setenv("BRICK_XLSX_CACHE_DIR", path)
+    return path
+
+
+@pytest.fixture
+def parses(monkeypatch) -> list:
+    """
+    The paths (or None for raw data) parsed, as opposed to served from the cache.
+    """
+    calls = []
+    parse = ontology_cache.parse_ontology
+
+    def recording_parse(data=None, path=None):
+        calls.append(path)
+        return parse(data=data, path=path)
+
+    monkeypatch.setattr(ontology_cache, "parse_ontology", recording_parse)
+    return calls
+
+
+def write_ontology(path, extra: str = "") -> str:
+    path.write_text(ONTOLOGY + extra)
+    return str(path)
+
+
+def cached_files(cache_dir) -> list:
+    return sorted(os.listdir(cache_dir))
+
+
+def test_cached_ontology_matches_parsed(tmp_path, parses):
+    path = write_ontology(tmp_path / "ex.ttl")
+    parsed = rdflib.Graph()
+    ontology_cache.load_ontology(parsed, 'ex', 'local', path=path)
+    cached = rdflib.Graph()
+    ontology_cache.load_ontology(cached, 'ex', 'local', path=path)
+
+    assert parses == [path]
+    assert isomorphic(cached, rdflib.Graph().parse(path))
+    assert isomorphic(parsed, cached)
+    assert ("ex", rdflib.URIRef("https://example.com#")) in set(cached.namespaces())
+
+
+def test_local_files_are_cached_by_path(tmp_path, cache_dir, parses):
+    first, second = write_ontology(tmp_path / "first.ttl"), write_ontology(tmp_path / "second.ttl")
+    ontology_cache.get_ontology('ex', 'local', path=first)
+    ontology_cache.get_ontology('ex', 'local', path=second)
+
+    files = cached_files(cache_dir)
+    assert len(files) == 2
+    assert {file.split("-")[1] for file in files} == {ontology_cache.local_version(first), ontology_cache.local_version(second)}
+
+    # editing a file replaces its own entry only
+    write_ontology(tmp_path / "first.ttl", "ex:Fan a owl:Class .")
+    entry = ontology_cache.get_ontology('ex', 'local', path=first)
+    ontology_cache.get_ontology('ex', 'local', path=second)
+
+    assert parses == [first, second, first]
+    assert len(cached_files(cache_dir)) == 2
+    assert (rdflib.URIRef("https://example.com#Fan"), rdflib.RDF.type, rdflib.OWL.Class) in entry['triples']
+
+
+def test_subset_holds_the_class_hierarchy_and_inverses(cache_dir, parses):
+    data = ONTOLOGY.encode()
+    subset = ontology_cache.get_ontology('ex', '1.0', data=data, subset=True)
+
+    ex = rdflib.Namespace("https://example.com#")
+    assert set(subset['triples']) == {(ex.Pump, rdflib.RDFS.subClassOf, ex.Equipment), (ex.feeds, rdflib.OWL.inverseOf, ex.isFedBy)}
+    # built from the full ontology, which is cached too, sharing its digest
+    assert len(cached_files(cache_dir)) == 2
+    ontology_cache.get_ontology('ex', '1.0', data=data)
+    ontology_cache.get_ontology('ex', '1.0', data=data, subset=True)
+    assert parses == [None]
+
+
+def test_unreadable_entry_is_parsed_again(tmp_path, cache_dir, parses):
+    path = write_ontology(tmp_path / "ex.ttl")
+    ontology_cache.get_ontology('ex', 'local', path=path)
+    [file] = cached_files(cache_dir)
+    with open(os.path.join(cache_dir, file), "wb") as f:
+        f.write(b"not a pickle")
+
+    entry = ontology_cache.get_ontology('ex', 'local', path=path)
+
+    assert parses == [path, path]
+    assert len(entry['triples']) == len(rdflib.Graph().parse(path))
+    # and the entry is rewritten
+    ontology_cache.get_ontology('ex', 'local', path=path)
+    assert len(parses) == 2
+
+
+def test_cache_can_be_disabled_and_cleared(tmp_path, cache_dir, parses):
+    path = write_ontology(tmp_path / "ex.ttl")
+    ontology_cache.get_ontology('ex', 'local', path=path, use_cache=False)
+    assert not os.path.exists(cache_dir)
+
+    ontology_cache.get_ontology('ex', 'local', path=path)
+    ontology_cache.clear_cache()
+    assert cached_files(cache_dir) == []
@@ -0,0 +1,67 @@
+import gzip
+
+import pytest
+import rdflib
+
+import brick_xlsx_generator as bg
+from brick_xlsx_generator.modules.ontology_store import GRAPH_NAMESPACE
+from conftest import building_graph, canonical, quiet
+
+
+@pytest.fixture(scope="module")
+def model(workbook) -> rdflib.Graph:
+    ds = bg.Dataset()
+    quiet(ds.process, workbook)
+    return building_graph(ds)
+
+
+@pytest.mark.parametrize("chunk_size", [7, 10000])
+def test_streaming_matches_process(workbook, model, chunk_size):
+    ds = bg.Dataset()
+    quiet(ds.process, workbook, streaming=True, chunk_size=chunk_size)
+    assert canonical(building_graph(ds)) == canonical(model)
+
+
+def test_workers_match_process(workbook, model):
+    ds = bg.Dataset()
+    quiet(ds.process, workbook, workers=2)
+    assert canonical(building_graph(ds)) == canonical(model)
+
+
+def test_sparql_inverses_match_native_inverses(workbook, model):
+    ds = bg.Dataset()
+    quiet(ds.process, workbook, native_inverses=False)
+    assert canonical(building_graph(ds)) == canonical(model)
+
+
+def test_ntriples_output_matches_process(workbook, model, tmp_path):
+    path = tmp_path / "building.nt"
+    ds = bg.Dataset()
+    report = quiet(ds.process, workbook, output=str(path))
+
+    written = rdflib.Graph().parse(str(path), format="nt")
+    assert canonical(written) == canonical(model)
+    assert report.triples == len(path.read_text().splitlines())
+    # the model is written instead of added to the Dataset
+    assert len(building_graph(ds)) == 0
+    assert ds.buildings == {}
+
+
+def test_compressed_nquads_output_is_in_the_graph(workbook, model, tmp_path):
+    path = tmp_path / "building.nq.gz"
+    ds = bg.Dataset()
+    quiet(ds.process, workbook, graph_name="site", output=str(path), output_format="nquads")
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        written = rdflib.Dataset()
+        written.parse(data=f.read(), format="nquads")
+    assert {context.identifier for context in written.contexts() if len(context)} == {GRAPH_NAMESPACE["site"]}
+    assert canonical(written.graph(GRAPH_NAMESPACE["site"])) == canonical(model)
+
+
+@pytest.mark.parametrize("tag_mode", ["list", "shared", "flat"])
+def test_iter_triples_matches_process(workbook, tag_mode):
+    ds = bg.Dataset()
+    quiet(ds.process, workbook, tag_mode=tag_mode)
+    triples = quiet(list, bg.iter_triples(workbook, chunk_size=7, tag_mode=tag_mode))
+    assert canonical(set(triples)) == canonical(building_graph(ds))
@@ -0,0 +1,66 @@
+import pandas as pd
+
+from brick_xlsx_generator.modules.reference_resolver import ReferenceResolver
+
+
+def resolver(subjects, keys) -> ReferenceResolver:
+    resolver = ReferenceResolver()
+    resolver.add(subjects, keys)
+    return resolver
+
+
+def test_first_entity_defined_for_a_key_wins():
+    r = resolver(["a", "b", "c"], ["AHU 1", "AHU 1", "AHU 2"])
+
+    assert r.resolve("AHU 1") == "a"
+    assert r.resolve("AHU 2") == "c"
+    assert r.duplicates == {"AHU 1": ["b"]}
+    assert len(r) == 2
+
+
+def test_empty_keys_are_not_defined():
+    r = resolver(["a", "b", "c", "d"], ["", 0, None, "AHU 1"])
+
+    assert len(r) == 1
+    assert "" not in r
+    assert r.duplicates == {}
+
+
+def test_unresolved_references_are_counted():
+    r = resolver(["a", "b"], ["AHU 1", "AHU 2"])
+
+    assert r.resolve_many(["AHU 1", "missing", "AHU 2", "missing"]) == ["a", "b"]
+    assert r.unresolved == {"missing": 2}
+
+
+def test_resolve_column():
+    r = resolver(["a", "b"], ["AHU 1", "AHU 2"])
+    column = pd.Series(["AHU 2", "missing", "AHU 1"])
+
+    assert r.resolve_column(column).tolist() == ["b", None, "a"]
+    assert r.unresolved == {"missing": 1}
+    assert r.contains_column(column).tolist() == [True, False, True]
+    # membership tests are not lookups
+    assert r.unresolved == {"missing": 1}
+
+
+def test_from_dataframes_resolves_to_identifiers():
+    columns = pd.MultiIndex.from_tuples([("Brick", "identifier"), ("Brick", "label")])
+    dfs = [
+        pd.DataFrame([["ahu1", "AHU 1"]], columns=columns),
+        pd.DataFrame([["ahu1_sat", "SAT"], ["ahu2_sat", "SAT"]], columns=columns)
+    ]
+    r = ReferenceResolver.from_dataframes(dfs, ("Brick", "label"))
+
+    assert r.resolve("AHU 1") == "ahu1"
+    assert r.resolve("SAT") == "ahu1_sat"
+    assert r.duplicates == {"SAT": ["ahu2_sat"]}
+
+
+def test_changed_keys():
+    before = resolver(["a", "b", "c"], ["AHU 1", "AHU 2", "AHU 3"])
+    after = resolver(["a", "x", "d"], ["AHU 1", "AHU 2", "AHU 4"])
+
+    assert before.changed_keys(after) == {"AHU 2", "AHU 3", "AHU 4"}
+    assert after.changed_keys(before) == before.changed_keys(after)
+    assert before.changed_keys(before) == set()
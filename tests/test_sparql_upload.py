@@ -0,0 +1,98 @@
+import random
+from collections import Counter
+
+import pytest
+import rdflib
+
+import brick_xlsx_generator as bg
+from brick_xlsx_generator.modules.sparql_upload import SparqlUploader, batch_triples
+from conftest import building_graph, canonical, quiet
+from graph_store_server import GraphStoreServer
+
+GRAPH = rdflib.URIRef("https://example.com/graph")
+
+
+@pytest.fixture(scope="module")
+def triples(workbook) -> list:
+    # in generation order: each tag collection comes before the link from its entity
+    return quiet(list, bg.iter_triples(workbook))
+
+
+@pytest.fixture(scope="module")
+def model(workbook) -> bg.Dataset:
+    ds = bg.Dataset()
+    quiet(ds.process, workbook)
+    return ds
+
+
+@pytest.fixture
+def server():
+    server = GraphStoreServer().start()
+    yield server
+    server.stop()
+
+
+def bnodes(triple) -> set:
+    return {term for term in (triple[0], triple[2]) if isinstance(term, rdflib.BNode)}
+
+
+def check_batches(batches: list, triples: list):
+    assert Counter(triple for batch in batches for triple in batch) == Counter(triples)
+    batch_of = {}
+    for i, batch in enumerate(batches):
+        has_bnodes = [bool(bnodes(triple)) for triple in batch]
+        # blank node groups are batched apart from the idempotent triples
+        assert all(has_bnodes) or not any(has_bnodes)
+        for triple in batch:
+            for bnode in bnodes(triple):
+                assert batch_of.setdefault(bnode, i) == i, "a blank node group was split between batches"
+
+
+@pytest.mark.parametrize("batch_size", [1, 10, 1000])
+def test_blank_node_groups_are_not_split(triples, batch_size):
+    batches = list(batch_triples(triples, batch_size))
+    check_batches(batches, triples)
+    assert all(len(batch) <= batch_size for batch in batches if not any(bnodes(triple) for triple in batch))
+
+
+def test_blank_node_groups_in_any_order(triples):
+    shuffled = list(triples)
+    random.Random(0).shuffle(shuffled)
+    check_batches(list(batch_triples(shuffled, 10, linked_last=False)), shuffled)
+
+
+def test_linked_groups_are_batched_as_they_complete():
+    entity, link = rdflib.URIRef("https://example.com#entity"), rdflib.URIRef("https://example.com#tags")
+    cells = [rdflib.BNode() for _ in range(5)]
+    group = [(cell, rdflib.RDF.first, rdflib.Literal(i)) for i, cell in enumerate(cells)]
+    group += [(cell, rdflib.RDF.rest, rest) for cell, rest in zip(cells, cells[1:])]
+    triples = [*group, (entity, link, cells[0]), (entity, rdflib.RDF.type, link)]
+    # a group larger than batch_size is sent whole, as soon as it is linked
+    batches = list(batch_triples(triples, 2))
+    assert len(batches) == 2
+    assert Counter(batches[0]) == Counter([*group, (entity, link, cells[0])])
+    assert batches[1] == [(entity, rdflib.RDF.type, link)]
+
+
+@pytest.mark.parametrize("protocol, path", [("graph_store", "graph-store"), ("update", "update")])
+def test_upload_with_retries(model, server, protocol, path):
+    server.fail_rate = 0.2
+    report = model.upload(f"{server.url}/{path}", target_graph=str(GRAPH), protocol=protocol, batch_size=50, retries=10, backoff=0.001)
+
+    assert report.upload['retries'] > 0
+    assert report.upload['failed_batches'] == 0
+    assert canonical(server.graph(GRAPH)) == canonical(building_graph(model))
+
+
+def test_applied_blank_node_batches_are_not_retried(model, server):
+    server.applied_fail_rate = 0.3
+    with SparqlUploader(f"{server.url}/graph-store", batch_size=50, retries=10, backoff=0.001) as uploader:
+        with pytest.raises(bg.UploadError) as error:
+            uploader.upload(building_graph(model), GRAPH)
+
+    assert error.value.stats['failed_batches'] > 0
+    # retrying an applied blank node batch would add a second copy of its tag collections
+    uploaded = Counter(p for s, p, o in server.graph(GRAPH))
+    expected = Counter(p for s, p, o in building_graph(model))
+    assert all(uploaded[p] <= expected[p] for p in uploaded)
+    assert set(uploaded) == set(expected)
@@ -0,0 +1,73 @@
+import pytest
+import rdflib
+
+import brick_xlsx_generator as bg
+from brick_xlsx_generator.modules.sqlite_store import SQLiteStore
+from conftest import building_graph, canonical, quiet
+
+EX = rdflib.Namespace("https://example.com#")
+GRAPH = rdflib.URIRef("https://example.com/graph")
+
+
+def test_reopened_database_holds_the_model(workbook, tmp_path):
+    path = str(tmp_path / "portfolio.db")
+    memory = bg.Dataset()
+    quiet(memory.process, workbook, "portfolio", "site")
+
+    ds = bg.Dataset(store_path=path)
+    quiet(ds.process, workbook, "portfolio", "site")
+    quiet(ds.process, workbook, "portfolio", "annex", graph_name="annex")
+    ds.close()
+
+    reopened = bg.Dataset(store_path=path)
+    try:
+        assert reopened.buildings == {
+            'building': {'portfolio': "portfolio", 'building': "site"},
+            'annex': {'portfolio': "portfolio", 'building': "annex"}
+        }
+        assert canonical(building_graph(reopened)) == canonical(building_graph(memory))
+        report = reopened.export("building", str(tmp_path), timestamp=False)
+        assert report.output.endswith("Export_B_portfolio_site.ttl")
+        assert len(rdflib.Graph().parse(report.output)) == len(building_graph(memory))
+    finally:
+        reopened.close()
+
+
+def test_triple_patterns(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.db"))
+    g = rdflib.Dataset(store=store).graph(GRAPH)
+    g.add((EX.a, EX.p, EX.b))
+    g.add((EX.a, EX.p, rdflib.Literal("1", datatype=rdflib.XSD.integer)))
+    g.add((EX.b, EX.q, rdflib.Literal("b", lang="en")))
+
+    assert set(g.objects(EX.a, EX.p)) == {EX.b, rdflib.Literal(1)}
+    assert set(g.subjects(EX.q, rdflib.Literal("b", lang="en"))) == {EX.b}
+    assert len(g) == 3
+    g.remove((EX.a, None, None))
+    assert set(g) == {(EX.b, EX.q, rdflib.Literal("b", lang="en"))}
+    store.close()
+
+
+def test_term_cache_evicts_least_recently_used(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.db"), cache_size=5)
+    g = rdflib.Dataset(store=store).graph(GRAPH)
+    g.add((EX.hot, EX.p, EX.hot))
+    for i in range(20):
+        store._term_id(EX.hot)
+        # the graph, p and two new terms: the cache is full, but hot was used more recently than the terms evicted
+        g.add((EX[f"s{i}"], EX.p, EX[f"o{i}"]))
+        assert EX.hot in store._ids
+        assert len(store._ids) == len(store._terms) <= 5
+    assert len(g) == 21
+    assert set(g.objects(EX.s0, EX.p)) == {EX.o0}
+    store.close()
+
+
+def test_failed_batch_is_rolled_back(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.db"))
+    g = rdflib.Dataset(store=store).graph(GRAPH)
+    g.add((EX.a, EX.p, EX.b))
+    with pytest.raises(Exception, match="Context associated with"):
+        store.addN([(EX.c, EX.p, EX.d, g), (EX.e, EX.p, EX.f, None)])
+    assert set(g) == {(EX.a, EX.p, EX.b)}
+    store.close()
@@ -0,0 +1,106 @@
+import pickle
+
+import rdflib
+
+from brick_xlsx_generator.modules.triple_buffer import TermDictionary, TripleBuffer
+from conftest import canonical
+
+EX = rdflib.Namespace("https://example.com#")
+
+
+def model(terms: TermDictionary, points: int = 300) -> list:
+    triples = []
+    for i in range(points):
+        point = EX[f"point_{i}"]
+        tags = terms.bnode()
+        triples += [
+            (point, rdflib.RDF.type, EX.Temperature_Sensor),
+            (point, rdflib.RDFS.label, rdflib.Literal(f"Point {i} \U0001F321")),
+            (point, EX.unit, rdflib.Literal("°C", lang="en")),
+            (point, EX.tags, tags),
+            (tags, rdflib.RDF.first, rdflib.Literal("Temp")),
+            (tags, rdflib.RDF.rest, rdflib.RDF.nil)
+        ]
+    return triples
+
+
+def buffer(points: int = 300) -> TripleBuffer:
+    buffer = TripleBuffer()
+    buffer.extend(model(buffer.terms, points))
+    return buffer
+
+
+def test_iterates_the_triples_added():
+    b = TripleBuffer()
+    triples = model(b.terms)
+    b.extend(triples[:10])
+    for triple in triples[10:]:
+        b.add(triple)
+
+    term = b.terms.term
+    assert list(b) == [tuple(term(t) if isinstance(t, int) else t for t in triple) for triple in triples]
+
+
+def test_compact_round_trip():
+    b = buffer()
+    before = list(b)
+    nbytes = b.nbytes
+    b.compact()
+
+    # the same terms, blank nodes included
+    assert list(b) == before
+    assert b.nbytes < nbytes
+    assert b._p.typecode == 'b'
+
+
+def test_add_after_compact():
+    b = buffer()
+    b.compact()
+    b.add((EX.point_0, EX.isPointOf, EX.ahu))
+    b.add((EX.point_1, EX.isPointOf, b.terms.bnode()))
+
+    assert len(b) == 300 * 6 + 2
+    assert list(b)[-2] == (EX.point_0, EX.isPointOf, EX.ahu)
+    # existing terms keep their ids
+    assert b.terms.id(EX.point_0) == b.terms.id(rdflib.URIRef(str(EX.point_0)))
+    # isPointOf, ahu and the blank node
+    assert len(b.terms) == len(buffer().terms) + 3
+
+
+def test_merge():
+    first, second = buffer(), buffer(10)
+    second.compact()
+    expected = list(first) + list(second)
+    first.merge(second)
+
+    merged = list(first)
+    assert canonical(merged) == canonical(expected)
+    # blank nodes of the other buffer are kept apart
+    assert len({s for s, p, o in merged if isinstance(s, rdflib.BNode)}) == 310
+
+
+def test_merge_sharing_terms():
+    first = buffer()
+    second = TripleBuffer(first.terms)
+    second.add((EX.point_0, EX.isPointOf, EX.ahu))
+    second.compact()
+    first.merge(second)
+
+    assert list(first)[-1] == (EX.point_0, EX.isPointOf, EX.ahu)
+
+
+def test_pickle():
+    b = buffer()
+    b.compact()
+    unpickled = pickle.loads(pickle.dumps(b))
+
+    # blank nodes are created again when unpickled
+    assert canonical(unpickled) == canonical(b)
+    assert len(unpickled.terms) == len(b.terms)
+
+
+def test_write(tmp_path):
+    b = buffer()
+    path = tmp_path / "points.nt"
+    assert b.write(path) == len(b)
+    assert canonical(rdflib.Graph().parse(str(path), format="nt")) == canonical(b)
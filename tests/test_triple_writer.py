@@ -0,0 +1,69 @@
+import gzip
+import io
+
+import pytest
+import rdflib
+
+from brick_xlsx_generator.modules.triple_writer import TripleWriter, nt_row, nq_row
+from conftest import canonical
+
+EX = rdflib.Namespace("https://example.com#")
+GRAPH = rdflib.URIRef("https://example.com/graph")
+TAGS = rdflib.BNode()
+
+TRIPLES = [
+    (EX.ahu, rdflib.RDF.type, EX.AHU),
+    (EX.ahu, rdflib.RDFS.label, rdflib.Literal("AHU 1")),
+    (EX.ahu, rdflib.RDFS.comment, rdflib.Literal('line "one"\nline\\two\r\n' + "x" * 100)),
+    (EX.ahu, rdflib.RDFS.label, rdflib.Literal("Lüftung", lang="de")),
+    (EX.ahu, EX.capacity, rdflib.Literal("2.5", datatype=rdflib.XSD.decimal)),
+    (EX.ahu, EX.tags, TAGS),
+    (TAGS, rdflib.RDF.first, rdflib.Literal("Supply")),
+    (TAGS, rdflib.RDF.rest, rdflib.RDF.nil)
+]
+
+
+def test_ntriples_rows_parse_to_the_triples():
+    data = "".join(nt_row(triple) for triple in TRIPLES)
+    assert canonical(rdflib.Graph().parse(data=data, format="nt")) == canonical(TRIPLES)
+
+
+def test_nquads_rows_parse_to_the_graph():
+    ds = rdflib.Dataset()
+    ds.parse(data="".join(nq_row(triple, GRAPH) for triple in TRIPLES), format="nquads")
+    assert canonical(ds.graph(GRAPH)) == canonical(TRIPLES)
+
+
+@pytest.mark.parametrize("destination", ["building.nt", "building.nt.gz"])
+def test_write_to_path(tmp_path, destination):
+    path = tmp_path / destination
+    with TripleWriter(path) as writer:
+        writer.write(TRIPLES[:3])
+        writer.write(TRIPLES[3:])
+
+    assert writer.count == len(TRIPLES)
+    opener = gzip.open if destination.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        assert canonical(rdflib.Graph().parse(data=f.read(), format="nt")) == canonical(TRIPLES)
+
+
+def test_write_to_streams():
+    text = io.StringIO()
+    with TripleWriter(text, "nquads", graph=GRAPH) as writer:
+        writer.write(TRIPLES)
+    assert text.getvalue() == "".join(nq_row(triple, GRAPH) for triple in TRIPLES)
+
+    compressed = io.BytesIO()
+    with TripleWriter(compressed, compress=True) as writer:
+        writer.write(TRIPLES)
+    assert gzip.decompress(compressed.getvalue()).decode() == "".join(nt_row(triple) for triple in TRIPLES)
+
+    with pytest.raises(ValueError, match="binary file-like object"):
+        TripleWriter(io.StringIO(), compress=True)
+
+
+def test_unsupported_output():
+    with pytest.raises(ValueError, match="is not supported"):
+        TripleWriter(io.StringIO(), "turtle")
+    with pytest.raises(ValueError, match="graph identifier is required"):
+        TripleWriter(io.StringIO(), "nquads")
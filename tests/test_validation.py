@@ -0,0 +1,61 @@
+import openpyxl
+import pytest
+
+import brick_xlsx_generator as bg
+from conftest import quiet
+
+
+@pytest.fixture(scope="module")
+def invalid_workbook(workbook, tmp_path_factory) -> str:
+    path = str(tmp_path_factory.mktemp("workbooks") / "invalid.xlsx")
+    wb = openpyxl.load_workbook(workbook)
+    points = wb["points"]
+    points.cell(row=4, column=1, value="Not_A_Class")
+    points.cell(row=6, column=1, value="switch:Not_A_Class")
+    points.cell(row=7, column=4, value="missing equip")
+    points.cell(row=9, column=4, value="missing equip")
+    wb["equipment"].cell(row=3, column=7, value="Not_A_Substance")
+    wb.save(path)
+    return path
+
+
+@pytest.fixture(scope="module")
+def dataset() -> bg.Dataset:
+    return bg.Dataset()
+
+
+def issues(report) -> dict:
+    return {(issue['check'], issue['sheet'], issue['column'], issue['value']): issue['rows'] for issue in report.issues}
+
+
+def test_issues_are_reported_with_their_rows(dataset, invalid_workbook):
+    report = dataset.validate(invalid_workbook)
+
+    assert not report.valid
+    assert issues(report) == {
+        ('invalid_substance', "equipment", "Brick.hasInputSubstance", "Not_A_Substance"): [3],
+        # the synthetic workbook uses a Switch substance, which is not a brick:Substance
+        ('invalid_substance', "equipment", "Brick.hasInputSubstance", "switch:Chilled_Water"): [5],
+        ('unknown_class', "points", "Brick.class", "Not_A_Class"): [4],
+        ('unknown_switch_class', "points", "Brick.class", "switch:Not_A_Class"): [6],
+        ('unresolved_reference', "points", "Brick.isPointOf", "missing equip"): [7, 9]
+    }
+    assert report.counts() == {'invalid_substance': 2, 'unknown_class': 1, 'unknown_switch_class': 1, 'unresolved_reference': 2}
+    assert len(report.to_dataframe()) == 5
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_process_validates_before_generating(dataset, invalid_workbook, streaming):
+    ds = bg.Dataset()
+    report = quiet(ds.process, invalid_workbook, validate=True, streaming=streaming, chunk_size=5)
+
+    # rows are numbered across chunks as in the worksheet
+    assert issues(report.validation) == issues(dataset.validate(invalid_workbook))
+    assert report.triples > 0
+
+
+def test_subset_ontologies_skip_the_property_check(invalid_workbook):
+    report = bg.Dataset(ontology_mode="subset").validate(invalid_workbook)
+
+    assert report.skipped_checks == ['unknown_property']
+    assert report.counts()['unknown_class'] == 1
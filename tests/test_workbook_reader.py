@@ -0,0 +1,61 @@
+import openpyxl
+import pandas as pd
+import pytest
+
+from brick_xlsx_generator.modules import helpers
+from brick_xlsx_generator.modules.workbook_reader import SHEET_NAMES, WorkbookReader, clean_value
+
+
+@pytest.fixture(scope="module")
+def messy_workbook(tmp_path_factory) -> str:
+    """
+    A workbook with null markers, numbers, non-breaking spaces, an empty row and a duplicated column.
+    """
+    path = str(tmp_path_factory.mktemp("workbooks") / "messy.xlsx")
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for sheet_name in SHEET_NAMES:
+        sheet = wb.create_sheet(sheet_name)
+        sheet.append(["Brick", "Brick", "Brick", "Brick", "Brick"])
+        sheet.append(["identifier", "class", "label", "tags", "tags"])
+        sheet.append([f"{sheet_name}_1", "AHU", "AHU\xa01", "NA", None])
+        sheet.append([f"{sheet_name}_2", None, 3, 2.5, "n/a"])
+        sheet.append([None, None, None, None, None])
+        sheet.append([f"{sheet_name}_3", "Fan", "null", "", "Supply"])
+    wb.save(path)
+    return path
+
+
+def read_chunks(path: str, chunk_size: int) -> dict:
+    with WorkbookReader(path, chunk_size=chunk_size) as reader:
+        return {sheet_name: list(reader.iter_chunks(sheet_name)) for sheet_name in SHEET_NAMES}
+
+
+@pytest.mark.parametrize("chunk_size", [2, 10000])
+@pytest.mark.parametrize("fixture", ["workbook", "messy_workbook"])
+def test_chunks_match_import_model_template_file(request, fixture, chunk_size):
+    path = request.getfixturevalue(fixture)
+    df_equipment, df_locations, df_points = helpers.import_model_template_file(path)
+    expected = {'locations': df_locations, 'equipment': df_equipment, 'points': df_points}
+
+    for sheet_name, chunks in read_chunks(path, chunk_size).items():
+        assert all(len(chunk) <= chunk_size and chunk.name == sheet_name for chunk in chunks)
+        df = pd.concat(chunks, ignore_index=True)
+        assert df.columns.tolist() == expected[sheet_name].columns.tolist()
+        # fully empty rows define nothing, and are skipped by the reader
+        assert df.values.tolist() == [row for row in expected[sheet_name].values.tolist() if any(row)]
+
+
+def test_selected_columns(messy_workbook):
+    with WorkbookReader(messy_workbook) as reader:
+        [chunk] = reader.iter_chunks("points", columns=[("Brick", "label"), ("Brick", "identifier")])
+
+    assert chunk.columns.tolist() == [("Brick", "label"), ("Brick", "identifier")]
+    assert chunk.values.tolist() == [["AHU 1", "points_1"], ["3", "points_2"], [0, "points_3"]]
+
+
+@pytest.mark.parametrize("value, cleaned", [
+    (None, 0), ("NA", 0), ("", 0), ("nan", 0), (3.0, "3"), (2.5, "2.5"), (7, "7"), ("a\xa0b", "a b"), ("None", "None")
+])
+def test_clean_value(value, cleaned):
+    assert clean_value(value) == cleaned